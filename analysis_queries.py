@@ -0,0 +1,286 @@
+from histograms import (AGE_BUCKETS, bucket_counters, histogram_group, nest_bucket_counters,
+                        summarize_histograms)
+
+
+def finalize_age_comparison(rows):
+    """Average, exact median and count per type from the (type, age) histogram"""
+    return summarize_histograms(rows, 'average_age', {'median_age': 0.5}, 'count')
+
+
+def finalize_age_ranges(rows):
+    return nest_bucket_counters(rows, 'age_ranges', AGE_BUCKETS)
+
+
+# The 10 analysis questions, shared by every execution mode; an optional finalize turns the
+# raw pipeline output into the reported shape
+ANALYSIS_QUERIES = [
+    {
+        "key": "age_distribution",
+        "label": "1. Analyzing age distribution...",
+        "pipeline": [
+            {"$group": {
+                "_id": "$type",
+                "avg_age": {"$avg": "$age"},
+                "min_age": {"$min": "$age"},
+                "max_age": {"$max": "$age"},
+                "count": {"$sum": 1}
+            }}
+        ]
+    },
+    {
+        "key": "gender_distribution",
+        "label": "2. Analyzing gender distribution...",
+        "pipeline": [
+            {"$group": {
+                "_id": {"type": "$type", "sex": "$sex"},
+                "count": {"$sum": 1}
+            }},
+            {"$sort": {"_id.type": 1, "_id.sex": 1}}
+        ]
+    },
+    {
+        "key": "mbti_distribution",
+        "label": "3. Analyzing MBTI personality types...",
+        "pipeline": [
+            {"$group": {
+                "_id": "$mbti_personality",
+                "total_count": {"$sum": 1},
+                "influencer_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
+                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}}
+            }},
+            {"$sort": {"total_count": -1}},
+            {"$limit": 16}  # Top 16 MBTI types
+        ]
+    },
+    {
+        "key": "country_distribution",
+        "label": "4. Analyzing country distribution...",
+        "pipeline": [
+            {"$match": {"type": "influencer"}},
+            {"$group": {
+                "_id": "$location.country",
+                "count": {"$sum": 1}
+            }},
+            {"$sort": {"count": -1}},
+            {"$limit": 20}
+        ]
+    },
+    {
+        "key": "age_comparison",
+        "label": "5. Comparing average ages...",
+        # $median needs MongoDB 7.0 and buffers every age; a (type, age) histogram works everywhere
+        "pipeline": [histogram_group("$type", "age")],
+        "finalize": finalize_age_comparison
+    },
+    {
+        "key": "mbti_lifestyle",
+        "label": "6. Analyzing MBTI vs Lifestyle correlation...",
+        "pipeline": [
+            {"$match": {"type": "influencer", "profile.lifestyle": {"$ne": None}}},
+            {"$group": {
+                "_id": {
+                    "mbti": "$mbti_personality",
+                    "lifestyle": "$profile.lifestyle"
+                },
+                "count": {"$sum": 1}
+            }},
+            {"$sort": {"count": -1}},
+            {"$limit": 50}
+        ]
+    },
+    {
+        "key": "geo_age_demographics",
+        "label": "7. Analyzing geographic-age demographics...",
+        "pipeline": [
+            {"$match": {"type": "influencer"}},
+            {"$group": {
+                "_id": "$location.country",
+                "avg_age": {"$avg": "$age"},
+                # One counter per age range instead of $push-ing a label per document
+                **bucket_counters("age", AGE_BUCKETS, "age_ranges"),
+                "total_count": {"$sum": 1}
+            }},
+            {"$match": {"total_count": {"$gte": 100}}},  # Countries with at least 100 influencers
+            {"$sort": {"total_count": -1}},
+            {"$limit": 15}
+        ],
+        "finalize": finalize_age_ranges
+    },
+    {
+        "key": "personality_analysis",
+        "label": "8. Cross-dataset personality pattern analysis...",
+        "pipeline": [
+            {"$group": {
+                "_id": {
+                    "mbti": "$mbti_personality",
+                    "sex": "$sex",
+                    "age_group": {
+                        "$switch": {
+                            "branches": [
+                                {"case": {"$lt": ["$age", 30]}, "then": "Young"},
+                                {"case": {"$lt": ["$age", 50]}, "then": "Middle"},
+                                {"case": {"$gte": ["$age", 50]}, "then": "Senior"}
+                            ]
+                        }
+                    }
+                },
+                "influencer_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
+                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}},
+                "total_count": {"$sum": 1}
+            }},
+            {"$match": {"total_count": {"$gte": 50}}},
+            {"$sort": {"total_count": -1}},
+            {"$limit": 30}
+        ]
+    },
+    {
+        "key": "education_lifestyle",
+        "label": "9. Education level impact on lifestyle...",
+        "pipeline": [
+            {"$match": {"type": "influencer"}},
+            {"$group": {
+                "_id": {
+                    "education": "$profile.education_level",
+                    "lifestyle": "$profile.lifestyle"
+                },
+                "count": {"$sum": 1},
+                "avg_age": {"$avg": "$age"}
+            }},
+            {"$sort": {"count": -1}},
+            {"$limit": 25}
+        ]
+    },
+    {
+        "key": "demographic_comparison",
+        "label": "10. Comprehensive demographic comparison...",
+        "pipeline": [
+            {"$facet": {
+                "by_type": [
+                    {"$group": {
+                        "_id": "$type",
+                        "total_count": {"$sum": 1},
+                        "avg_age": {"$avg": "$age"},
+                        "male_count": {"$sum": {"$cond": [{"$eq": ["$sex", "Male"]}, 1, 0]}},
+                        "female_count": {"$sum": {"$cond": [{"$eq": ["$sex", "Female"]}, 1, 0]}},
+                        "most_common_mbti": {"$first": "$mbti_personality"}
+                    }}
+                ],
+                "mbti_comparison": [
+                    {"$group": {
+                        "_id": "$mbti_personality",
+                        "influencer_ratio": {
+                            "$avg": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}
+                        },
+                        "noble_ratio": {
+                            "$avg": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}
+                        },
+                        "total_count": {"$sum": 1}
+                    }},
+                    {"$sort": {"total_count": -1}},
+                    {"$limit": 16}
+                ]
+            }}
+        ]
+    }
+]
+
+
+def get_query(key):
+    """Look up a registered analysis query by its results key"""
+    for query in ANALYSIS_QUERIES:
+        if query['key'] == key:
+            return query
+    raise KeyError(key)
+
+
+def collect_field_refs(value, fields):
+    """Add every "$field" path referenced inside an expression to fields"""
+    if isinstance(value, str):
+        if value.startswith('$') and not value.startswith('$$'):
+            fields.add(value[1:])
+    elif isinstance(value, dict):
+        for item in value.values():
+            collect_field_refs(item, fields)
+    elif isinstance(value, list):
+        for item in value:
+            collect_field_refs(item, fields)
+
+
+def referenced_fields(pipeline):
+    """Document fields a pipeline reads before its first $group"""
+    fields = set()
+    for stage in pipeline:
+        if '$match' in stage:
+            for key, condition in stage['$match'].items():
+                if not key.startswith('$'):
+                    fields.add(key)
+                collect_field_refs(condition, fields)
+        elif '$facet' in stage:
+            for sub_pipeline in stage['$facet'].values():
+                fields |= referenced_fields(sub_pipeline)
+            break
+        elif '$group' in stage:
+            collect_field_refs(stage['$group'], fields)
+            break
+        else:
+            collect_field_refs(stage, fields)
+    return fields
+
+
+# The probes timed by SBPProjectDemo.demo_4_performance_analysis
+PERFORMANCE_PROBES = [
+    {
+        "key": "complex_filter",
+        "label": "Complex filter",
+        "filter": {
+            "type": "influencer",
+            "age": {"$gte": 25, "$lte": 35},
+            "sex": "Female"
+        }
+    },
+    {
+        "key": "geographic_aggregation",
+        "label": "Geographic aggregation",
+        "pipeline": [
+            {"$match": {"type": "influencer"}},
+            {"$group": {"_id": "$location.country", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 10}
+        ]
+    },
+    {
+        "key": "cross_type_mbti",
+        "label": "Cross-type MBTI analysis",
+        "pipeline": [
+            {"$group": {
+                "_id": "$mbti_personality",
+                "inf_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
+                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}}
+            }},
+            {"$sort": {"inf_count": -1}},
+            {"$limit": 16}
+        ]
+    }
+]
+
+
+def get_probe(key):
+    """Look up a registered performance probe by key"""
+    for probe in PERFORMANCE_PROBES:
+        if probe['key'] == key:
+            return probe
+    raise KeyError(key)
+
+
+def finalize(entry, data):
+    """Apply a registered query's finalize step (if any) to its raw pipeline output"""
+    if entry.get('finalize'):
+        return entry['finalize'](data)
+    return data
+
+
+def execute(collection, entry):
+    """Run a registered query or probe: filters are counted, pipelines are aggregated"""
+    if 'filter' in entry:
+        return collection.count_documents(entry['filter'])
+    return finalize(entry, list(collection.aggregate(entry['pipeline'])))
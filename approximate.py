@@ -0,0 +1,221 @@
+import math
+from statistics import NormalDist
+
+from query_cache import VERSION_COLLECTION, collection_version
+
+SAMPLE_COLLECTION = 'people_sample'
+DEFAULT_FRACTION = 0.05
+DEFAULT_CONFIDENCE = 0.95
+# Strata smaller than this are sampled at this size (or in full), so rare types still get intervals
+MIN_STRATUM_SAMPLE = 200
+HIDDEN = '__approx_'
+
+
+def build_stratified_sample(db, fraction=DEFAULT_FRACTION, source='people', target=SAMPLE_COLLECTION):
+    """Materialize a per-type $sample of people, each document weighted by stratum size / sample size"""
+    version = collection_version(db, source)
+    db[target].drop()
+    sizes = {}
+    for row in db[source].aggregate([{"$group": {"_id": "$type", "count": {"$sum": 1}}}]):
+        population = row['count']
+        size = min(population, max(MIN_STRATUM_SAMPLE, round(population * fraction)))
+        db[source].aggregate([
+            {"$match": {"type": row['_id']}},
+            {"$sample": {"size": size}},
+            {"$project": {"backstory": 0}},
+            {"$addFields": {"_weight": population / size}},
+            {"$merge": {"into": target, "whenMatched": "keepExisting"}}
+        ], allowDiskUse=True)
+        sizes[row['_id']] = (size, population)
+    db[VERSION_COLLECTION].update_one({'_id': target},
+                                      {'$set': {'source_version': version, 'fraction': fraction}}, upsert=True)
+    strata = ', '.join(f"{name}={size:,}/{population:,}" for name, (size, population) in sizes.items())
+    print(f"✓ Built {target} ({fraction:.0%} stratified by type: {strata})")
+    return sizes
+
+
+def sample_is_stale(db, fraction=DEFAULT_FRACTION, target=SAMPLE_COLLECTION):
+    meta = db[VERSION_COLLECTION].find_one({'_id': target})
+    return (meta is None or meta.get('source_version') != collection_version(db, 'people')
+            or meta.get('fraction') != fraction)
+
+
+def _hidden(field, stat):
+    return f"{HIDDEN}{field}__{stat}"
+
+
+def _is_indicator(expr):
+    """$cond that yields 1 or 0, i.e. a count of the rows meeting a condition"""
+    if not isinstance(expr, dict) or '$cond' not in expr:
+        return False
+    cond = expr['$cond']
+    branches = cond[1:] if isinstance(cond, list) else [cond.get('then'), cond.get('else')]
+    return sorted(branches) == [0, 1]
+
+
+def _is_count(expr):
+    return isinstance(expr, int) or _is_indicator(expr)
+
+
+def weighted_group(group):
+    """$group (plus a weighted-mean $addFields) estimating the population version of group
+
+    $sum becomes a Horvitz-Thompson total sum(w * x) with the (conservative, Poisson-sampling)
+    variance sum(w * (w - 1) * x^2);
+    $avg becomes sum(w * x) / sum(w), with the weighted variance and Kish effective sample size
+    kept for its interval. Other accumulators ($min, $max, $first, ...) run on the sample as is.
+    """
+    spec = {'_id': group['_id'], _hidden('', 'rows'): {"$sum": 1}, _hidden('', 'weight'): {"$sum": "$_weight"}}
+    means = {}
+    for field, accumulator in group.items():
+        if field == '_id':
+            continue
+        (operator, expr), = accumulator.items()
+        if operator == '$sum':
+            spec[field] = {"$sum": {"$multiply": [expr, "$_weight"]}}
+            # Counts are reported rounded, so their variance is tagged 'cvar'
+            stat = 'cvar' if _is_count(expr) else 'var'
+            spec[_hidden(field, stat)] = {"$sum": {"$multiply": [expr, expr, "$_weight",
+                                                                 {"$subtract": ["$_weight", 1]}]}}
+            if _is_indicator(expr):
+                spec[_hidden(field, 'hits')] = {"$sum": expr}
+        elif operator == '$avg':
+            weight = {"$cond": [{"$isNumber": expr}, "$_weight", 0]}
+            value = {"$cond": [{"$isNumber": expr}, expr, 0]}
+            spec[_hidden(field, 'w')] = {"$sum": weight}
+            spec[_hidden(field, 'ww')] = {"$sum": {"$multiply": [weight, weight]}}
+            spec[_hidden(field, 'wx')] = {"$sum": {"$multiply": [value, "$_weight"]}}
+            spec[_hidden(field, 'wxx')] = {"$sum": {"$multiply": [value, value, "$_weight"]}}
+            means[field] = {"$cond": [{"$gt": [f"${_hidden(field, 'w')}", 0]},
+                                      {"$divide": [f"${_hidden(field, 'wx')}", f"${_hidden(field, 'w')}"]}, None]}
+        else:
+            spec[field] = accumulator
+    return [{"$group": spec}] + ([{"$addFields": means}] if means else [])
+
+
+def weighted_pipeline(pipeline):
+    """Rewrite the first $group of a pipeline (and of each $facet branch) to weighted estimates
+
+    Later stages see population-scale counts, so HAVING-style $match thresholds keep their meaning.
+    Groups after the first one aggregate group rows rather than documents and are left alone.
+    """
+    rewritten = []
+    grouped = False
+    for stage in pipeline:
+        if '$group' in stage and not grouped:
+            rewritten.extend(weighted_group(stage['$group']))
+            grouped = True
+        elif '$facet' in stage and not grouped:
+            rewritten.append({"$facet": {name: weighted_pipeline(branch) for name, branch in stage['$facet'].items()}})
+        else:
+            rewritten.append(stage)
+    return rewritten
+
+
+def wilson_interval(share, n, z):
+    """Wilson score interval for a proportion estimated from n sampled rows"""
+    if n <= 0:
+        return None, None
+    center = (share + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(share * (1 - share) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def add_intervals(row, z):
+    """Turn a weighted group row's hidden accumulators into _ci / _share entries, recursively"""
+    if isinstance(row, list):
+        return [add_intervals(item, z) for item in row]
+    if not isinstance(row, dict):
+        return row
+    row = {key: add_intervals(value, z) for key, value in row.items()}
+    hidden = {key[len(HIDDEN):]: row.pop(key) for key in list(row) if key.startswith(HIDDEN)}
+    if not hidden:
+        return row
+    rows = hidden.pop('__rows', 0)
+    weight = hidden.pop('__weight', 0)
+    intervals = {}
+    shares = {}
+    for key, value in hidden.items():
+        field, stat = key.rsplit('__', 1)
+        if row.get(field) is None:
+            continue
+        if stat in ('var', 'cvar'):
+            margin = z * math.sqrt(max(value, 0.0))
+            intervals[field] = {'low': max(0.0, row[field] - margin), 'high': row[field] + margin, 'margin': margin}
+        elif stat == 'w' and value:
+            weights_squared = hidden[f"{field}__ww"]
+            effective_n = value * value / weights_squared if weights_squared else 0
+            variance = max(hidden[f"{field}__wxx"] / value - row[field] ** 2, 0.0)
+            if effective_n > 1:
+                margin = z * math.sqrt(variance / effective_n)
+                intervals[field] = {'low': row[field] - margin, 'high': row[field] + margin, 'margin': margin}
+        elif stat == 'hits' and weight:
+            # Share of the group meeting the $cond, with its interval from the rows actually sampled
+            share = row[field] / weight
+            low, high = wilson_interval(share, rows, z)
+            shares[field] = {'estimate': share, 'low': low, 'high': high}
+    for key in hidden:
+        field, stat = key.rsplit('__', 1)
+        if stat == 'cvar' and row.get(field) is not None:
+            row[field] = round(row[field])
+    row['_ci'] = intervals
+    if shares:
+        row['_share'] = shares
+    row['_sample_rows'] = rows
+    return row
+
+
+def widest_margins(rows, margins=None):
+    """Largest CI half-width per field over every row (and nested $facet row)"""
+    margins = {} if margins is None else margins
+    if isinstance(rows, list):
+        for row in rows:
+            widest_margins(row, margins)
+    elif isinstance(rows, dict):
+        for field, interval in rows.get('_ci', {}).items():
+            margins[field] = max(margins.get(field, 0.0), interval['margin'])
+        for value in rows.values():
+            if isinstance(value, (list, dict)):
+                widest_margins(value, margins)
+    return margins
+
+
+class ApproximateEngine:
+    """Answers aggregation pipelines from a sample, with scaled counts and confidence intervals
+
+    stratified=True reads the precomputed per-type sample collection (rebuilt when people changes);
+    stratified=False draws a fresh uniform $sample of people on every query. fraction trades accuracy
+    for latency: margins shrink with the square root of the sample size.
+    """
+
+    def __init__(self, db, fraction=DEFAULT_FRACTION, confidence=DEFAULT_CONFIDENCE, stratified=True):
+        self.db = db
+        self.fraction = fraction
+        self.confidence = confidence
+        self.stratified = stratified
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        if stratified and sample_is_stale(db, fraction):
+            build_stratified_sample(db, fraction)
+
+    def pipeline(self, pipeline):
+        if self.stratified:
+            return weighted_pipeline(pipeline)
+        population = self.db.people.estimated_document_count()
+        size = max(1, round(population * self.fraction))
+        return [
+            {"$sample": {"size": size}},
+            {"$addFields": {"_weight": population / size}},
+            *weighted_pipeline(pipeline)
+        ]
+
+    def aggregate(self, pipeline):
+        collection = self.db[SAMPLE_COLLECTION] if self.stratified else self.db.people
+        rows = list(collection.aggregate(self.pipeline(pipeline), allowDiskUse=True))
+        return add_intervals(rows, self.z)
+
+    def describe(self, rows):
+        """One-line summary of the sample and the widest interval per estimated field"""
+        margins = widest_margins(rows)
+        kind = 'stratified sample' if self.stratified else '$sample'
+        detail = ', '.join(f"{field} ±{margin:,.1f}" for field, margin in margins.items())
+        return f"≈ {self.fraction:.0%} {kind}, {self.confidence:.0%} CI: {detail or 'no estimated fields'}"
@@ -0,0 +1,126 @@
+import asyncio
+import inspect
+import io
+import sys
+import threading
+import time
+
+from analysis_queries import ANALYSIS_QUERIES, finalize
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+DEFAULT_CONCURRENCY = 4
+
+
+class AsyncQueryRunner:
+    """Runs independent registered queries concurrently, at most `concurrency` in flight at once"""
+
+    def __init__(self, aggregate, concurrency=DEFAULT_CONCURRENCY, uri=None, database='sbp_project',
+                 collection='people'):
+        # aggregate(pipeline) -> list runs on worker threads over the caller's pooled client;
+        # with a uri and Motor installed, pipelines are issued natively on the event loop instead
+        self.aggregate = aggregate
+        self.concurrency = concurrency
+        self.uri = uri if AsyncIOMotorClient is not None else None
+        self.database = database
+        self.collection = collection
+
+    async def _aggregate_native(self, db, pipeline):
+        cursor = db[self.collection].aggregate(pipeline)
+        if inspect.isawaitable(cursor):
+            cursor = await cursor
+        return await cursor.to_list(None)
+
+    async def _run_query(self, semaphore, query, db):
+        async with semaphore:
+            start_ns = time.perf_counter_ns()
+            if db is not None:
+                data = await self._aggregate_native(db, query['pipeline'])
+            else:
+                data = await asyncio.to_thread(self.aggregate, query['pipeline'])
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        return query['key'], finalize(query, data), elapsed
+
+    async def run_async(self, queries=ANALYSIS_QUERIES):
+        """Results keyed like run_analysis_queries, plus the overall wall time in seconds"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # A Motor client is bound to the loop that first uses it, so it lives for one run
+        client = AsyncIOMotorClient(self.uri) if self.uri else None
+        db = client[self.database] if client is not None else None
+        try:
+            start_ns = time.perf_counter_ns()
+            outcomes = await asyncio.gather(*(self._run_query(semaphore, query, db) for query in queries))
+            wall_time = (time.perf_counter_ns() - start_ns) / 1e9
+        finally:
+            if client is not None:
+                client.close()
+        return {key: {'data': data, 'time': elapsed} for key, data, elapsed in outcomes}, wall_time
+
+    def run(self, queries=ANALYSIS_QUERIES):
+        return asyncio.run(self.run_async(queries))
+
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout stand-in that sends each worker thread's prints to that thread's own buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+async def _run_section(semaphore, output, name, section):
+    def run():
+        output.local.buffer = io.StringIO()
+        try:
+            start_ns = time.perf_counter_ns()
+            section()
+            return output.local.buffer.getvalue(), (time.perf_counter_ns() - start_ns) / 1e9
+        finally:
+            output.local.buffer = None
+
+    async with semaphore:
+        text, elapsed = await asyncio.to_thread(run)
+    return name, text, elapsed
+
+
+async def _run_sections(sections, concurrency, output):
+    semaphore = asyncio.Semaphore(concurrency)
+    start_ns = time.perf_counter_ns()
+    outcomes = await asyncio.gather(*(_run_section(semaphore, output, name, section)
+                                      for name, section in sections.items()))
+    wall_time = (time.perf_counter_ns() - start_ns) / 1e9
+    return {name: {'output': text, 'time': elapsed} for name, text, elapsed in outcomes}, wall_time
+
+
+def run_sections_concurrently(sections, concurrency=DEFAULT_CONCURRENCY):
+    """Run independent print-based report sections in parallel; output is buffered per section"""
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        return asyncio.run(_run_sections(sections, concurrency, output))
+    finally:
+        sys.stdout = output.stream
+
+
+def print_concurrency_report(results, wall_time, concurrency):
+    """Per-task latency against the serial sum and the concurrent wall time"""
+    print("\n" + "="*60)
+    print(f"CONCURRENT EXECUTION (limit {concurrency})")
+    print("="*60)
+    for key, result in results.items():
+        print(f"{key:25}: {result['time']:.3f}s")
+    serial = sum(result['time'] for result in results.values())
+    slowest = max((result['time'] for result in results.values()), default=0.0)
+    print(f"{'SUM OF LATENCIES':25}: {serial:.3f}s")
+    print(f"{'SLOWEST SINGLE TASK':25}: {slowest:.3f}s")
+    print(f"{'WALL TIME':25}: {wall_time:.3f}s")
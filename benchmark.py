@@ -0,0 +1,215 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from pymongo import errors
+
+from analysis_queries import ANALYSIS_QUERIES, PERFORMANCE_PROBES, execute
+from connection_manager import get_manager
+
+
+def percentile(sorted_samples, fraction):
+    """Linearly interpolated percentile of an already sorted list"""
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def bootstrap_ci(samples, confidence=0.95, resamples=2000, seed=0):
+    """Bootstrap confidence interval of the median"""
+    if len(samples) < 2:
+        return samples[0], samples[0]
+    rng = random.Random(seed)
+    medians = sorted(
+        statistics.median(rng.choices(samples, k=len(samples))) for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    return percentile(medians, tail), percentile(medians, 1 - tail)
+
+
+def summarize(samples_ns, confidence=0.95):
+    """Latency statistics in milliseconds for a list of nanosecond samples"""
+    samples = sorted(ns / 1e6 for ns in samples_ns)
+    ci_low, ci_high = bootstrap_ci(samples, confidence)
+    return {
+        'n': len(samples),
+        'mean_ms': statistics.fmean(samples),
+        'stdev_ms': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'min_ms': samples[0],
+        'p50_ms': percentile(samples, 0.50),
+        'p95_ms': percentile(samples, 0.95),
+        'p99_ms': percentile(samples, 0.99),
+        'max_ms': samples[-1],
+        'ci_low_ms': ci_low,
+        'ci_high_ms': ci_high,
+        'confidence': confidence
+    }
+
+
+def restart_server_hook(db, command, timeout=120):
+    """cold_hook that restarts mongod with a shell command and waits until it answers again
+
+    command is site-specific, e.g. 'sudo systemctl restart mongod' (empties the WiredTiger cache),
+    optionally followed by 'sync && echo 3 | sudo tee /proc/sys/vm/drop_caches' for the OS page cache.
+    """
+    def hook():
+        subprocess.run(command, shell=True, check=True)
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                db.client.admin.command('ping')
+                return
+            except errors.ConnectionFailure:
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.5)
+    return hook
+
+
+class BenchmarkSuite:
+    """Warmup + repeated perf_counter_ns timings of the analysis queries and demo probes"""
+
+    def __init__(self, db, warmup=2, repetitions=10, confidence=0.95, cold_hook=None,
+                 collection='people', workload=None):
+        self.db = db
+        self.collection = db[collection]
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.confidence = confidence
+        self.cold_hook = cold_hook
+        self.workload = workload or ANALYSIS_QUERIES + PERFORMANCE_PROBES
+
+    def clear_plan_cache(self):
+        """Flush cached query plans; the WiredTiger and OS page caches stay warm"""
+        try:
+            self.db.command('planCacheClear', self.collection.name)
+        except errors.OperationFailure:
+            pass
+
+    def make_cold(self):
+        """Real cold start through cold_hook, e.g. restart_server_hook()"""
+        if self.cold_hook is None:
+            raise ValueError("cache='cold' needs a cold_hook such as restart_server_hook(); "
+                             "use 'plan-cache-cold' to only flush plans")
+        self.cold_hook()
+
+    def measure(self, entry, cache='warm'):
+        """Timed samples (ns) for one workload entry; cache is 'warm', 'plan-cache-cold' or 'cold'"""
+        if cache == 'warm':
+            for _ in range(self.warmup):
+                execute(self.collection, entry)
+
+        samples = []
+        for _ in range(self.repetitions):
+            if cache == 'plan-cache-cold':
+                self.clear_plan_cache()
+            elif cache == 'cold':
+                self.make_cold()
+            start = time.perf_counter_ns()
+            execute(self.collection, entry)
+            samples.append(time.perf_counter_ns() - start)
+        return samples
+
+    def run(self, caches=('warm',), label=None):
+        """Benchmark the whole workload and return a JSON-serializable report"""
+        print(f"\n=== BENCHMARK ({self.warmup} warmup, {self.repetitions} timed runs) ===")
+        report = {
+            'label': label,
+            'created_at': datetime.now().isoformat(),
+            'host': platform.node(),
+            'server_version': self.db.client.server_info().get('version'),
+            'documents': self.collection.estimated_document_count(),
+            'warmup': self.warmup,
+            'repetitions': self.repetitions,
+            'results': {}
+        }
+        for cache in caches:
+            report['results'][cache] = {}
+            for entry in self.workload:
+                stats = summarize(self.measure(entry, cache), self.confidence)
+                report['results'][cache][entry['key']] = stats
+                print(f"   [{cache}] {entry['key']:25} p50={stats['p50_ms']:8.2f}ms "
+                      f"p95={stats['p95_ms']:8.2f}ms "
+                      f"CI=[{stats['ci_low_ms']:.2f}, {stats['ci_high_ms']:.2f}]")
+        return report
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Benchmark report saved to {path}")
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """Per-query p50 change; a regression must exceed threshold and have disjoint CIs"""
+    comparison = {}
+    for cache, entries in current['results'].items():
+        for key, stats in entries.items():
+            base = baseline['results'].get(cache, {}).get(key)
+            if base is None:
+                continue
+            change = (stats['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] else 0.0
+            if change > threshold and stats['ci_low_ms'] > base['ci_high_ms']:
+                verdict = 'regression'
+            elif change < -threshold and stats['ci_high_ms'] < base['ci_low_ms']:
+                verdict = 'improvement'
+            else:
+                verdict = 'no significant change'
+            comparison[f"{cache}:{key}"] = {
+                'baseline_p50_ms': base['p50_ms'],
+                'current_p50_ms': stats['p50_ms'],
+                'change': change,
+                'verdict': verdict
+            }
+    return comparison
+
+
+def print_comparison(comparison):
+    for name, row in comparison.items():
+        print(f"{name:32}: {row['baseline_p50_ms']:8.2f}ms -> {row['current_p50_ms']:8.2f}ms "
+              f"({row['change'] * 100:+.1f}%, {row['verdict']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SBP analysis queries")
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--plan-cache-cold', action='store_true',
+                        help="also run repetitions with the plan cache flushed before each one")
+    parser.add_argument('--cold-restart-command',
+                        help="also run cold repetitions, restarting mongod with this shell command before each one")
+    parser.add_argument('--save', help="write the report to this JSON file")
+    parser.add_argument('--baseline', help="compare against a stored JSON report")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    db = get_manager().db
+    cold_hook = restart_server_hook(db, args.cold_restart_command) if args.cold_restart_command else None
+    suite = BenchmarkSuite(db, warmup=args.warmup, repetitions=args.repetitions, cold_hook=cold_hook)
+    caches = ['warm']
+    if args.plan_cache_cold:
+        caches.append('plan-cache-cold')
+    if cold_hook is not None:
+        caches.append('cold')
+    report = suite.run(caches=caches)
+    if args.save:
+        save_report(report, args.save)
+    if args.baseline:
+        comparison = compare_reports(load_report(args.baseline), report, args.threshold)
+        print("\nREGRESSION CHECK:")
+        print_comparison(comparison)
+        if any(row['verdict'] == 'regression' for row in comparison.values()):
+            raise SystemExit(1)
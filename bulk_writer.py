@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bson
+from pymongo import errors
+from pymongo.write_concern import WriteConcern
+
+from benchmark import percentile
+
+# One wire message is at most 48MB (and one document at most 16MB of BSON)
+MAX_MESSAGE_BYTES = 48 * 1024 * 1024
+MAX_WRITE_BATCH_DOCS = 100000
+DEFAULT_TARGET_BYTES = 4 * 1024 * 1024
+# Every Nth document is BSON-encoded to keep the average document size estimate current
+SIZE_SAMPLE_EVERY = 16
+# w:0 gives no completion signal, so close() polls the document count for at most this long
+VISIBILITY_TIMEOUT = 5
+
+WRITE_PROFILES = {
+    # Fire-and-forget: for throwaway reloads where a lost batch is simply reloaded
+    'unacknowledged': WriteConcern(w=0),
+    'acknowledged': WriteConcern(w=1),
+    # Acknowledged only once the batch is in the on-disk journal
+    'journaled': WriteConcern(w=1, j=True),
+}
+
+
+class BulkWriter:
+    """Byte-sized, pipelined insert_many batches under a selectable write-concern profile"""
+
+    def __init__(self, collection, profile='acknowledged', target_bytes=DEFAULT_TARGET_BYTES, max_in_flight=4,
+                 max_batch_docs=MAX_WRITE_BATCH_DOCS):
+        self.collection = collection.with_options(write_concern=WRITE_PROFILES[profile])
+        self.profile = profile
+        self.target_bytes = min(target_bytes, MAX_MESSAGE_BYTES)
+        self.max_batch_docs = max_batch_docs
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.lock = threading.Lock()
+        self.futures = []
+        self.batches = []
+        self.buffer = []
+        self.buffer_docs_seen = 0
+        self.avg_doc_bytes = None
+        self.submitted = 0
+        self.result = None
+        self.start_count = collection.estimated_document_count() if profile == 'unacknowledged' else 0
+        self.start_time = time.perf_counter()
+
+    def _batch_limit(self):
+        if self.avg_doc_bytes is None:
+            return 1
+        return max(1, min(self.max_batch_docs, int(self.target_bytes / self.avg_doc_bytes)))
+
+    def add(self, doc):
+        if self.buffer_docs_seen % SIZE_SAMPLE_EVERY == 0:
+            size = len(bson.encode(doc))
+            self.avg_doc_bytes = size if self.avg_doc_bytes is None else 0.9 * self.avg_doc_bytes + 0.1 * size
+        self.buffer_docs_seen += 1
+        self.buffer.append(doc)
+        if len(self.buffer) >= self._batch_limit():
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered documents to a writer thread, waiting while max_in_flight are pending"""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        estimated_bytes = int(len(batch) * (self.avg_doc_bytes or 0))
+        self.slots.acquire()
+        self.submitted += len(batch)
+        self.futures.append(self.executor.submit(self._write, batch, estimated_bytes))
+
+    def _write(self, batch, estimated_bytes):
+        stats = {'docs': len(batch), 'bytes': estimated_bytes, 'inserted': 0, 'errors': 0, 'messages': []}
+        start_ns = time.perf_counter_ns()
+        # Only per-document write errors are counted; any other failure propagates to close()
+        try:
+            result = self.collection.insert_many(batch, ordered=False)
+            stats['inserted'] = len(result.inserted_ids) if result.acknowledged else len(batch)
+        except errors.BulkWriteError as e:
+            # Unordered: every other document of the batch was still attempted
+            stats['inserted'] = e.details.get('nInserted', 0)
+            stats['errors'] = len(e.details.get('writeErrors', []))
+            stats['messages'] = [error.get('errmsg') for error in e.details.get('writeErrors', [])[:3]]
+        finally:
+            stats['latency_ms'] = (time.perf_counter_ns() - start_ns) / 1e6
+            with self.lock:
+                self.batches.append(stats)
+            self.slots.release()
+        return stats
+
+    def _await_visibility(self):
+        """w:0 returns before the server applies the writes; wait (briefly) until readers would see them
+
+        Only meant for throwaway benchmark reloads that query right after loading: the count is
+        bounded by what was submitted, and lost writes are reported rather than waited for.
+        """
+        expected = self.start_count + self.submitted
+        deadline = time.perf_counter() + VISIBILITY_TIMEOUT
+        count = self.collection.estimated_document_count()
+        while count < expected and time.perf_counter() < deadline:
+            time.sleep(0.1)
+            count = self.collection.estimated_document_count()
+        if count < expected:
+            print(f"⚠ {self.collection.name}: {expected - count:,} unacknowledged writes not visible "
+                  f"after {VISIBILITY_TIMEOUT}s")
+
+    def close(self):
+        """Flush, wait for every in-flight batch and return the write summary (idempotent)
+
+        Per-document write errors are counted in the summary; any other failure of a batch is
+        raised here once every batch has finished.
+        """
+        if self.result is None:
+            self.flush()
+            failure = None
+            for future in self.futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    failure = failure or e
+            self.executor.shutdown()
+            if failure is not None:
+                self.futures = []
+                raise failure
+            if self.profile == 'unacknowledged':
+                self._await_visibility()
+            self.result = self.summary()
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start_time
+        latencies = sorted(batch['latency_ms'] for batch in self.batches)
+        inserted = sum(batch['inserted'] for batch in self.batches)
+        return {
+            'profile': self.profile,
+            'batches': len(self.batches),
+            'docs': sum(batch['docs'] for batch in self.batches),
+            'inserted': inserted,
+            'errors': sum(batch['errors'] for batch in self.batches),
+            'messages': [message for batch in self.batches for message in batch['messages']][:5],
+            'avg_batch_docs': inserted / len(self.batches) if self.batches else 0,
+            'latency_p50_ms': percentile(latencies, 0.50) if latencies else 0.0,
+            'latency_p99_ms': percentile(latencies, 0.99) if latencies else 0.0,
+            'docs_per_sec': inserted / elapsed if elapsed else 0.0,
+            'mb_per_sec': sum(batch['bytes'] for batch in self.batches) / 1024 / 1024 / elapsed if elapsed else 0.0,
+            'time': elapsed
+        }
+
+
+def print_write_summary(name, summary):
+    print(f"   {name}: {summary['inserted']:,} docs in {summary['batches']} batches "
+          f"(~{summary['avg_batch_docs']:,.0f}/batch, {summary['profile']}) "
+          f"{summary['docs_per_sec']:,.0f} docs/s, {summary['mb_per_sec']:.1f} MB/s, "
+          f"batch p50={summary['latency_p50_ms']:.1f}ms p99={summary['latency_p99_ms']:.1f}ms")
+    if summary['errors']:
+        print(f"   ⚠ {summary['errors']:,} documents failed: {'; '.join(summary['messages'])}")
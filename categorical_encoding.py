@@ -0,0 +1,220 @@
+from index_specs import restore_index_specs, snapshot_index_specs, spec_fields
+from query_cache import VERSION_COLLECTION, collection_version
+
+CATEGORICAL_FIELDS = [
+    'type',
+    'sex',
+    'mbti_personality',
+    'location.country',
+    'profile.education_level',
+    'profile.lifestyle',
+    'profile.title',
+]
+OPTIONAL_FIELDS = ['location.state_province', 'location.realm', 'profile.activity', 'backstory']
+PLAIN_FIELDS = ['name', 'age', 'created_at', 'updated_at']
+
+DICTIONARY_COLLECTION = 'people_dictionary'
+ENCODED_COLLECTION = 'people_encoded'
+UNKNOWN_CODE = -1
+
+
+def build_dictionary(db, source='people'):
+    """Store the sorted label list of every categorical field; a label's code is its position"""
+    labels = {}
+    for field in CATEGORICAL_FIELDS:
+        values = [doc['_id'] for doc in db[source].aggregate([
+            {"$group": {"_id": "$" + field}}
+        ]) if doc['_id'] is not None]
+        # Sorted labels keep code order equal to label order, so $sort on codes matches
+        labels[field] = sorted(values)
+        db[DICTIONARY_COLLECTION].replace_one({'_id': field}, {'_id': field, 'labels': labels[field]}, upsert=True)
+    return labels
+
+
+def load_dictionary(db):
+    return {doc['_id']: doc['labels'] for doc in db[DICTIONARY_COLLECTION].find()}
+
+
+def _encoded(field, labels):
+    """Code of a field's label, or no field at all when the value is null or missing"""
+    return {"$let": {
+        "vars": {"code": {"$indexOfArray": [labels, "$" + field]}},
+        "in": {"$cond": [{"$lt": ["$$code", 0]}, "$$REMOVE", "$$code"]}
+    }}
+
+
+def _optional(field):
+    return {"$ifNull": ["$" + field, "$$REMOVE"]}
+
+
+def encode_collection(db, source='people', target=ENCODED_COLLECTION):
+    """Rewrite people with integer-coded categoricals and no null placeholders"""
+    version = collection_version(db, source)
+    labels = build_dictionary(db, source)
+    document = {
+        "_id": "$_id",
+        "name": "$name",
+        "age": "$age",
+        "location": {},
+        "profile": {},
+        "created_at": "$created_at",
+        "updated_at": "$updated_at"
+    }
+    for field in CATEGORICAL_FIELDS + OPTIONAL_FIELDS:
+        value = _encoded(field, labels[field]) if field in labels else _optional(field)
+        if '.' in field:
+            parent, child = field.split('.')
+            document[parent][child] = value
+        else:
+            document[field] = value
+
+    # $out keeps the target's old indexes; start from none so they match people's current ones
+    db[target].drop()
+    db[source].aggregate([
+        {"$replaceWith": document},
+        {"$out": target}
+    ], allowDiskUse=True)
+    restore_index_specs(db[target], encoded_index_specs(snapshot_index_specs(db[source]), labels))
+    db[VERSION_COLLECTION].update_one({'_id': target}, {'$set': {'source_version': version}}, upsert=True)
+    print(f"✓ Encoded {db[target].estimated_document_count():,} documents into {target}")
+    return labels
+
+
+def encoded_index_specs(specs, labels):
+    """people's index specs as they apply to the encoded collection
+
+    Partial filters on categorical labels are rewritten to codes; indexes over fields the encoded
+    documents do not carry (such as _key) are skipped.
+    """
+    codebook = {field: {label: code for code, label in enumerate(values)} for field, values in labels.items()}
+    encoded_fields = set(CATEGORICAL_FIELDS + OPTIONAL_FIELDS + PLAIN_FIELDS)
+    encoded = []
+    for spec in specs:
+        if not spec_fields(spec) <= encoded_fields:
+            print(f"⚠ Not rebuilding {spec['name']} on the encoded collection: it indexes fields it does not keep")
+            continue
+        if 'partialFilterExpression' in spec:
+            spec = dict(spec, partialFilterExpression=_encode_match(spec['partialFilterExpression'], codebook))
+        encoded.append(spec)
+    return encoded
+
+
+def encoded_is_stale(db, target=ENCODED_COLLECTION):
+    meta = db[VERSION_COLLECTION].find_one({'_id': target})
+    return meta is None or meta.get('source_version') != collection_version(db, 'people')
+
+
+def _code(codebook, field, label):
+    return codebook[field].get(label, UNKNOWN_CODE)
+
+
+def _encode_node(node, codebook):
+    """Replace label literals compared against categorical fields with their codes"""
+    if isinstance(node, list):
+        return [_encode_node(item, codebook) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    encoded = {}
+    for key, value in node.items():
+        if key in ('$eq', '$ne') and isinstance(value, list) and len(value) == 2:
+            left, right = value
+            if isinstance(left, str) and left[1:] in codebook and isinstance(right, str):
+                value = [left, _code(codebook, left[1:], right)]
+            elif isinstance(right, str) and right[1:] in codebook and isinstance(left, str):
+                value = [_code(codebook, right[1:], left), right]
+        encoded[key] = _encode_node(value, codebook)
+    return encoded
+
+
+def _encode_match(match, codebook):
+    encoded = {}
+    for field, condition in match.items():
+        if field in codebook and isinstance(condition, str):
+            condition = _code(codebook, field, condition)
+        elif field in codebook and isinstance(condition, dict):
+            condition = {op: _code(codebook, field, v) if isinstance(v, str) else v
+                         for op, v in condition.items()}
+        encoded[field] = condition
+    return encoded
+
+
+def encode_pipeline(pipeline, codebook):
+    """Rewrite a pipeline over people so it runs against the encoded collection"""
+    encoded = []
+    for stage in pipeline:
+        if '$match' in stage:
+            encoded.append({"$match": _encode_match(stage['$match'], codebook)})
+        elif '$facet' in stage:
+            encoded.append({"$facet": {
+                name: encode_pipeline(sub_pipeline, codebook) for name, sub_pipeline in stage['$facet'].items()
+            }})
+        else:
+            encoded.append(_encode_node(stage, codebook))
+    return encoded
+
+
+def _decoded_outputs(pipeline):
+    """Output paths of the first $group that carry a categorical code, mapped to their field"""
+    for stage in pipeline:
+        if '$group' not in stage:
+            continue
+        outputs = {}
+        group_id = stage['$group']['_id']
+        if isinstance(group_id, str) and group_id[1:] in CATEGORICAL_FIELDS:
+            outputs[('_id',)] = group_id[1:]
+        elif isinstance(group_id, dict):
+            for name, expression in group_id.items():
+                if isinstance(expression, str) and expression[1:] in CATEGORICAL_FIELDS:
+                    outputs[('_id', name)] = expression[1:]
+        for name, accumulator in stage['$group'].items():
+            if name == '_id' or not isinstance(accumulator, dict):
+                continue
+            for operator in ('$first', '$last', '$min', '$max'):
+                expression = accumulator.get(operator)
+                if isinstance(expression, str) and expression[1:] in CATEGORICAL_FIELDS:
+                    outputs[(name,)] = expression[1:]
+        return outputs
+    return {}
+
+
+def _decode_doc(doc, outputs, labels):
+    for path, field in outputs.items():
+        parent = doc
+        for part in path[:-1]:
+            parent = parent.get(part) if isinstance(parent, dict) else None
+        if not isinstance(parent, dict):
+            continue
+        # Nulls were dropped on encoding; people stores them explicitly, so restore them
+        code = parent.get(path[-1])
+        parent[path[-1]] = labels[field][code] if isinstance(code, int) else None
+    return doc
+
+
+def decode_results(pipeline, data, labels):
+    """Translate the codes in a query's results back to the labels print_results expects"""
+    if len(pipeline) == 1 and '$facet' in pipeline[0]:
+        for doc in data:
+            for name, sub_pipeline in pipeline[0]['$facet'].items():
+                decode_results(sub_pipeline, doc[name], labels)
+        return data
+    outputs = _decoded_outputs(pipeline)
+    for doc in data:
+        _decode_doc(doc, outputs, labels)
+    return data
+
+
+def run_encoded(db, query, labels, target=ENCODED_COLLECTION):
+    """Run one analysis query against the encoded collection and decode its results"""
+    codebook = {field: {label: code for code, label in enumerate(values)} for field, values in labels.items()}
+    data = list(db[target].aggregate(encode_pipeline(query['pipeline'], codebook)))
+    return decode_results(query['pipeline'], data, labels)
+
+
+def print_encoding_report(db, source='people', target=ENCODED_COLLECTION):
+    """Document and index sizes of the plain and encoded collections (which carry the same indexes)"""
+    print(f"{'COLLECTION':20} {'AVG DOC':>10} {'DATA SIZE':>15} {'INDEXES':>8} {'INDEX SIZE':>15}")
+    for name in (source, target):
+        stats = db.command('collStats', name)
+        print(f"{name:20} {stats.get('avgObjSize', 0):>9,}B {stats.get('size', 0):>15,} "
+              f"{stats.get('nindexes', 0):>8} {stats.get('totalIndexSize', 0):>15,}")
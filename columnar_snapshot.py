@@ -0,0 +1,261 @@
+import argparse
+import os
+import time
+
+from analysis_queries import ANALYSIS_QUERIES, finalize, referenced_fields
+from categorical_encoding import CATEGORICAL_FIELDS
+from connection_manager import get_manager
+from query_cache import collection_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+SNAPSHOT_PATH = 'people_snapshot.parquet'
+EXPORT_BATCH_SIZE = 10000
+# Nested people fields are flattened to dotted column names, so pipeline paths map 1:1 to columns
+SNAPSHOT_COLUMNS = ['_id', 'name', 'age', 'type', 'sex', 'mbti_personality', 'location.country',
+                    'location.state_province', 'location.realm', 'profile.education_level',
+                    'profile.lifestyle', 'profile.title', 'profile.activity', 'backstory']
+ACCUMULATORS = {'$avg': 'mean', '$min': 'min', '$max': 'max', '$sum': 'sum', '$push': 'list', '$first': 'first',
+                '$median': 'approximate_median'}
+COMPARISONS = {'$eq': 'equal', '$ne': 'not_equal', '$lt': 'less', '$lte': 'less_equal',
+               '$gt': 'greater', '$gte': 'greater_equal'}
+COMPARISON_DUNDERS = {'$lt': '__lt__', '$lte': '__le__', '$gt': '__gt__', '$gte': '__ge__'}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar snapshots need pyarrow (pip install pyarrow)")
+
+
+def _snapshot_schema(version):
+    fields = [pa.field('age', pa.int64())]
+    fields += [pa.field(name, pa.string()) for name in SNAPSHOT_COLUMNS if name != 'age']
+    fields.sort(key=lambda field: SNAPSHOT_COLUMNS.index(field.name))
+    return pa.schema(fields, metadata={'source_version': str(version)})
+
+
+def _column_value(doc, column):
+    value = doc
+    for part in column.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return str(value) if column == '_id' and value is not None else value
+
+
+def export_snapshot(db, path=SNAPSHOT_PATH, batch_size=EXPORT_BATCH_SIZE):
+    """Stream people into a Parquet file with dictionary-encoded categoricals"""
+    _require_pyarrow()
+    version = collection_version(db, 'people')
+    schema = _snapshot_schema(version)
+    tmp_path = path + '.tmp'
+
+    start_time = time.perf_counter()
+    rows = 0
+    # Only categoricals get a dictionary; free text like backstory would bloat one for no gain
+    with pq.ParquetWriter(tmp_path, schema, use_dictionary=CATEGORICAL_FIELDS, compression='zstd') as writer:
+        batch = []
+        for doc in db.people.find({}, batch_size=batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                writer.write_batch(_record_batch(batch, schema))
+                rows += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(_record_batch(batch, schema))
+            rows += len(batch)
+    os.replace(tmp_path, path)
+    elapsed = time.perf_counter() - start_time
+
+    size = os.path.getsize(path)
+    print(f"✓ Exported {rows:,} documents to {path} ({size / 1024 / 1024:.1f} MB) in {elapsed:.2f}s")
+    return {'rows': rows, 'bytes': size, 'time': elapsed}
+
+
+def _record_batch(docs, schema):
+    return pa.record_batch([[_column_value(doc, name) for doc in docs] for name in schema.names], schema=schema)
+
+
+def snapshot_is_stale(db, path=SNAPSHOT_PATH):
+    _require_pyarrow()
+    if not os.path.exists(path):
+        return True
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(b'source_version') != str(collection_version(db, 'people')).encode()
+
+
+def _sort_docs(docs, spec):
+    """Stable multi-key sort with MongoDB ordering of nulls (before every value)"""
+    for path, direction in reversed(list(spec.items())):
+        def key(doc, path=path):
+            value = _column_value(doc, path)
+            return (0,) if value is None else (1, value)
+        docs.sort(key=key, reverse=direction < 0)
+    return docs
+
+
+def _matches(doc, match):
+    for path, condition in match.items():
+        value = _column_value(doc, path)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, operand in condition.items():
+            if operator in ('$eq', '$ne'):
+                if (value == operand) != (operator == '$eq'):
+                    return False
+            elif value is None or not getattr(value, COMPARISON_DUNDERS[operator])(operand):
+                return False
+    return True
+
+
+def apply_post_group(stages, docs):
+    """Evaluate the $match/$sort/$limit stages that follow a $group on its (small) output"""
+    for stage in stages:
+        if '$match' in stage:
+            docs = [doc for doc in docs if _matches(doc, stage['$match'])]
+        elif '$sort' in stage:
+            docs = _sort_docs(docs, stage['$sort'])
+        elif '$limit' in stage:
+            docs = docs[:stage['$limit']]
+        else:
+            raise ValueError(f"Unsupported post-group stage: {list(stage)[0]}")
+    return docs
+
+
+class SnapshotEngine:
+    """Answers the registered analysis pipelines from a memory-mapped Parquet snapshot"""
+
+    def __init__(self, path=SNAPSHOT_PATH, workload=ANALYSIS_QUERIES):
+        _require_pyarrow()
+        columns = set()
+        for entry in workload:
+            columns |= referenced_fields(entry.get('pipeline', [])) | set(entry.get('filter', {}))
+        # backstory and the other unused columns are never read from disk; categoricals stay dictionary arrays
+        table = pq.read_table(path, columns=sorted(columns), memory_map=True,
+                              read_dictionary=[field for field in CATEGORICAL_FIELDS if field in columns])
+        self.table = table.unify_dictionaries().combine_chunks()
+        self.path = path
+
+    def _value(self, table, expression):
+        """Evaluate an aggregation expression to an array (or a scalar for constants)"""
+        if isinstance(expression, str) and expression.startswith('$'):
+            return table[expression[1:]]
+        if not isinstance(expression, dict):
+            return pa.scalar(expression)
+        operator, args = next(iter(expression.items()))
+        if operator in COMPARISONS:
+            left, right = (self._value(table, arg) for arg in args)
+            # In expressions null (or missing) sorts before every other BSON type, so null < 25 is
+            # true: where either side is null, compare null-ness instead (null ranks 0, values 1)
+            compare = getattr(pc, COMPARISONS[operator])
+            by_rank = compare(pc.cast(pc.is_valid(left), pa.int8()), pc.cast(pc.is_valid(right), pa.int8()))
+            return pc.coalesce(compare(left, right), by_rank)
+        if operator == '$and':
+            result = self._value(table, args[0])
+            for arg in args[1:]:
+                result = pc.and_(result, self._value(table, arg))
+            return result
+        if operator == '$cond':
+            condition, then, otherwise = (self._value(table, arg) for arg in args)
+            return pc.if_else(condition, then, otherwise)
+        if operator == '$switch':
+            branches = args['branches']
+            result = self._value(table, args.get('default'))
+            for branch in reversed(branches):
+                result = pc.if_else(self._value(table, branch['case']), self._value(table, branch['then']), result)
+            return result
+        raise ValueError(f"Unsupported expression operator: {operator}")
+
+    def _mask(self, table, match):
+        mask = None
+        for path, condition in match.items():
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for operator, operand in condition.items():
+                if operand is None and operator in ('$eq', '$ne'):
+                    part = pc.is_null(table[path]) if operator == '$eq' else pc.is_valid(table[path])
+                else:
+                    # Query semantics: a null field matches $ne but no other comparison
+                    part = pc.fill_null(getattr(pc, COMPARISONS[operator])(table[path], operand), operator == '$ne')
+                mask = part if mask is None else pc.and_(mask, part)
+        return mask
+
+    def _group(self, table, spec):
+        """Vectorized hash aggregation; returns group documents shaped like MongoDB's output"""
+        group_id = spec['_id']
+        key_paths = group_id if isinstance(group_id, dict) else {None: group_id}
+        columns = {}
+        for index, expression in enumerate(key_paths.values()):
+            columns[f'key{index}'] = self._value(table, expression)
+
+        aggregations = []
+        for name, accumulator in spec.items():
+            if name == '_id':
+                continue
+            operator, expression = next(iter(accumulator.items()))
+            value = self._value(table, expression)
+            if isinstance(value, pa.Scalar):
+                value = pa.repeat(value, table.num_rows)
+            elif pa.types.is_dictionary(value.type) and ACCUMULATORS[operator] in ('first', 'list'):
+                value = pc.cast(value, value.type.value_type)
+            columns[name] = value
+            aggregations.append((name, ACCUMULATORS[operator]))
+
+        if not columns:
+            return []
+        grouped = pa.table(columns).group_by([f'key{i}' for i in range(len(key_paths))], use_threads=False)
+        result = grouped.aggregate(aggregations)
+
+        docs = []
+        for row in result.to_pylist():
+            keys = [row[f'key{i}'] for i in range(len(key_paths))]
+            doc = {'_id': keys[0] if None in key_paths else dict(zip(key_paths, keys))}
+            for name, function in aggregations:
+                doc[name] = row[f'{name}_{function}']
+            docs.append(doc)
+        return docs
+
+    def aggregate(self, pipeline, table=None):
+        table = self.table if table is None else table
+        for position, stage in enumerate(pipeline):
+            if '$facet' in stage:
+                return [{name: self.aggregate(sub_pipeline, table) for name, sub_pipeline in stage['$facet'].items()}]
+            if '$match' in stage:
+                table = table.filter(self._mask(table, stage['$match']))
+            elif '$group' in stage:
+                return apply_post_group(pipeline[position + 1:], self._group(table, stage['$group']))
+            else:
+                raise ValueError(f"Unsupported pre-group stage: {list(stage)[0]}")
+        return table.to_pylist()
+
+    def execute(self, entry):
+        """Same contract as analysis_queries.execute: filters are counted, pipelines aggregated"""
+        if 'filter' in entry:
+            return int(pc.sum(self._mask(self.table, entry['filter'])).as_py() or 0)
+        return finalize(entry, self.aggregate(entry['pipeline']))
+
+    def run_analysis_queries(self):
+        """Results keyed like MongoDBProject.run_analysis_queries"""
+        results = {}
+        for query in ANALYSIS_QUERIES:
+            start_time = time.time()
+            data = finalize(query, self.aggregate(query['pipeline']))
+            results[query['key']] = {'data': data, 'time': time.time() - start_time}
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export people to a columnar snapshot and query it offline")
+    parser.add_argument('--path', default=SNAPSHOT_PATH)
+    parser.add_argument('--export', action='store_true', help="refresh the snapshot from MongoDB first")
+    args = parser.parse_args()
+
+    if args.export:
+        db = get_manager().db
+        export_snapshot(db, args.path)
+    engine = SnapshotEngine(args.path)
+    for key, result in engine.run_analysis_queries().items():
+        print(f"{key:25} {result['time'] * 1000:>9.2f} ms  {len(result['data']):>4} rows")
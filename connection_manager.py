@@ -0,0 +1,172 @@
+import importlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient, monitoring
+
+DEFAULT_URI = os.environ.get('SBP_MONGODB_URI', 'mongodb://localhost:27017/')
+DEFAULT_DATABASE = os.environ.get('SBP_MONGODB_DATABASE', 'sbp_project')
+# Wire compressors in preference order, with the Python package each one needs (zlib is built in)
+COMPRESSOR_MODULES = {'zstd': 'zstandard', 'snappy': 'snappy', 'zlib': 'zlib'}
+WAIT_SAMPLES = 10000
+# WriteConcern option names whose MongoClient keyword differs (wtimeout is in milliseconds either way)
+WRITE_CONCERN_OPTIONS = {'j': 'journal', 'wtimeout': 'wTimeoutMS'}
+
+
+def available_compressors(preferred=('zstd', 'snappy', 'zlib')):
+    """The preferred compressors whose Python support is installed, in order"""
+    available = []
+    for name in preferred:
+        try:
+            importlib.import_module(COMPRESSOR_MODULES[name])
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters and checkout wait times collected from CMAP events"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.wait_ms = deque(maxlen=WAIT_SAMPLES)
+        self.counters = {'created': 0, 'closed': 0, 'checkouts': 0, 'checkout_failures': 0,
+                         'checked_out': 0, 'max_checked_out': 0, 'pool_clears': 0}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.counters['pool_clears'] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self.lock:
+            self.counters['created'] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.counters['closed'] += 1
+
+    def connection_check_out_started(self, event):
+        # A thread checks out one connection at a time, so the thread id pairs start and finish
+        self.pending[threading.get_ident()] = time.perf_counter_ns()
+
+    def connection_check_out_failed(self, event):
+        self.pending.pop(threading.get_ident(), None)
+        with self.lock:
+            self.counters['checkout_failures'] += 1
+
+    def connection_checked_out(self, event):
+        started = self.pending.pop(threading.get_ident(), None)
+        with self.lock:
+            if started is not None:
+                self.wait_ms.append((time.perf_counter_ns() - started) / 1e6)
+            self.counters['checkouts'] += 1
+            self.counters['checked_out'] += 1
+            self.counters['max_checked_out'] = max(self.counters['max_checked_out'], self.counters['checked_out'])
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.counters['checked_out'] -= 1
+
+    def snapshot(self, max_pool_size):
+        with self.lock:
+            counters = dict(self.counters)
+            waits = sorted(self.wait_ms)
+        counters['open'] = counters['created'] - counters['closed']
+        counters['peak_utilization'] = counters['max_checked_out'] / max_pool_size if max_pool_size else 0.0
+        counters['wait_p50_ms'] = waits[int(0.50 * (len(waits) - 1))] if waits else 0.0
+        counters['wait_p99_ms'] = waits[int(0.99 * (len(waits) - 1))] if waits else 0.0
+        counters['wait_max_ms'] = waits[-1] if waits else 0.0
+        return counters
+
+    def reset_peaks(self):
+        with self.lock:
+            self.counters['max_checked_out'] = self.counters['checked_out']
+            self.wait_ms.clear()
+
+
+class ConnectionManager:
+    """One tuned, instrumented MongoClient shared by everything in the process"""
+
+    def __init__(self, uri=DEFAULT_URI, database=DEFAULT_DATABASE, max_pool_size=50, min_pool_size=4,
+                 max_idle_time_ms=60000, compressors=('zstd', 'snappy'), read_preference='primary',
+                 write_concern=None, server_selection_timeout_ms=30000):
+        self.uri = uri
+        self.database = database
+        self.max_pool_size = max_pool_size
+        self.metrics = PoolMetrics()
+        options = {
+            'maxPoolSize': max_pool_size,
+            'minPoolSize': min_pool_size,
+            'maxIdleTimeMS': max_idle_time_ms,
+            'readPreference': read_preference,
+            'serverSelectionTimeoutMS': server_selection_timeout_ms,
+            'event_listeners': [self.metrics]
+        }
+        self.compressors = available_compressors(compressors) if compressors else []
+        if self.compressors:
+            options['compressors'] = ','.join(self.compressors)
+        # write_concern is a dict of WriteConcern options, e.g. {'w': 1, 'j': True, 'wtimeout': 5000}
+        for name, value in (write_concern or {}).items():
+            options[WRITE_CONCERN_OPTIONS.get(name, name)] = value
+        self.options = options
+        self.client = MongoClient(uri, **options)
+        self.db = self.client[database]
+
+    def warm_up(self, connections=None):
+        """Ping the server and open pooled connections up front instead of on the first queries"""
+        connections = connections or self.options['minPoolSize'] or 1
+        start_time = time.perf_counter()
+        # Concurrent pings make the pool open up to that many connections
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: self.client.admin.command('ping'), range(connections)))
+        elapsed = time.perf_counter() - start_time
+        print(f"✓ Warmed up {self.metrics.snapshot(self.max_pool_size)['open']} pooled connections "
+              f"in {elapsed * 1000:.1f}ms")
+        return elapsed
+
+    def pool_stats(self):
+        return self.metrics.snapshot(self.max_pool_size)
+
+    def print_pool_stats(self):
+        stats = self.pool_stats()
+        print("\nCONNECTION POOL:")
+        print(f"   Open connections: {stats['open']} (created {stats['created']}, closed {stats['closed']})")
+        print(f"   Peak checked out: {stats['max_checked_out']}/{self.max_pool_size} "
+              f"({stats['peak_utilization']:.0%} utilization)")
+        print(f"   Checkouts: {stats['checkouts']:,} ({stats['checkout_failures']} failed)")
+        print(f"   Checkout wait: p50={stats['wait_p50_ms']:.3f}ms p99={stats['wait_p99_ms']:.3f}ms "
+              f"max={stats['wait_max_ms']:.3f}ms")
+        print(f"   Compression: {', '.join(self.compressors) or 'none'}")
+
+    def close(self):
+        self.client.close()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(**options):
+    """Process-wide ConnectionManager for a set of options, created on first use"""
+    key = tuple(sorted((name, repr(value)) for name, value in options.items()))
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ConnectionManager(**options)
+        return _managers[key]
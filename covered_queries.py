@@ -0,0 +1,97 @@
+from analysis_queries import ANALYSIS_QUERIES, referenced_fields
+from query_cache import VERSION_COLLECTION, collection_version
+from query_explain import explain_entry, summarize_explain
+
+SLIM_COLLECTION = 'people_slim'
+COVERING_INDEX = 'covering_analytics'
+
+
+def workload_fields(queries=ANALYSIS_QUERIES):
+    """Every field any analysis query reads, most frequently used first"""
+    counts = {}
+    for query in queries:
+        for field in referenced_fields(query['pipeline']):
+            counts[field] = counts.get(field, 0) + 1
+    return sorted(counts, key=lambda field: (-counts[field], field))
+
+
+def covered_pipeline(pipeline):
+    """Insert an early $project of only the referenced fields so the engine never sees backstory"""
+    projection = {field: 1 for field in sorted(referenced_fields(pipeline))}
+    projection['_id'] = 0
+    if pipeline and '$match' in pipeline[0]:
+        return [pipeline[0], {"$project": projection}] + pipeline[1:]
+    return [{"$project": projection}] + pipeline
+
+
+def ensure_covering_index(collection, queries=ANALYSIS_QUERIES):
+    """One index holding every analysed field, so each query can run as a covered index scan"""
+    keys = [(field, 1) for field in workload_fields(queries)]
+    collection.create_index(keys, name=COVERING_INDEX)
+    print(f"✓ Created covering index {COVERING_INDEX}: {[field for field, _ in keys]}")
+    return COVERING_INDEX
+
+
+def covering_index_for(collection, fields):
+    """Name of the smallest index containing all fields, or None (fields are never arrays here)"""
+    best = None
+    for index in collection.list_indexes():
+        keys = list(index['key'])
+        if index['name'] == '_id_' or not set(fields) <= set(keys):
+            continue
+        if best is None or len(keys) < best[1]:
+            best = (index['name'], len(keys))
+    return best[0] if best else None
+
+
+def run_covered(collection, query):
+    """Run one analysis query projected early and hinted onto a covering index when there is one"""
+    pipeline = covered_pipeline(query['pipeline'])
+    hint = covering_index_for(collection, referenced_fields(query['pipeline']))
+    if hint:
+        return list(collection.aggregate(pipeline, hint=hint))
+    return list(collection.aggregate(pipeline))
+
+
+def build_slim_collection(db, source='people', target=SLIM_COLLECTION):
+    """Materialize people without backstory as a compact companion collection"""
+    version = collection_version(db, 'people')
+    db[source].aggregate([
+        {"$project": {"backstory": 0}},
+        {"$out": target}
+    ], allowDiskUse=True)
+    db[VERSION_COLLECTION].update_one({'_id': target}, {'$set': {'source_version': version}}, upsert=True)
+    print(f"✓ Built {target} with {db[target].estimated_document_count():,} documents")
+
+
+def slim_is_stale(db, target=SLIM_COLLECTION):
+    meta = db[VERSION_COLLECTION].find_one({'_id': target})
+    return meta is None or meta.get('source_version') != collection_version(db, 'people')
+
+
+def bytes_examined(db, collection_name, query, covered=False):
+    """Estimated bytes a query reads: fetched documents at avgObjSize plus examined index keys"""
+    entry = query
+    if covered:
+        entry = dict(query, pipeline=covered_pipeline(query['pipeline']),
+                     hint=covering_index_for(db[collection_name], referenced_fields(query['pipeline'])))
+    summary = summarize_explain(explain_entry(db, collection_name, entry))
+    stats = db.command('collStats', collection_name)
+    avg_obj_size = stats.get('avgObjSize', 0)
+    indexes = stats.get('indexSizes', {})
+    count = stats.get('count', 0) or 1
+    key_size = sum(indexes.get(name, 0) for name in summary['indexes']) / count
+    return int(summary['docs_examined'] * avg_obj_size + summary['keys_examined'] * key_size)
+
+
+def print_bytes_report(db, queries=ANALYSIS_QUERIES):
+    """Compare estimated bytes examined for people, covered people and people_slim"""
+    print("\n" + "="*60)
+    print("BYTES EXAMINED PER QUERY (estimated)")
+    print("="*60)
+    print(f"{'QUERY':25} {'PEOPLE':>14} {'COVERED':>14} {'SLIM':>14}")
+    for query in queries:
+        full = bytes_examined(db, 'people', query)
+        covered = bytes_examined(db, 'people', query, covered=True)
+        slim = bytes_examined(db, SLIM_COLLECTION, query)
+        print(f"{query['key']:25} {full:>14,} {covered:>14,} {slim:>14,}")
@@ -1,16 +1,40 @@
 # Final Demo Script - Complete SBP Project Demonstration
 
-from pymongo import MongoClient
 import time
 import json
+from analysis_queries import get_probe
+from approximate import ApproximateEngine
+from async_runner import print_concurrency_report, run_sections_concurrently
+from connection_manager import get_manager
+from query_cache import QueryCache
+from vertical_split import find_person
 
 class SBPProjectDemo:
-    def __init__(self):
-        self.client = MongoClient('mongodb://localhost:27017/')
-        self.db = self.client['sbp_project']
+    def __init__(self, use_cache=False, connection=None, approximate=None):
+        # Shares MongoDBProject's pool (and its server selection timeout) when run in one process
+        self.connection = connection or get_manager()
+        self.client = self.connection.client
+        self.db = self.connection.db
+        self.cache = QueryCache(self.db) if use_cache else None
+        # approximate=<sample fraction> answers demos 2 and 3 from a stratified sample; exact by default
+        self.approximate = ApproximateEngine(self.db, fraction=approximate) if approximate else None
         print("🎯 SBP Project Demo - Ready!")
         print("="*60)
     
+    def _aggregate(self, pipeline):
+        """Run a pipeline over people, through the query cache when enabled"""
+        if self.cache is not None:
+            return self.cache.aggregate(self.db.people, pipeline)
+        return list(self.db.people.aggregate(pipeline))
+    
+    def _interactive_aggregate(self, pipeline):
+        """_aggregate for the dashboard-style demos, estimated from the sample when approximate"""
+        if self.approximate is None:
+            return self._aggregate(pipeline)
+        results = self.approximate.aggregate(pipeline)
+        print(f"   {self.approximate.describe(results)}")
+        return results
+    
     def demo_1_data_overview(self):
         """Demo 1: Data Overview and Statistics"""
         print("\n📊 DEMO 1: DATA OVERVIEW")
@@ -28,13 +52,13 @@ class SBPProjectDemo:
         
         # Sample documents
         print(f"\nSAMPLE INFLUENCER:")
-        inf_sample = self.db.people.find_one({"type": "influencer"})
+        inf_sample = find_person(self.db, {"type": "influencer"})
         for key, value in inf_sample.items():
             if key != '_id' and key != 'created_at' and key != 'updated_at':
                 print(f"  {key}: {value}")
         
         print(f"\nSAMPLE NOBLE:")
-        noble_sample = self.db.people.find_one({"type": "noble"})
+        noble_sample = find_person(self.db, {"type": "noble"})
         for key, value in noble_sample.items():
             if key != '_id' and key != 'created_at' and key != 'updated_at':
                 print(f"  {key}: {value}")
@@ -47,7 +71,7 @@ class SBPProjectDemo:
         # Query 1: Age Distribution
         print("1. AGE DISTRIBUTION ANALYSIS")
         start = time.time()
-        age_dist = list(self.db.people.aggregate([
+        age_dist = self._interactive_aggregate([
             {"$group": {
                 "_id": "$type",
                 "avg_age": {"$avg": "$age"},
@@ -55,7 +79,7 @@ class SBPProjectDemo:
                 "max_age": {"$max": "$age"},
                 "count": {"$sum": 1}
             }}
-        ]))
+        ])
         query1_time = time.time() - start
         
         for result in age_dist:
@@ -65,13 +89,13 @@ class SBPProjectDemo:
         # Query 2: Gender Distribution
         print("\n2. GENDER DISTRIBUTION")
         start = time.time()
-        gender_dist = list(self.db.people.aggregate([
+        gender_dist = self._interactive_aggregate([
             {"$group": {
                 "_id": {"type": "$type", "sex": "$sex"},
                 "count": {"$sum": 1}
             }},
             {"$sort": {"_id.type": 1, "_id.sex": 1}}
-        ]))
+        ])
         query2_time = time.time() - start
         
         for result in gender_dist:
@@ -81,7 +105,7 @@ class SBPProjectDemo:
         # Query 3: Top MBTI Types
         print("\n3. TOP MBTI PERSONALITY TYPES")
         start = time.time()
-        mbti_dist = list(self.db.people.aggregate([
+        mbti_dist = self._interactive_aggregate([
             {"$group": {
                 "_id": "$mbti_personality",
                 "total_count": {"$sum": 1},
@@ -90,7 +114,7 @@ class SBPProjectDemo:
             }},
             {"$sort": {"total_count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query3_time = time.time() - start
         
         for result in mbti_dist:
@@ -100,7 +124,7 @@ class SBPProjectDemo:
         # Query 4: Top Countries
         print("\n4. TOP COUNTRIES (Influencers)")
         start = time.time()
-        country_dist = list(self.db.people.aggregate([
+        country_dist = self._interactive_aggregate([
             {"$match": {"type": "influencer"}},
             {"$group": {
                 "_id": "$location.country",
@@ -108,7 +132,7 @@ class SBPProjectDemo:
             }},
             {"$sort": {"count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query4_time = time.time() - start
         
         for result in country_dist:
@@ -118,13 +142,13 @@ class SBPProjectDemo:
         # Query 5: Age Comparison
         print("\n5. AVERAGE AGE COMPARISON")
         start = time.time()
-        age_comparison = list(self.db.people.aggregate([
+        age_comparison = self._interactive_aggregate([
             {"$group": {
                 "_id": "$type",
                 "average_age": {"$avg": "$age"},
                 "count": {"$sum": 1}
             }}
-        ]))
+        ])
         query5_time = time.time() - start
         
         for result in age_comparison:
@@ -142,7 +166,7 @@ class SBPProjectDemo:
         # Query 6: MBTI vs Lifestyle Correlation
         print("6. MBTI vs LIFESTYLE CORRELATION (Influencers)")
         start = time.time()
-        mbti_lifestyle = list(self.db.people.aggregate([
+        mbti_lifestyle = self._interactive_aggregate([
             {"$match": {"type": "influencer"}},
             {"$group": {
                 "_id": {
@@ -153,7 +177,7 @@ class SBPProjectDemo:
             }},
             {"$sort": {"count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query6_time = time.time() - start
         
         for result in mbti_lifestyle:
@@ -163,7 +187,7 @@ class SBPProjectDemo:
         # Query 7: Geographic Age Demographics
         print("\n7. GEOGRAPHIC AGE DEMOGRAPHICS")
         start = time.time()
-        geo_age = list(self.db.people.aggregate([
+        geo_age = self._interactive_aggregate([
             {"$match": {"type": "influencer"}},
             {"$group": {
                 "_id": "$location.country",
@@ -173,7 +197,7 @@ class SBPProjectDemo:
             {"$match": {"total_count": {"$gte": 200}}},
             {"$sort": {"total_count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query7_time = time.time() - start
         
         for result in geo_age:
@@ -183,7 +207,7 @@ class SBPProjectDemo:
         # Query 8: Cross-dataset Personality Analysis
         print("\n8. PERSONALITY PATTERNS BY AGE GROUPS")
         start = time.time()
-        personality_analysis = list(self.db.people.aggregate([
+        personality_analysis = self._interactive_aggregate([
             {"$group": {
                 "_id": {
                     "mbti": "$mbti_personality",
@@ -204,7 +228,7 @@ class SBPProjectDemo:
             {"$match": {"total_count": {"$gte": 100}}},
             {"$sort": {"total_count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query8_time = time.time() - start
         
         for result in personality_analysis:
@@ -214,7 +238,7 @@ class SBPProjectDemo:
         # Query 9: Education vs Lifestyle Impact
         print("\n9. EDUCATION IMPACT ON LIFESTYLE")
         start = time.time()
-        education_lifestyle = list(self.db.people.aggregate([
+        education_lifestyle = self._interactive_aggregate([
             {"$match": {"type": "influencer"}},
             {"$group": {
                 "_id": {
@@ -226,7 +250,7 @@ class SBPProjectDemo:
             }},
             {"$sort": {"count": -1}},
             {"$limit": 5}
-        ]))
+        ])
         query9_time = time.time() - start
         
         for result in education_lifestyle:
@@ -236,7 +260,7 @@ class SBPProjectDemo:
         # Query 10: Comprehensive Demographic Comparison
         print("\n10. COMPREHENSIVE DEMOGRAPHIC COMPARISON")
         start = time.time()
-        demographic_comparison = list(self.db.people.aggregate([
+        demographic_comparison = self._interactive_aggregate([
             {"$facet": {
                 "by_type": [
                     {"$group": {
@@ -252,7 +276,7 @@ class SBPProjectDemo:
                     {"$group": {"_id": None, "unique_types": {"$sum": 1}}}
                 ]
             }}
-        ]))
+        ])
         query10_time = time.time() - start
         
         for type_data in demographic_comparison[0]['by_type']:
@@ -281,36 +305,19 @@ class SBPProjectDemo:
         
         # Complex filter query
         start = time.time()
-        result1 = self.db.people.count_documents({
-            "type": "influencer", 
-            "age": {"$gte": 25, "$lte": 35},
-            "sex": "Female"
-        })
+        result1 = self.db.people.count_documents(get_probe('complex_filter')['filter'])
         time1 = time.time() - start
         print(f"   Complex filter: {result1:,} results in {time1*1000:.1f}ms")
         
         # Aggregation pipeline
         start = time.time()
-        result2 = list(self.db.people.aggregate([
-            {"$match": {"type": "influencer"}},
-            {"$group": {"_id": "$location.country", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]))
+        result2 = self._aggregate(get_probe('geographic_aggregation')['pipeline'])
         time2 = time.time() - start
         print(f"   Geographic aggregation: {len(result2)} countries in {time2*1000:.1f}ms")
         
         # Cross-type analysis
         start = time.time()
-        result3 = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": "$mbti_personality",
-                "inf_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
-                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}}
-            }},
-            {"$sort": {"inf_count": -1}},
-            {"$limit": 16}
-        ]))
+        result3 = self._aggregate(get_probe('cross_type_mbti')['pipeline'])
         time3 = time.time() - start
         print(f"   Cross-type MBTI analysis: {len(result3)} types in {time3*1000:.1f}ms")
         
@@ -380,30 +387,54 @@ class SBPProjectDemo:
         print(f"📈 Advanced analytics and ML integration")
         print(f"🔗 Metabase visualization setup")
         
-    def run_complete_demo(self):
+    def run_complete_demo(self, concurrent=False, concurrency=4):
         """Run the complete demo sequence"""
         print("🚀 STARTING COMPLETE SBP PROJECT DEMO")
         print("=" * 60)
         
-        self.demo_1_data_overview()
-        input("\nPress Enter to continue to Simple Queries...")
-        
-        self.demo_2_simple_queries()
-        input("\nPress Enter to continue to Complex Queries...")
-        
-        self.demo_3_complex_queries()
-        input("\nPress Enter to continue to Performance Analysis...")
-        
-        self.demo_4_performance_analysis()
-        input("\nPress Enter to continue to Schema Benefits...")
-        
-        self.demo_5_schema_benefits()
-        input("\nPress Enter for Final Summary...")
-        
-        self.demo_6_final_summary()
+        if concurrent:
+            self.run_concurrent_demo(concurrency)
+        else:
+            self.demo_1_data_overview()
+            input("\nPress Enter to continue to Simple Queries...")
+            
+            self.demo_2_simple_queries()
+            input("\nPress Enter to continue to Complex Queries...")
+            
+            self.demo_3_complex_queries()
+            input("\nPress Enter to continue to Performance Analysis...")
+            
+            self.demo_4_performance_analysis()
+            input("\nPress Enter to continue to Schema Benefits...")
+            
+            self.demo_5_schema_benefits()
+            input("\nPress Enter for Final Summary...")
+            
+            self.demo_6_final_summary()
+        
+        if self.cache is not None:
+            print()
+            self.cache.print_stats()
         
         print(f"\n🎉 DEMO COMPLETE!")
         print(f"Your SBP project is ready for presentation and defense!")
+    
+    def run_concurrent_demo(self, concurrency=4):
+        """Run the independent demo sections 1-5 concurrently, then print them in order"""
+        sections = {
+            'demo_1_data_overview': self.demo_1_data_overview,
+            'demo_2_simple_queries': self.demo_2_simple_queries,
+            'demo_3_complex_queries': self.demo_3_complex_queries,
+            'demo_4_performance_analysis': self.demo_4_performance_analysis,
+            'demo_5_schema_benefits': self.demo_5_schema_benefits
+        }
+        results, wall_time = run_sections_concurrently(sections, concurrency)
+        for name in sections:
+            print(results[name]['output'], end='')
+        
+        self.demo_6_final_summary()
+        print_concurrency_report(results, wall_time, concurrency)
+        self.connection.print_pool_stats()
 
 if __name__ == "__main__":
     demo = SBPProjectDemo()
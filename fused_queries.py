@@ -0,0 +1,54 @@
+import time
+
+from analysis_queries import ANALYSIS_QUERIES, finalize, referenced_fields
+
+FACET_SEPARATOR = '__'
+
+
+def _nested_facet(pipeline):
+    """Return the sub-pipelines of a query that is a single $facet stage, else None"""
+    if len(pipeline) == 1 and '$facet' in pipeline[0]:
+        return pipeline[0]['$facet']
+    return None
+
+
+def build_fused_pipeline(queries=ANALYSIS_QUERIES):
+    """Combine all queries into one projected scan feeding a single $facet"""
+    facets = {}
+    fields = set()
+    for query in queries:
+        pipeline = query['pipeline']
+        fields |= referenced_fields(pipeline)
+        nested = _nested_facet(pipeline)
+        if nested is not None:
+            # $facet cannot be nested, so its branches are lifted to the top level
+            for name, sub_pipeline in nested.items():
+                facets[query['key'] + FACET_SEPARATOR + name] = sub_pipeline
+        else:
+            facets[query['key']] = pipeline
+
+    projection = {field: 1 for field in sorted(fields)}
+    projection['_id'] = 0
+    return [{"$project": projection}, {"$facet": facets}]
+
+
+def unpack_fused_result(document, queries=ANALYSIS_QUERIES):
+    """Split the single $facet output document back into per-query result lists"""
+    data = {}
+    for query in queries:
+        nested = _nested_facet(query['pipeline'])
+        if nested is not None:
+            data[query['key']] = [{
+                name: document[query['key'] + FACET_SEPARATOR + name] for name in nested
+            }]
+        else:
+            data[query['key']] = finalize(query, document[query['key']])
+    return data
+
+
+def run_fused(collection, queries=ANALYSIS_QUERIES):
+    """Answer every query with one collection scan; returns (data by key, elapsed seconds)"""
+    start_time = time.time()
+    document = next(collection.aggregate(build_fused_pipeline(queries), allowDiskUse=True))
+    elapsed = time.time() - start_time
+    return unpack_fused_result(document, queries), elapsed
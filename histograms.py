@@ -0,0 +1,160 @@
+import math
+
+AGE_BUCKETS = [
+    ('18-24', None, 25),
+    ('25-34', 25, 35),
+    ('35-44', 35, 45),
+    ('45+', 45, None),
+]
+
+
+def bucket_key(prefix, label):
+    """Accumulator name of one bucket counter, e.g. age_ranges_18_24"""
+    return prefix + '_' + label.replace('-', '_').replace('+', '_plus')
+
+
+def bucket_counters(field, buckets, prefix):
+    """One $sum accumulator per [low, high) bucket instead of $push-ing every label and counting later"""
+    counters = {}
+    for label, low, high in buckets:
+        bounds = []
+        if low is not None:
+            bounds.append({"$gte": ["$" + field, low]})
+        if high is not None:
+            bounds.append({"$lt": ["$" + field, high]})
+        condition = bounds[0] if len(bounds) == 1 else {"$and": bounds}
+        counters[bucket_key(prefix, label)] = {"$sum": {"$cond": [condition, 1, 0]}}
+    return counters
+
+
+def nest_bucket_counters(rows, prefix, buckets):
+    """Fold the flat bucket counters of each row into one {label: count} sub-document"""
+    labels = {bucket_key(prefix, label): label for label, _, _ in buckets}
+    nested = []
+    for row in rows:
+        doc = {}
+        for name, value in row.items():
+            if name in labels:
+                doc.setdefault(prefix, {})[labels[name]] = value
+            elif name in ('_ci', '_share'):
+                # Approximate rows: intervals follow their counter to its nested path
+                doc[name] = {f"{prefix}.{labels[field]}" if field in labels else field: interval
+                             for field, interval in value.items()}
+            else:
+                doc[name] = value
+        nested.append(doc)
+    return nested
+
+
+def histogram_group(group_by, field):
+    """$group with one count per (group, distinct value): memory is O(distinct values), not O(documents)"""
+    return {"$group": {"_id": {"group": group_by, "value": "$" + field}, "count": {"$sum": 1}}}
+
+
+def collect_histograms(rows):
+    """{group: (sorted [(value, count)], documents incl. nulls)} from histogram_group output"""
+    histograms = {}
+    for row in rows:
+        group = row['_id'].get('group')
+        histogram, total = histograms.get(group, ([], 0))
+        if row['_id'].get('value') is not None:
+            histogram.append((row['_id']['value'], row['count']))
+        histograms[group] = (histogram, total + row['count'])
+    for histogram, _ in histograms.values():
+        histogram.sort()
+    return histograms
+
+
+def histogram_percentile(histogram, fraction):
+    """Exact linearly interpolated percentile of a sorted (value, count) histogram, like benchmark.percentile"""
+    total = sum(count for _, count in histogram)
+    if not total:
+        return None
+    position = (total - 1) * fraction
+    lower_rank = int(position)
+    upper_rank = min(lower_rank + 1, total - 1)
+    lower = upper = None
+    seen = 0
+    for value, count in histogram:
+        seen += count
+        if lower is None and lower_rank < seen:
+            lower = value
+        if upper_rank < seen:
+            upper = value
+            break
+    return lower + (upper - lower) * (position - lower_rank)
+
+
+def histogram_mean(histogram):
+    total = sum(count for _, count in histogram)
+    return sum(value * count for value, count in histogram) / total if total else None
+
+
+def collect_count_margins(rows):
+    """{group: ({value: CI half-width of its count}, sampled rows)} from approximate histogram rows"""
+    margins = {}
+    for row in rows:
+        interval = row.get('_ci', {}).get('count')
+        if interval is None:
+            continue
+        group = row['_id'].get('group')
+        by_value, sample_rows = margins.get(group, ({}, 0))
+        by_value[row['_id'].get('value')] = interval['margin']
+        margins[group] = (by_value, sample_rows + row.get('_sample_rows', 0))
+    return margins
+
+
+def _interval(estimate, margin, floor=None):
+    low = estimate - margin if floor is None else max(floor, estimate - margin)
+    return {'low': low, 'high': estimate + margin, 'margin': margin}
+
+
+def histogram_intervals(histogram, margins, summary, mean_name, percentiles, count_name):
+    """Group-level intervals from the per-value count margins of an approximate histogram
+
+    Counts add their variances; the mean is linearized over the values; a percentile takes the
+    interval of the share of documents below it (Woodruff) back through the histogram.
+    """
+    intervals = {count_name: _interval(summary[count_name], math.sqrt(sum(m * m for m in margins.values())), 0.0)}
+    total = sum(count for _, count in histogram)
+    if not total:
+        return intervals
+    mean = summary[mean_name]
+    spread = sum((margins.get(value, 0.0) * (value - mean)) ** 2 for value, _ in histogram)
+    intervals[mean_name] = _interval(mean, math.sqrt(spread) / total)
+    for name, fraction in percentiles.items():
+        spread = sum((margins.get(value, 0.0) * ((value <= summary[name]) - fraction)) ** 2 for value, _ in histogram)
+        share_margin = math.sqrt(spread) / total
+        low = histogram_percentile(histogram, max(0.0, fraction - share_margin))
+        high = histogram_percentile(histogram, min(1.0, fraction + share_margin))
+        intervals[name] = {'low': low, 'high': high, 'margin': (high - low) / 2}
+    return intervals
+
+
+def summarize_histograms(rows, mean_name, percentiles, count_name):
+    """One document per group with the mean, the requested percentiles and the document count
+
+    Rows estimated from a sample (with a _ci per count) also get group-level _ci and _sample_rows.
+    """
+    summaries = []
+    histograms = collect_histograms(rows)
+    margins = collect_count_margins(rows)
+    for group in sorted(histograms, key=lambda group: (group is not None, group)):
+        histogram, total = histograms[group]
+        summary = {'_id': group, mean_name: histogram_mean(histogram)}
+        for name, fraction in percentiles.items():
+            summary[name] = histogram_percentile(histogram, fraction)
+        summary[count_name] = total
+        if group in margins:
+            by_value, sample_rows = margins[group]
+            summary['_ci'] = histogram_intervals(histogram, by_value, summary, mean_name, percentiles, count_name)
+            summary['_sample_rows'] = sample_rows
+        summaries.append(summary)
+    return summaries
+
+
+def percentile_report(collection, field='age', group_by='$type', fractions=(0.25, 0.5, 0.75, 0.9, 0.99)):
+    """Exact percentiles of a small-integer field per group, without $median or $percentile"""
+    rows = list(collection.aggregate([histogram_group(group_by, field)]))
+    percentiles = {f"p{fraction * 100:g}": fraction for fraction in fractions}
+    return summarize_histograms(rows, 'mean', percentiles, 'count')
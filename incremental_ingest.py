@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from ingest_common import DATA_FILES, BATCH_SIZE, parse_raw_line, to_unified_doc
+
+CHECKPOINT_FILE = 'ingest_checkpoint.json'
+QUARANTINE_FILE = 'ingest_quarantine.jsonl'
+
+# Identity fields of a record across reloads; everything else (age, backstory, ...) is change-tracked
+NATURAL_KEY_FIELDS = {
+    'influencer': ('Name', 'Sex', 'Country of Origin'),
+    'noble': ('Name', 'Sex', 'Realm'),
+}
+# Bumped whenever natural_key changes, so checkpoints written with older keys force a full rescan
+KEY_VERSION = 2
+
+
+def natural_key(raw, doc_type):
+    """Stable identity of a raw record, independent of its mutable attributes"""
+    parts = [doc_type] + [raw.get(field) for field in NATURAL_KEY_FIELDS[doc_type]]
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def content_hash(raw):
+    """Hash of the source record as read from the file (load metadata excluded)"""
+    source = {k: v for k, v in raw.items() if k not in ('type', 'created_at', '_id')}
+    return hashlib.sha1(json.dumps(source, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _reject_reason(line):
+    try:
+        value = json.loads(line.strip())
+    except ValueError as e:
+        return f"invalid JSON: {e}"
+    return f"expected a JSON object, got {type(value).__name__}"
+
+
+class IncrementalIngestor:
+    """Checkpointed, resumable loader that upserts only new or changed records"""
+
+    def __init__(self, db, unified=False, batch_size=BATCH_SIZE, data_files=None,
+                 checkpoint_file=CHECKPOINT_FILE, quarantine_file=QUARANTINE_FILE):
+        self.db = db
+        self.unified = unified
+        self.batch_size = batch_size
+        self.data_files = data_files or DATA_FILES
+        self.checkpoint_file = checkpoint_file
+        self.quarantine_file = quarantine_file
+        self.checkpoints = self._read_checkpoints()
+
+    def _read_checkpoints(self):
+        if not os.path.exists(self.checkpoint_file):
+            return {}
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_checkpoints(self):
+        tmp_path = self.checkpoint_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoints, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def _save_checkpoint(self, path, offset, lines, hasher, documents=None):
+        # documents is only known once a file is fully applied; mid-file checkpoints leave it None
+        self.checkpoints[path] = {
+            'offset': offset,
+            'lines': lines,
+            'sha256': hasher.hexdigest(),
+            'unified': self.unified,
+            'key_version': KEY_VERSION,
+            'documents': documents,
+            'updated_at': datetime.now().isoformat()
+        }
+        self._write_checkpoints()
+
+    def _reset_checkpoints(self, collection):
+        """Forget the checkpoints of every file loaded into collection, so they are rescanned"""
+        stale = [path for collection_name, (path, _) in self.data_files.items()
+                 if self._target(collection_name).name == collection.name and path in self.checkpoints]
+        for path in stale:
+            del self.checkpoints[path]
+        if stale:
+            self._write_checkpoints()
+
+    def _quarantine(self, path, line_number, line, reason):
+        with open(self.quarantine_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'file': path,
+                'line': line_number,
+                'reason': reason,
+                'raw': line.rstrip('\r\n'),
+                'quarantined_at': datetime.now().isoformat()
+            }, ensure_ascii=False) + '\n')
+
+    def _resume_point(self, path, collection, doc_type):
+        """Return (offset, lines, hasher) to continue from, or a fresh start if the prefix changed
+
+        The checkpoint is only trusted while the collection still holds what it recorded: a
+        collection that was dropped, rebuilt or emptied by another loader is rescanned in full.
+        """
+        checkpoint = self.checkpoints.get(path)
+        hasher = hashlib.sha256()
+        if (not checkpoint or checkpoint.get('unified') != self.unified
+                or checkpoint.get('key_version') != KEY_VERSION):
+            return 0, 0, hasher
+        if checkpoint['offset'] > os.path.getsize(path):
+            return 0, 0, hasher
+        documents = collection.count_documents({'type': doc_type, '_key': {'$exists': True}})
+        expected = checkpoint.get('documents')
+        if (expected is not None and documents != expected) or (checkpoint['offset'] and not documents):
+            print(f"  {collection.name} no longer matches the checkpoint of {path}, rescanning it")
+            return 0, 0, hasher
+
+        remaining = checkpoint['offset']
+        with open(path, 'rb') as f:
+            while remaining:
+                block = f.read(min(remaining, 1024 * 1024))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        if hasher.hexdigest() != checkpoint['sha256']:
+            return 0, 0, hashlib.sha256()
+        return checkpoint['offset'], checkpoint['lines'], hasher
+
+    def _target(self, collection_name):
+        return self.db.people if self.unified else self.db[collection_name]
+
+    def _prepare_target(self, collection):
+        """Make sure the target is keyed; collections loaded without keys are rebuilt"""
+        if collection.find_one({'_key': {'$exists': False}}, {'_id': 1}) is not None:
+            print(f"  {collection.name} was loaded without natural keys, rebuilding it")
+            collection.drop()
+            self._reset_checkpoints(collection)
+        collection.create_index('_key', unique=True)
+
+    def _apply_batch(self, collection, batch, stats, run_id=None):
+        # A record repeated within the batch is applied once, as its last occurrence in the file
+        latest = {doc['_key']: doc for doc in batch}
+        stats['duplicates'] += len(batch) - len(latest)
+        batch = list(latest.values())
+        keys = list(latest)
+        existing = {
+            doc['_key']: doc.get('_hash')
+            for doc in collection.find({'_key': {'$in': keys}}, {'_key': 1, '_hash': 1})
+        }
+
+        operations = []
+        unchanged = []
+        for doc in batch:
+            previous = existing.get(doc['_key'])
+            if previous == doc['_hash']:
+                stats['unchanged'] += 1
+                unchanged.append(doc['_key'])
+                continue
+            if run_id is not None:
+                doc['_run'] = run_id
+            stats['changed' if previous is not None else 'new'] += 1
+            created_at = doc.pop('created_at')
+            operations.append(UpdateOne(
+                {'_key': doc['_key']},
+                {'$set': doc, '$setOnInsert': {'created_at': created_at}},
+                upsert=True
+            ))
+
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        if run_id is not None and unchanged:
+            # Unchanged records are not rewritten, but are still marked as seen by this run
+            collection.update_many({'_key': {'$in': unchanged}}, {'$set': {'_run': run_id}})
+
+    def ingest_file(self, collection_name, path, doc_type):
+        """Ingest one JSONL file from its checkpoint and return change statistics"""
+        collection = self._target(collection_name)
+        offset, lines, hasher = self._resume_point(path, collection, doc_type)
+        full_scan = offset == 0
+        # A full scan stamps every record it sees, so records missing from the file can be pruned
+        run_id = uuid.uuid4().hex if full_scan else None
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'duplicates': 0, 'quarantined': 0, 'lines': 0,
+                 'resumed_from': offset}
+
+        if offset == os.path.getsize(path):
+            print(f"  {path} is unchanged since the last checkpoint")
+            return stats
+        if not full_scan:
+            print(f"  Resuming {path} at byte {offset:,} (line {lines:,})")
+
+        batch = []
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                raw_line = f.readline()
+                if not raw_line:
+                    break
+                try:
+                    line = raw_line.decode('utf-8')
+                except UnicodeDecodeError as e:
+                    if not raw_line.endswith(b'\n'):
+                        # Possibly cut mid-character while still being written: leave it for the next run
+                        break
+                    hasher.update(raw_line)
+                    lines += 1
+                    stats['lines'] += 1
+                    self._quarantine(path, lines, raw_line.decode('utf-8', errors='replace'), f"invalid UTF-8: {e}")
+                    stats['quarantined'] += 1
+                    continue
+                doc = parse_raw_line(line, doc_type)
+                if not raw_line.endswith(b'\n') and doc is None:
+                    # Partially written last line: leave it for the next run
+                    break
+
+                hasher.update(raw_line)
+                lines += 1
+                stats['lines'] += 1
+
+                if doc is None:
+                    if line.strip():
+                        self._quarantine(path, lines, line, _reject_reason(line))
+                        stats['quarantined'] += 1
+                    continue
+
+                key = natural_key(doc, doc_type)
+                digest = content_hash(doc)
+                if self.unified:
+                    doc = to_unified_doc(doc, doc_type)
+                doc['_key'] = key
+                doc['_hash'] = digest
+                batch.append(doc)
+
+                if len(batch) >= self.batch_size:
+                    self._apply_batch(collection, batch, stats, run_id)
+                    batch = []
+                    self._save_checkpoint(path, f.tell(), lines, hasher)
+
+            if batch:
+                self._apply_batch(collection, batch, stats, run_id)
+            end_offset = f.tell()
+
+        if full_scan:
+            # A full rescan means the file was rewritten: drop records that disappeared from it
+            removed = collection.delete_many({'type': doc_type, '_run': {'$ne': run_id}})
+            stats['removed'] = removed.deleted_count
+        documents = collection.count_documents({'type': doc_type, '_key': {'$exists': True}})
+        self._save_checkpoint(path, end_offset, lines, hasher, documents)
+        return stats
+
+    def run(self):
+        """Ingest every source file incrementally"""
+        print("\n=== INCREMENTAL INGEST ===")
+        start_time = time.perf_counter()
+        prepared = set()
+        results = {}
+        for collection_name, (path, doc_type) in self.data_files.items():
+            collection = self._target(collection_name)
+            if collection.name not in prepared:
+                self._prepare_target(collection)
+                prepared.add(collection.name)
+
+            print(f"Ingesting {path}...")
+            stats = self.ingest_file(collection_name, path, doc_type)
+            results[collection_name] = stats
+            print(f"✓ {collection_name}: {stats['new']:,} new, {stats['changed']:,} changed, "
+                  f"{stats['unchanged']:,} unchanged, {stats['quarantined']:,} quarantined"
+                  + (f", {stats['removed']:,} removed" if stats.get('removed') else "")
+                  + (f", {stats['duplicates']:,} duplicates" if stats['duplicates'] else ""))
+
+        elapsed = time.perf_counter() - start_time
+        print(f"✓ Incremental ingest finished in {elapsed:.2f}s")
+        if any(stats['quarantined'] for stats in results.values()):
+            print(f"  Rejected lines written to {self.quarantine_file}")
+        return results
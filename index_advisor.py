@@ -0,0 +1,206 @@
+from collections import Counter
+
+import bson
+
+from analysis_queries import ANALYSIS_QUERIES, PERFORMANCE_PROBES, collect_field_refs, referenced_fields
+from benchmark import BenchmarkSuite, compare_reports, print_comparison
+from index_specs import build_indexes, index_name
+
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte', '$ne', '$nin', '$exists'}
+MAX_INDEX_FIELDS = 5
+# Without covering, an index only beats a collection scan for selective predicates
+MAX_UNCOVERED_SELECTIVITY = 0.3
+KEY_OVERHEAD_BYTES = 12
+ADVISOR_PREFIX = 'advisor_'
+# The original hand-picked index set, superseded by the advisor
+MANUAL_INDEXES = [
+    [("type", 1)],
+    [("age", 1)],
+    [("sex", 1)],
+    [("mbti_personality", 1)],
+    [("location.country", 1)],
+    [("profile.education_level", 1)],
+    [("profile.lifestyle", 1)],
+    [("type", 1), ("age", 1)],
+    [("type", 1), ("sex", 1)],
+    [("mbti_personality", 1), ("type", 1)],
+    [("location.country", 1), ("age", 1)],
+]
+
+
+def workload_predicates(entry):
+    """Equality, sort and range fields an index could serve, plus all fields the query reads"""
+    pipeline = entry.get('pipeline', [])
+    match = entry.get('filter')
+    stages = pipeline
+    if match is None and pipeline and '$match' in pipeline[0]:
+        match = pipeline[0]['$match']
+        stages = pipeline[1:]
+
+    equality, ranges = [], []
+    for field, condition in (match or {}).items():
+        if field.startswith('$'):
+            continue
+        if isinstance(condition, dict) and any(op in RANGE_OPERATORS for op in condition):
+            ranges.append(field)
+        else:
+            equality.append(field)
+
+    sort = []
+    if stages and '$sort' in stages[0]:
+        sort = list(stages[0]['$sort'])
+
+    group = []
+    for stage in stages:
+        if '$group' in stage:
+            group_fields = set()
+            collect_field_refs(stage['$group']['_id'], group_fields)
+            group = sorted(group_fields)
+            break
+
+    fields = referenced_fields(pipeline) if pipeline else set(equality + ranges)
+    return {'equality': equality, 'sort': sort, 'range': ranges, 'group': group, 'fields': fields,
+            'filtered': match is not None}
+
+
+class IndexAdvisor:
+    """Proposes a minimal ESR-ordered compound index set for the registered query workload"""
+
+    def __init__(self, db, collection='people', workload=None):
+        self.db = db
+        self.collection = db[collection]
+        self.workload = workload or ANALYSIS_QUERIES + PERFORMANCE_PROBES
+        self.cardinality = {}
+
+    def field_cardinality(self, field):
+        if field not in self.cardinality:
+            result = list(self.collection.aggregate([
+                {"$group": {"_id": "$" + field}},
+                {"$count": "n"}
+            ], allowDiskUse=True))
+            self.cardinality[field] = result[0]['n'] if result else 0
+        return self.cardinality[field]
+
+    def _selectivity(self, predicates):
+        selectivity = 1.0
+        for field in predicates['equality']:
+            selectivity /= max(self.field_cardinality(field), 1)
+        if predicates['range']:
+            selectivity *= 0.3
+        return selectivity
+
+    def propose(self):
+        """Candidate indexes (key list + the queries they serve), redundant prefixes removed"""
+        analysed = [(entry['key'], workload_predicates(entry)) for entry in self.workload]
+        frequency = Counter(field for _, p in analysed for field in p['equality'])
+
+        candidates = []
+        for key, predicates in analysed:
+            if not predicates['filtered']:
+                # Nothing to seek on: a leading $group always scans the whole collection
+                continue
+            # Shared, low-cardinality equality fields first so the prefixes can be reused
+            equality = sorted(predicates['equality'],
+                              key=lambda f: (-frequency[f], self.field_cardinality(f), f))
+            keys = equality + [f for f in predicates['sort'] if f not in equality]
+            keys += [f for f in predicates['range'] if f not in keys]
+            # Group keys lead the covering suffix so queries grouping alike share a prefix
+            covering = [f for f in predicates['group'] if f not in keys]
+            covering += sorted(predicates['fields'] - set(keys) - set(covering))
+            covered = len(keys) + len(covering) <= MAX_INDEX_FIELDS
+            if covered:
+                keys += covering
+            elif self._selectivity(predicates) > MAX_UNCOVERED_SELECTIVITY:
+                continue
+            candidates.append({'keys': keys, 'queries': [key], 'covered': covered})
+
+        # An index whose keys are a prefix of another candidate is served by the longer one
+        candidates.sort(key=lambda c: -len(c['keys']))
+        proposals = []
+        for candidate in candidates:
+            for proposal in proposals:
+                if proposal['keys'][:len(candidate['keys'])] == candidate['keys']:
+                    proposal['queries'] += candidate['queries']
+                    break
+            else:
+                proposals.append(candidate)
+
+        for proposal in proposals:
+            proposal['name'] = ADVISOR_PREFIX + '_'.join(f.replace('.', '_') for f in proposal['keys'])
+            proposal['estimated_bytes'] = self.estimate_size(proposal['keys'])
+        return proposals
+
+    def estimate_size(self, keys, sample_size=1000):
+        """Rough uncompressed index size: sampled average key size times document count"""
+        sample = list(self.collection.aggregate([
+            {"$sample": {"size": sample_size}},
+            {"$project": {field: 1 for field in keys}}
+        ]))
+        if not sample:
+            return 0
+        total = 0
+        for doc in sample:
+            values = {}
+            for i, field in enumerate(keys):
+                value = doc
+                for part in field.split('.'):
+                    value = value.get(part) if isinstance(value, dict) else None
+                values[str(i)] = value
+            total += len(bson.encode(values)) + KEY_OVERHEAD_BYTES
+        return int(total / len(sample) * self.collection.estimated_document_count())
+
+    def build(self, proposals):
+        """Build every proposal in one createIndexes so the collection is scanned once"""
+        build_indexes(self.collection, [
+            {'key': {field: 1 for field in proposal['keys']}, 'name': proposal['name']} for proposal in proposals
+        ])
+        for proposal in proposals:
+            print(f"✓ Created index {proposal['name']} "
+                  f"(~{proposal['estimated_bytes'] / 1024 / 1024:.1f} MB, serves {', '.join(proposal['queries'])})")
+
+    def drop_superseded(self):
+        """Drop the hand-picked indexes and earlier advisor indexes; other features' indexes stay"""
+        manual = {index_name(keys) for keys in MANUAL_INDEXES}
+        names = [index['name'] for index in self.collection.list_indexes()]
+        for name in names:
+            if name in manual or name.startswith(ADVISOR_PREFIX):
+                self.collection.drop_index(name)
+
+    def apply(self, proposals=None, verify=True, drop_existing=True, repetitions=5):
+        """Build the proposed set; with verify, keep only indexes that measurably help their queries"""
+        if proposals is None:
+            proposals = self.propose()
+        if drop_existing:
+            self.drop_superseded()
+        if not proposals:
+            print("✓ No index pays off for this workload")
+            return []
+
+        suite = BenchmarkSuite(self.db, repetitions=repetitions, collection=self.collection.name,
+                               workload=self.workload)
+        before = suite.run(label='before advisor indexes') if verify else None
+        self.build(proposals)
+        if not verify:
+            return proposals
+
+        comparison = compare_reports(before, suite.run(label='with advisor indexes'))
+        print("\nADVISOR VERIFICATION:")
+        print_comparison(comparison)
+
+        kept = []
+        for proposal in proposals:
+            helped = any(comparison.get(f"warm:{query}", {}).get('verdict') == 'improvement'
+                         for query in proposal['queries'])
+            if helped:
+                kept.append(proposal)
+            else:
+                self.collection.drop_index(proposal['name'])
+                print(f"✗ Dropped {proposal['name']}: no measurable gain")
+        return kept
+
+    def print_proposals(self, proposals):
+        print("\nINDEX ADVISOR PROPOSALS:")
+        for proposal in proposals:
+            coverage = 'covered' if proposal['covered'] else 'selective'
+            print(f"   {proposal['keys']} [{coverage}] ~{proposal['estimated_bytes'] / 1024 / 1024:.1f} MB "
+                  f"-> {', '.join(proposal['queries'])}")
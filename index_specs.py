@@ -0,0 +1,116 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import errors
+
+# Index options that describe the server's copy of an index rather than its definition
+SERVER_FIELDS = ('v', 'ns')
+PROGRESS_POLL_SECONDS = 1.0
+
+
+def index_name(keys):
+    """Default MongoDB index name for a [(field, direction), ...] key list"""
+    return '_'.join(f"{field}_{direction}" for field, direction in keys)
+
+
+def spec_fields(spec):
+    """Document fields an index spec reads (a text index lists them under weights, not key)"""
+    fields = set(spec.get('weights', {}))
+    fields.update(field for field in spec['key'] if field not in ('_fts', '_ftsx'))
+    return fields
+
+
+def snapshot_index_specs(collection):
+    """Full createIndexes specs for every secondary index of a collection"""
+    specs = []
+    for index in collection.list_indexes():
+        if index['name'] == '_id_':
+            continue
+        spec = {key: value for key, value in index.items() if key not in SERVER_FIELDS}
+        spec['key'] = dict(spec['key'])
+        specs.append(spec)
+    return specs
+
+
+def restore_index_specs(collection, specs):
+    """Recreate indexes from snapshot_index_specs() in a single createIndexes command"""
+    if specs:
+        collection.database.command('createIndexes', collection.name, indexes=specs)
+
+
+def _build_progress(collection):
+    """Progress messages of the createIndexes operations currently running on a collection"""
+    ops = collection.database.client.admin.aggregate([
+        {"$currentOp": {"allUsers": True}},
+        {"$match": {"command.createIndexes": collection.name, "ns": collection.full_name}}
+    ])
+    messages = []
+    for op in ops:
+        progress = op.get('progress')
+        if progress and progress.get('total'):
+            messages.append(f"{op.get('msg', 'building')} ({progress['done']:,}/{progress['total']:,})")
+        elif op.get('msg'):
+            messages.append(op['msg'])
+    return messages
+
+
+def build_indexes(collection, specs, poll_interval=PROGRESS_POLL_SECONDS):
+    """Build all specs in one createIndexes (one collection scan), printing currentOp progress"""
+    if not specs:
+        return 0.0
+    outcome = {}
+
+    def run():
+        try:
+            restore_index_specs(collection, specs)
+        except errors.PyMongoError as e:
+            outcome['error'] = e
+
+    start_time = time.perf_counter()
+    builder = threading.Thread(target=run, daemon=True)
+    builder.start()
+    last = None
+    while builder.is_alive():
+        builder.join(poll_interval)
+        try:
+            messages = _build_progress(collection)
+        except errors.OperationFailure:
+            # $currentOp needs the inprog privilege; without it the build just runs silently
+            continue
+        if messages and messages != last:
+            print(f"   {'; '.join(messages)}")
+            last = messages
+    if 'error' in outcome:
+        raise outcome['error']
+    elapsed = time.perf_counter() - start_time
+    print(f"✓ Built {len(specs)} indexes on {collection.name} in one pass ({elapsed:.2f}s)")
+    return elapsed
+
+
+def _normalized(specs):
+    return sorted(repr(sorted(spec.items())) for spec in specs)
+
+
+@contextmanager
+def deferred_indexes(collection, poll_interval=PROGRESS_POLL_SECONDS, skip_fields=()):
+    """Drop secondary indexes around a bulk load, then rebuild exactly the same specs in one command
+
+    Indexes over skip_fields (fields the load does not write, such as the incremental ingest's
+    unique _key) are dropped and not rebuilt.
+    """
+    specs = snapshot_index_specs(collection)
+    if specs:
+        collection.drop_indexes()
+        print(f"✓ Deferred {len(specs)} secondary indexes on {collection.name} until the load finishes")
+    skipped = [spec['name'] for spec in specs if spec_fields(spec) & set(skip_fields)]
+    if skipped:
+        specs = [spec for spec in specs if spec['name'] not in skipped]
+        print(f"  Not rebuilding {', '.join(skipped)}: the load does not write {', '.join(skip_fields)}")
+    try:
+        yield specs
+    finally:
+        # Restored even if the load fails, so the collection never stays unindexed
+        build_indexes(collection, specs, poll_interval)
+        if _normalized(snapshot_index_specs(collection)) != _normalized(specs):
+            raise RuntimeError(f"Index specs on {collection.name} differ from the snapshot after rebuild")
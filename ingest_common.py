@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+
+# Raw collection -> (source file, document type)
+DATA_FILES = {
+    'influencers': ('influencer_data.jsonl', 'influencer'),
+    'nobles': ('noble_data.jsonl', 'noble'),
+}
+
+BATCH_SIZE = 1000
+
+
+def parse_raw_line(line, doc_type):
+    """Parse one JSONL line into a raw-schema document, or None if it is rejected"""
+    try:
+        doc = json.loads(line.strip())
+        doc['type'] = doc_type
+        doc['created_at'] = datetime.now()
+    except (ValueError, TypeError):
+        return None
+    return doc
+
+
+def to_unified_doc(raw, doc_type):
+    """Map a raw influencer/noble document onto the unified people schema"""
+    if doc_type == 'influencer':
+        location = {
+            'country': raw.get('Country of Origin'),
+            'state_province': raw.get('State or Province'),
+            'realm': None
+        }
+        profile = {
+            'education_level': raw.get('Education Level'),
+            'lifestyle': raw.get('Lifestyle'),
+            'title': None,
+            'activity': None
+        }
+    else:
+        location = {
+            'country': None,
+            'state_province': None,
+            'realm': raw.get('Realm')
+        }
+        profile = {
+            'education_level': None,
+            'lifestyle': None,
+            'title': raw.get('Title'),
+            'activity': raw.get('Activity')
+        }
+    return {
+        'name': raw.get('Name'),
+        'age': raw.get('Age'),
+        'sex': raw.get('Sex'),
+        'mbti_personality': raw.get('MBTI Personality'),
+        'backstory': raw.get('Backstory'),
+        'type': doc_type,
+        'location': location,
+        'profile': profile,
+        'created_at': datetime.now(),
+        'updated_at': datetime.now()
+    }
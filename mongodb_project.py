@@ -1,22 +1,50 @@
-import json
 import time
-from datetime import datetime
-from pymongo import MongoClient, errors
-from collections import defaultdict, Counter
-import statistics
+from pymongo import errors
+from analysis_queries import ANALYSIS_QUERIES, finalize
+from approximate import DEFAULT_FRACTION, ApproximateEngine
+from async_runner import AsyncQueryRunner, print_concurrency_report
+from benchmark import BenchmarkSuite, compare_reports, print_comparison
+from bulk_writer import DEFAULT_TARGET_BYTES, BulkWriter, print_write_summary
+from categorical_encoding import encode_collection, encoded_is_stale, load_dictionary, print_encoding_report, run_encoded
+from columnar_snapshot import SnapshotEngine, export_snapshot, snapshot_is_stale
+from connection_manager import get_manager
+from covered_queries import (SLIM_COLLECTION, build_slim_collection, ensure_covering_index,
+                             print_bytes_report, run_covered, slim_is_stale)
+from fused_queries import run_fused
+from histograms import percentile_report
+from incremental_ingest import IncrementalIngestor
+from index_advisor import MANUAL_INDEXES, IndexAdvisor
+from index_specs import build_indexes, deferred_indexes, index_name
+from ingest_common import DATA_FILES, parse_raw_line, to_unified_doc
+from numpy_backend import NumpyBackend, cross_check, print_cross_check
+from parallel_ingest import ParallelIngestor
+from partitioning import (ScatterGatherRunner, benchmark_scaling, build_partitions, partition_targets,
+                          partitions_are_stale)
+from people_export import export_people
+from query_cache import QueryCache, bump_version
+from query_explain import explain_workload, print_explain_report
+from rollups import ROLLUP_QUERIES, RollupManager
+from schema_migration import measure, migrate_server_side
+from streaming_loader import StreamingUnifiedLoader
+from synthetic_data import SCRATCH_DATABASE, benchmark_data_scaling
+from text_search import benchmark_search, print_search_page, search_people
+from vertical_split import TEXT_COLLECTION, benchmark_split, is_split, merge_people_text, split_people_text
 
 class MongoDBProject:
-    def __init__(self):
+    def __init__(self, connection=None):
+        self.connection = connection
         self.client = None
         self.db = None
+        self.cache = None
         self.connect_to_mongodb()
         
     def connect_to_mongodb(self):
-        """Connect to MongoDB with error handling"""
+        """Connect to MongoDB through the shared connection manager, with error handling"""
         try:
-            self.client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=30000)
-            self.client.admin.command('ping')
-            self.db = self.client['sbp_project']
+            self.connection = self.connection or get_manager()
+            self.client = self.connection.client
+            self.connection.warm_up()
+            self.db = self.connection.db
             print("✓ Connected to MongoDB successfully")
         except errors.ServerSelectionTimeoutError:
             print("❌ Error: MongoDB is not running. Please start MongoDB first.")
@@ -26,8 +54,25 @@ class MongoDBProject:
             print("Or install MongoDB Community Server if not installed")
             exit(1)
     
-    def load_initial_data(self):
+    def enable_query_cache(self, **options):
+        """Serve repeated analysis queries from a QueryCache until people is written to"""
+        self.cache = QueryCache(self.db, **options)
+        return self.cache
+    
+    def _aggregate(self, pipeline):
+        """Run a pipeline over people, through the query cache when enabled"""
+        if self.cache is not None:
+            return self.cache.aggregate(self.db.people, pipeline)
+        return list(self.db.people.aggregate(pipeline))
+    
+    def load_initial_data(self, parallel=False, parse_workers=None, insert_workers=4,
+                          write_profile='acknowledged', batch_bytes=DEFAULT_TARGET_BYTES, data_files=None):
         """Load data with original schema (separate collections)"""
+        data_files = data_files or DATA_FILES
+        if parallel:
+            return ParallelIngestor(self.db, parse_workers=parse_workers,
+                                    insert_workers=insert_workers, data_files=data_files).run()
+
         print("\n=== LOADING INITIAL DATA ===")
         
         # Clear existing collections
@@ -37,379 +82,303 @@ class MongoDBProject:
         # Load influencers
         print("Loading influencers data...")
         influencer_count = 0
-        with open('influencer_data.jsonl', 'r', encoding='utf-8') as f:
-            batch = []
+        with open(data_files['influencers'][0], 'r', encoding='utf-8') as f, \
+                BulkWriter(self.db.influencers, write_profile, batch_bytes) as writer:
             for line in f:
-                try:
-                    doc = json.loads(line.strip())
-                    doc['type'] = 'influencer'
-                    doc['created_at'] = datetime.now()
-                    batch.append(doc)
-                    influencer_count += 1
-                    
-                    if len(batch) >= 1000:
-                        self.db.influencers.insert_many(batch, ordered=False)
-                        batch = []
-                        if influencer_count % 10000 == 0:
-                            print(f"  Loaded {influencer_count:,} influencers...")
-                except:
+                doc = parse_raw_line(line, 'influencer')
+                if doc is None:
                     continue
-            
-            if batch:
-                self.db.influencers.insert_many(batch, ordered=False)
+                writer.add(doc)
+                influencer_count += 1
+                
+                if influencer_count % 10000 == 0:
+                    print(f"  Loaded {influencer_count:,} influencers...")
         
         print(f"✓ Loaded {influencer_count:,} influencers")
+        print_write_summary('influencers', writer.close())
         
         # Load nobles
         print("Loading nobles data...")
         noble_count = 0
-        with open('noble_data.jsonl', 'r', encoding='utf-8') as f:
-            batch = []
+        with open(data_files['nobles'][0], 'r', encoding='utf-8') as f, \
+                BulkWriter(self.db.nobles, write_profile, batch_bytes) as writer:
             for line in f:
-                try:
-                    doc = json.loads(line.strip())
-                    doc['type'] = 'noble'
-                    doc['created_at'] = datetime.now()
-                    batch.append(doc)
-                    noble_count += 1
-                    
-                    if len(batch) >= 1000:
-                        self.db.nobles.insert_many(batch, ordered=False)
-                        batch = []
-                        if noble_count % 10000 == 0:
-                            print(f"  Loaded {noble_count:,} nobles...")
-                except:
+                doc = parse_raw_line(line, 'noble')
+                if doc is None:
                     continue
-            
-            if batch:
-                self.db.nobles.insert_many(batch, ordered=False)
+                writer.add(doc)
+                noble_count += 1
+                
+                if noble_count % 10000 == 0:
+                    print(f"  Loaded {noble_count:,} nobles...")
         
         print(f"✓ Loaded {noble_count:,} nobles")
+        print_write_summary('nobles', writer.close())
         print(f"✓ Total records: {influencer_count + noble_count:,}")
     
-    def create_unified_schema(self):
+    def create_unified_schema(self, server_side=False, write_profile='acknowledged', batch_bytes=DEFAULT_TARGET_BYTES,
+                              defer_indexes=False):
         """Create optimized unified schema"""
+        if defer_indexes:
+            # Keep people's current index set, but build it once after the load instead of per insert;
+            # the reload writes no incremental-ingest _key, so its unique index cannot come back
+            with deferred_indexes(self.db.people, skip_fields=('_key',)):
+                return self.create_unified_schema(server_side, write_profile, batch_bytes)
+        
+        if server_side:
+            print("\n=== CREATING UNIFIED SCHEMA (SERVER-SIDE $merge) ===")
+            total_unified = migrate_server_side(self.db)
+            bump_version(self.db, 'people')
+            print(f"✓ Created unified collection with {total_unified:,} documents")
+            return
+        
         print("\n=== CREATING UNIFIED SCHEMA ===")
         
         # Drop existing unified collection
         self.db.people.drop()
         
-        # Process influencers
-        print("Processing influencers for unified schema...")
-        influencer_docs = []
-        for doc in self.db.influencers.find():
-            unified_doc = {
-                'name': doc.get('Name'),
-                'age': doc.get('Age'),
-                'sex': doc.get('Sex'),
-                'mbti_personality': doc.get('MBTI Personality'),
-                'backstory': doc.get('Backstory'),
-                'type': 'influencer',
-                'location': {
-                    'country': doc.get('Country of Origin'),
-                    'state_province': doc.get('State or Province'),
-                    'realm': None
-                },
-                'profile': {
-                    'education_level': doc.get('Education Level'),
-                    'lifestyle': doc.get('Lifestyle'),
-                    'title': None,
-                    'activity': None
-                },
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
-            influencer_docs.append(unified_doc)
+        with BulkWriter(self.db.people, write_profile, batch_bytes) as writer:
+            # Process influencers
+            print("Processing influencers for unified schema...")
+            for doc in self.db.influencers.find():
+                writer.add(to_unified_doc(doc, 'influencer'))
             
-            if len(influencer_docs) >= 1000:
-                self.db.people.insert_many(influencer_docs, ordered=False)
-                influencer_docs = []
-        
-        if influencer_docs:
-            self.db.people.insert_many(influencer_docs, ordered=False)
-        
-        # Process nobles
-        print("Processing nobles for unified schema...")
-        noble_docs = []
-        for doc in self.db.nobles.find():
-            unified_doc = {
-                'name': doc.get('Name'),
-                'age': doc.get('Age'),
-                'sex': doc.get('Sex'),
-                'mbti_personality': doc.get('MBTI Personality'),
-                'backstory': doc.get('Backstory'),
-                'type': 'noble',
-                'location': {
-                    'country': None,
-                    'state_province': None,
-                    'realm': doc.get('Realm')
-                },
-                'profile': {
-                    'education_level': None,
-                    'lifestyle': None,
-                    'title': doc.get('Title'),
-                    'activity': doc.get('Activity')
-                },
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
-            noble_docs.append(unified_doc)
-            
-            if len(noble_docs) >= 1000:
-                self.db.people.insert_many(noble_docs, ordered=False)
-                noble_docs = []
-        
-        if noble_docs:
-            self.db.people.insert_many(noble_docs, ordered=False)
+            # Process nobles
+            print("Processing nobles for unified schema...")
+            for doc in self.db.nobles.find():
+                writer.add(to_unified_doc(doc, 'noble'))
         
+        print_write_summary('people', writer.close())
+        bump_version(self.db, 'people')
         total_unified = self.db.people.count_documents({})
         print(f"✓ Created unified collection with {total_unified:,} documents")
     
-    def run_analysis_queries(self):
+    def load_incremental(self, unified=False, defer_indexes=False, data_files=None):
+        """Checkpointed ingest that only upserts new or changed records"""
+        if unified and defer_indexes:
+            with deferred_indexes(self.db.people):
+                return self.load_incremental(unified=True, data_files=data_files)
+        results = IncrementalIngestor(self.db, unified=unified, data_files=data_files).run()
+        if unified:
+            bump_version(self.db, 'people')
+        return results
+    
+    def load_unified_streaming(self, write_legacy=False, split_text=False, defer_indexes=False, data_files=None):
+        """Load the JSONL files straight into the unified schema in a single pass"""
+        if defer_indexes:
+            skip_fields = ('_key', 'backstory') if split_text else ('_key',)
+            with deferred_indexes(self.db.people, skip_fields=skip_fields):
+                return self.load_unified_streaming(write_legacy, split_text, data_files=data_files)
+        results = StreamingUnifiedLoader(self.db, write_legacy=write_legacy, data_files=data_files,
+                                         text_target=TEXT_COLLECTION if split_text else None).run()
+        bump_version(self.db, 'people')
+        return results
+    
+    def split_text_layout(self, enabled=True):
+        """Switch people between the combined layout and the hot people + people_text layout"""
+        if enabled and not is_split(self.db):
+            split_people_text(self.db)
+        elif not enabled and is_split(self.db):
+            merge_people_text(self.db)
+        bump_version(self.db, 'people')
+    
+    def benchmark_text_split(self):
+        """Benchmark scan time and cache residency of the combined vs split layouts"""
+        results = benchmark_split(self.db)
+        bump_version(self.db, 'people')
+        return results
+    
+    def benchmark_unified_schema(self):
+        """Compare the Python round-trip migration against the server-side $merge one"""
+        print("\n=== UNIFIED SCHEMA MIGRATION BENCHMARK ===")
+        
+        python_stats = measure(self.db, lambda: self.create_unified_schema())
+        python_count = self.db.people.count_documents({})
+        server_stats = measure(self.db, lambda: self.create_unified_schema(server_side=True))
+        server_count = self.db.people.count_documents({})
+        
+        print("\n" + "="*60)
+        print(f"{'MODE':15} {'TIME':>10} {'BYTES IN':>15} {'BYTES OUT':>15}")
+        for mode, (elapsed, bytes_in, bytes_out) in (("python", python_stats), ("server-side", server_stats)):
+            print(f"{mode:15} {elapsed:>9.3f}s {bytes_in:>15,} {bytes_out:>15,}")
+        print(f"Documents: python={python_count:,}, server-side={server_count:,}")
+        print("(network counters are server-wide, so other clients add noise)")
+        
+        return {'python': python_stats, 'server_side': server_stats}
+    
+    def run_analysis_queries(self, mode='standard', concurrency=4, fraction=DEFAULT_FRACTION, partitions=4):
         """Run the 10 analysis queries"""
-        print("\n=== RUNNING ANALYSIS QUERIES ===")
+        if mode == 'concurrent':
+            print(f"\n=== RUNNING ANALYSIS QUERIES (CONCURRENT, LIMIT {concurrency}) ===")
+            # Native Motor pipelines when installed; the query cache only sits on the threaded path
+            uri = self.connection.uri if self.cache is None else None
+            runner = AsyncQueryRunner(self._aggregate, concurrency, uri=uri, database=self.db.name)
+            if runner.uri:
+                print("   Issuing pipelines natively through Motor")
+            results, wall_time = runner.run()
+            print_concurrency_report(results, wall_time, concurrency)
+            self.connection.print_pool_stats()
+            return results
+        if mode == 'fused':
+            return self.run_fused_analysis_queries()
+        if mode == 'rollup':
+            return self.run_rollup_analysis_queries()
+        if mode == 'covered':
+            print("\n=== RUNNING ANALYSIS QUERIES (COVERED) ===")
+            return self._run_query_loop(lambda query: run_covered(self.db.people, query))
+        if mode == 'slim':
+            if slim_is_stale(self.db):
+                build_slim_collection(self.db)
+            print("\n=== RUNNING ANALYSIS QUERIES (SLIM COMPANION) ===")
+            return self._run_query_loop(lambda query: list(self.db[SLIM_COLLECTION].aggregate(query['pipeline'])))
+        if mode == 'snapshot':
+            if snapshot_is_stale(self.db):
+                export_snapshot(self.db)
+            engine = SnapshotEngine()
+            print("\n=== RUNNING ANALYSIS QUERIES (COLUMNAR SNAPSHOT) ===")
+            return self._run_query_loop(lambda query: engine.aggregate(query['pipeline']))
+        if mode == 'numpy':
+            backend = NumpyBackend(self.db)
+            print("\n=== RUNNING ANALYSIS QUERIES (NUMPY) ===")
+            return self._run_query_loop(lambda query: backend.aggregate(query['pipeline']))
+        if mode == 'partitioned':
+            targets = partition_targets(self.db, partitions)
+            if partitions_are_stale(self.db, targets):
+                build_partitions(self.db, targets)
+            runner = ScatterGatherRunner(targets)
+            print(f"\n=== RUNNING ANALYSIS QUERIES (SCATTER-GATHER, {partitions} PARTITIONS) ===")
+            results = self._run_query_loop(lambda query: runner.aggregate(query['pipeline']))
+            runner.close()
+            return results
+        if mode == 'approximate':
+            engine = ApproximateEngine(self.db, fraction=fraction)
+            print(f"\n=== RUNNING ANALYSIS QUERIES (APPROXIMATE, {fraction:.0%} SAMPLE) ===")
+            return self._run_query_loop(lambda query: engine.aggregate(query['pipeline']))
+        if mode == 'encoded':
+            labels = encode_collection(self.db) if encoded_is_stale(self.db) else load_dictionary(self.db)
+            print("\n=== RUNNING ANALYSIS QUERIES (ENCODED) ===")
+            return self._run_query_loop(lambda query: run_encoded(self.db, query, labels))
         
+        print("\n=== RUNNING ANALYSIS QUERIES ===")
+        return self._run_query_loop(lambda query: self._aggregate(query['pipeline']))
+    
+    def _run_query_loop(self, execute):
+        """Time execute(query) for every registered analysis query"""
         results = {}
         
-        # Query 1: Age distribution
-        print("1. Analyzing age distribution...")
-        start_time = time.time()
-        age_dist = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": "$type",
-                "avg_age": {"$avg": "$age"},
-                "min_age": {"$min": "$age"},
-                "max_age": {"$max": "$age"},
-                "count": {"$sum": 1}
-            }}
-        ]))
-        query1_time = time.time() - start_time
-        results['age_distribution'] = {'data': age_dist, 'time': query1_time}
-        print(f"   Completed in {query1_time:.3f}s")
+        for query in ANALYSIS_QUERIES:
+            print(query['label'])
+            start_time = time.time()
+            data = finalize(query, execute(query))
+            query_time = time.time() - start_time
+            results[query['key']] = {'data': data, 'time': query_time}
+            print(f"   Completed in {query_time:.3f}s")
         
-        # Query 2: Gender distribution
-        print("2. Analyzing gender distribution...")
-        start_time = time.time()
-        gender_dist = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": {"type": "$type", "sex": "$sex"},
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"_id.type": 1, "_id.sex": 1}}
-        ]))
-        query2_time = time.time() - start_time
-        results['gender_distribution'] = {'data': gender_dist, 'time': query2_time}
-        print(f"   Completed in {query2_time:.3f}s")
-        
-        # Query 3: MBTI personality types
-        print("3. Analyzing MBTI personality types...")
-        start_time = time.time()
-        mbti_dist = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": "$mbti_personality",
-                "total_count": {"$sum": 1},
-                "influencer_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
-                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}}
-            }},
-            {"$sort": {"total_count": -1}},
-            {"$limit": 16}  # Top 16 MBTI types
-        ]))
-        query3_time = time.time() - start_time
-        results['mbti_distribution'] = {'data': mbti_dist, 'time': query3_time}
-        print(f"   Completed in {query3_time:.3f}s")
-        
-        # Query 4: Country distribution for influencers
-        print("4. Analyzing country distribution...")
-        start_time = time.time()
-        country_dist = list(self.db.people.aggregate([
-            {"$match": {"type": "influencer"}},
-            {"$group": {
-                "_id": "$location.country",
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 20}
-        ]))
-        query4_time = time.time() - start_time
-        results['country_distribution'] = {'data': country_dist, 'time': query4_time}
-        print(f"   Completed in {query4_time:.3f}s")
-        
-        # Query 5: Average age comparison
-        print("5. Comparing average ages...")
-        start_time = time.time()
-        age_comparison = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": "$type",
-                "average_age": {"$avg": "$age"},
-                "median_age": {"$median": "$age"},
-                "count": {"$sum": 1}
-            }}
-        ]))
-        query5_time = time.time() - start_time
-        results['age_comparison'] = {'data': age_comparison, 'time': query5_time}
-        print(f"   Completed in {query5_time:.3f}s")
-        
-        # Query 6: MBTI vs Lifestyle correlation (Complex)
-        print("6. Analyzing MBTI vs Lifestyle correlation...")
-        start_time = time.time()
-        mbti_lifestyle = list(self.db.people.aggregate([
-            {"$match": {"type": "influencer", "profile.lifestyle": {"$ne": None}}},
-            {"$group": {
-                "_id": {
-                    "mbti": "$mbti_personality",
-                    "lifestyle": "$profile.lifestyle"
-                },
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 50}
-        ]))
-        query6_time = time.time() - start_time
-        results['mbti_lifestyle'] = {'data': mbti_lifestyle, 'time': query6_time}
-        print(f"   Completed in {query6_time:.3f}s")
-        
-        # Query 7: Geographic distribution with age demographics (Complex)
-        print("7. Analyzing geographic-age demographics...")
-        start_time = time.time()
-        geo_age = list(self.db.people.aggregate([
-            {"$match": {"type": "influencer"}},
-            {"$group": {
-                "_id": "$location.country",
-                "avg_age": {"$avg": "$age"},
-                "age_ranges": {
-                    "$push": {
-                        "$switch": {
-                            "branches": [
-                                {"case": {"$lt": ["$age", 25]}, "then": "18-24"},
-                                {"case": {"$lt": ["$age", 35]}, "then": "25-34"},
-                                {"case": {"$lt": ["$age", 45]}, "then": "35-44"},
-                                {"case": {"$gte": ["$age", 45]}, "then": "45+"}
-                            ]
-                        }
-                    }
-                },
-                "total_count": {"$sum": 1}
-            }},
-            {"$match": {"total_count": {"$gte": 100}}},  # Countries with at least 100 influencers
-            {"$sort": {"total_count": -1}},
-            {"$limit": 15}
-        ]))
-        query7_time = time.time() - start_time
-        results['geo_age_demographics'] = {'data': geo_age, 'time': query7_time}
-        print(f"   Completed in {query7_time:.3f}s")
-        
-        # Query 8: Cross-dataset personality analysis (Complex)
-        print("8. Cross-dataset personality pattern analysis...")
-        start_time = time.time()
-        personality_analysis = list(self.db.people.aggregate([
-            {"$group": {
-                "_id": {
-                    "mbti": "$mbti_personality",
-                    "sex": "$sex",
-                    "age_group": {
-                        "$switch": {
-                            "branches": [
-                                {"case": {"$lt": ["$age", 30]}, "then": "Young"},
-                                {"case": {"$lt": ["$age", 50]}, "then": "Middle"},
-                                {"case": {"$gte": ["$age", 50]}, "then": "Senior"}
-                            ]
-                        }
-                    }
-                },
-                "influencer_count": {"$sum": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}},
-                "noble_count": {"$sum": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}},
-                "total_count": {"$sum": 1}
-            }},
-            {"$match": {"total_count": {"$gte": 50}}},
-            {"$sort": {"total_count": -1}},
-            {"$limit": 30}
-        ]))
-        query8_time = time.time() - start_time
-        results['personality_analysis'] = {'data': personality_analysis, 'time': query8_time}
-        print(f"   Completed in {query8_time:.3f}s")
-        
-        # Query 9: Education vs Lifestyle analysis (Complex)
-        print("9. Education level impact on lifestyle...")
-        start_time = time.time()
-        education_lifestyle = list(self.db.people.aggregate([
-            {"$match": {"type": "influencer"}},
-            {"$group": {
-                "_id": {
-                    "education": "$profile.education_level",
-                    "lifestyle": "$profile.lifestyle"
-                },
-                "count": {"$sum": 1},
-                "avg_age": {"$avg": "$age"}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 25}
-        ]))
-        query9_time = time.time() - start_time
-        results['education_lifestyle'] = {'data': education_lifestyle, 'time': query9_time}
-        print(f"   Completed in {query9_time:.3f}s")
-        
-        # Query 10: Comprehensive demographic comparison (Complex)
-        print("10. Comprehensive demographic comparison...")
-        start_time = time.time()
-        demographic_comparison = list(self.db.people.aggregate([
-            {"$facet": {
-                "by_type": [
-                    {"$group": {
-                        "_id": "$type",
-                        "total_count": {"$sum": 1},
-                        "avg_age": {"$avg": "$age"},
-                        "male_count": {"$sum": {"$cond": [{"$eq": ["$sex", "Male"]}, 1, 0]}},
-                        "female_count": {"$sum": {"$cond": [{"$eq": ["$sex", "Female"]}, 1, 0]}},
-                        "most_common_mbti": {"$first": "$mbti_personality"}
-                    }}
-                ],
-                "mbti_comparison": [
-                    {"$group": {
-                        "_id": "$mbti_personality",
-                        "influencer_ratio": {
-                            "$avg": {"$cond": [{"$eq": ["$type", "influencer"]}, 1, 0]}
-                        },
-                        "noble_ratio": {
-                            "$avg": {"$cond": [{"$eq": ["$type", "noble"]}, 1, 0]}
-                        },
-                        "total_count": {"$sum": 1}
-                    }},
-                    {"$sort": {"total_count": -1}},
-                    {"$limit": 16}
-                ]
-            }}
-        ]))
-        query10_time = time.time() - start_time
-        results['demographic_comparison'] = {'data': demographic_comparison, 'time': query10_time}
-        print(f"   Completed in {query10_time:.3f}s")
+        return results
+    
+    def run_rollup_analysis_queries(self, full_refresh=False):
+        """Answer the dashboard queries from the rollup cubes, the rest from people"""
+        print("\n=== RUNNING ANALYSIS QUERIES (ROLLUPS) ===")
+        
+        rollups = RollupManager(self.db)
+        if full_refresh or rollups.is_stale():
+            rollups.refresh(full=full_refresh)
+        
+        def execute(query):
+            if query['key'] in ROLLUP_QUERIES:
+                return ROLLUP_QUERIES[query['key']](rollups)
+            return self._aggregate(query['pipeline'])
+        
+        return self._run_query_loop(execute)
+    
+    def run_fused_analysis_queries(self):
+        """Run all 10 queries as one projected scan feeding a single $facet"""
+        print("\n=== RUNNING ANALYSIS QUERIES (FUSED) ===")
+        
+        data, total_time = run_fused(self.db.people)
+        
+        # One scan answers everything, so its time is split evenly across the queries
+        results = {}
+        for query in ANALYSIS_QUERIES:
+            results[query['key']] = {'data': data[query['key']], 'time': total_time / len(ANALYSIS_QUERIES)}
+        print(f"✓ {len(ANALYSIS_QUERIES)} queries answered with one scan in {total_time:.3f}s")
         
         return results
     
-    def create_indexes(self):
+    def create_indexes(self, strategy='advisor', verify=True):
         """Create indexes for performance optimization"""
         print("\n=== CREATING INDEXES ===")
         
-        indexes = [
-            ("type", 1),
-            ("age", 1),
-            ("sex", 1),
-            ("mbti_personality", 1),
-            ("location.country", 1),
-            ("profile.education_level", 1),
-            ("profile.lifestyle", 1),
-            ([("type", 1), ("age", 1)], {}),
-            ([("type", 1), ("sex", 1)], {}),
-            ([("mbti_personality", 1), ("type", 1)], {}),
-            ([("location.country", 1), ("age", 1)], {})
-        ]
-        
-        for index in indexes:
-            if isinstance(index[0], list):
-                self.db.people.create_index(index[0], **index[1])
-                print(f"✓ Created compound index: {index[0]}")
-            else:
-                self.db.people.create_index([(index[0], index[1])])
-                print(f"✓ Created index: {index[0]}")
+        if strategy == 'advisor':
+            # Derive the index set from the registered query workload
+            advisor = IndexAdvisor(self.db)
+            proposals = advisor.propose()
+            advisor.print_proposals(proposals)
+            return advisor.apply(proposals, verify=verify)
+        
+        # Original hand-picked index list, in one createIndexes: a single collection scan instead of eleven
+        specs = [{'key': dict(keys), 'name': index_name(keys)} for keys in MANUAL_INDEXES]
+        build_indexes(self.db.people, specs)
+        for spec in specs:
+            print(f"✓ Created index: {list(spec['key'].items())}")
+    
+    def compare_covered_execution(self):
+        """Build the covering index and slim collection, then report bytes examined per query"""
+        ensure_covering_index(self.db.people)
+        build_slim_collection(self.db)
+        print_bytes_report(self.db)
+
+    def age_percentiles(self, fractions=(0.25, 0.5, 0.75, 0.9, 0.99)):
+        """Exact age percentiles per type from a server-side age histogram"""
+        report = percentile_report(self.db.people, fractions=fractions)
+        print("\nAGE PERCENTILES:")
+        for row in report:
+            values = ', '.join(f"{name}={value:g}" for name, value in row.items()
+                               if name.startswith('p') and value is not None)
+            print(f"   {str(row['_id']).title()}: {values} (n={row['count']:,})")
+        return report
+
+    def cross_check_backends(self):
+        """Check the numpy backend against MongoDB and time both on every query"""
+        backend = NumpyBackend(self.db)
+        report = cross_check(self.db, backend)
+        print_cross_check(report, backend.load_time)
+        return report
+
+    def benchmark_data_scaling(self, scales=(1, 10), seed=0):
+        """Ingest, migration, index and query time on seeded synthetic datasets of growing size"""
+        # A separate project on a scratch database: the benchmark reloads and then drops everything
+        scratch = MongoDBProject(get_manager(uri=self.connection.uri, database=SCRATCH_DATABASE))
+        return benchmark_data_scaling(scratch, scales=scales, seed=seed)
+
+    def benchmark_partition_scaling(self, strategy='hashed', uris=None):
+        """Scatter-gather query time over 1, 2, 4 and 8 partitions of people"""
+        return benchmark_scaling(self.db, strategy=strategy, uris=uris)
+
+    def compare_encoded_storage(self):
+        """Rebuild the categorical-encoded collection and compare its size with people"""
+        encode_collection(self.db)
+        print_encoding_report(self.db)
+
+    def export(self, path, format='ndjson', **options):
+        """Stream people to NDJSON/CSV in keyset pages (sort, filter, projection, page_size, batch_size)"""
+        return export_people(self.db, path, format=format, **options)
+
+    def search(self, terms, type=None, mbti=None, country=None, page=1, page_size=10):
+        """Ranked full-text search over names and backstories, one page at a time"""
+        page = search_people(self.db, terms, type=type, mbti=mbti, country=country, page=page, page_size=page_size)
+        print_search_page(terms, page)
+        return page
+
+    def benchmark_text_search(self):
+        """Compare text-index search latency against a $regex full scan"""
+        return benchmark_search(self.db)
+
+    def explain_queries(self):
+        """Report the winning plan of every analysis query and flag unused indexes"""
+        report = explain_workload(self.db)
+        print_explain_report(report)
+        return report
     
     def print_results(self, results):
         """Print analysis results in a formatted way"""
@@ -440,7 +409,10 @@ class MongoDBProject:
         # Query 5: Age comparison
         print("\n5. AGE COMPARISON:")
         for item in results['age_comparison']['data']:
-            print(f"   {item['_id'].title()}: avg={item['average_age']:.1f}, count={item['count']:,}")
+            # A group without numeric ages has no average or median
+            average = f"{item['average_age']:.1f}" if item['average_age'] is not None else 'n/a'
+            median = f"{item['median_age']:g}" if item['median_age'] is not None else 'n/a'
+            print(f"   {item['_id'].title()}: avg={average}, median={median}, count={item['count']:,}")
         
         # Performance summary
         print("\n" + "="*60)
@@ -453,20 +425,25 @@ class MongoDBProject:
             print(f"{query_name:25}: {query_time:.3f}s")
         print(f"{'TOTAL TIME':25}: {total_time:.3f}s")
     
-    def run_project(self):
-        """Run the complete project"""
+    def run_project(self, streaming=False, write_legacy=False, split_text=False, warmup=1, repetitions=5):
+        """Run the complete project, timing the workload with the BenchmarkSuite before and after indexing"""
         print("MongoDB Project - Influencer & Noble Data Analysis")
         print("="*60)
         
-        # Step 1: Load initial data
-        self.load_initial_data()
-        
-        # Step 2: Create unified schema
-        self.create_unified_schema()
+        if streaming:
+            # Steps 1-2: Single pass straight into the unified schema
+            self.load_unified_streaming(write_legacy=write_legacy, split_text=split_text)
+        else:
+            # Step 1: Load initial data
+            self.load_initial_data()
+            
+            # Step 2: Create unified schema
+            self.create_unified_schema()
         
-        # Step 3: Run queries without indexes
+        # Step 3: Benchmark queries without indexes
         print("\n=== PERFORMANCE TEST: WITHOUT INDEXES ===")
-        results_before = self.run_analysis_queries()
+        suite = BenchmarkSuite(self.db, warmup=warmup, repetitions=repetitions)
+        benchmark_before = suite.run(label='without indexes')
         
         # Step 4: Create indexes
         self.create_indexes()
@@ -474,20 +451,17 @@ class MongoDBProject:
         # Step 5: Run queries with indexes
         print("\n=== PERFORMANCE TEST: WITH INDEXES ===")
         results_after = self.run_analysis_queries()
+        benchmark_after = suite.run(label='with indexes')
         
         # Step 6: Print results and comparison
         self.print_results(results_after)
         
         # Performance comparison
         print("\n" + "="*60)
-        print("PERFORMANCE COMPARISON (Before vs After Indexing):")
+        print("PERFORMANCE COMPARISON (Before vs After Indexing, warm p50):")
         print("="*60)
         
-        for query_name in results_before.keys():
-            before_time = results_before[query_name]['time']
-            after_time = results_after[query_name]['time']
-            improvement = ((before_time - after_time) / before_time) * 100
-            print(f"{query_name:25}: {before_time:.3f}s -> {after_time:.3f}s ({improvement:+.1f}%)")
+        print_comparison(compare_reports(benchmark_before, benchmark_after))
         
         print("\n✓ Project completed successfully!")
         print("Ready for Metabase visualization setup.")
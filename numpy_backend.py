@@ -0,0 +1,345 @@
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from analysis_queries import ANALYSIS_QUERIES, PERFORMANCE_PROBES, finalize, referenced_fields
+from columnar_snapshot import apply_post_group
+
+NUMERIC_DTYPES = {'age': np.int16}
+COMPARISONS = {'$eq': np.equal, '$ne': np.not_equal, '$lt': np.less, '$lte': np.less_equal,
+               '$gt': np.greater, '$gte': np.greater_equal}
+LOAD_BATCH_SIZE = 10000
+
+# values holds numbers, or codes into labels for categoricals; valid is False where the field is null
+Column = namedtuple('Column', ['values', 'labels', 'valid'])
+
+
+def _lookup(doc, path):
+    value = doc
+    for part in path.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _categorical(values):
+    """Code a list of labels; code 0 is null and the rest follow label order, like MongoDB's $sort"""
+    labels = [None] + sorted({value for value in values if value is not None})
+    lookup = {label: code for code, label in enumerate(labels)}
+    dtype = np.int16 if len(labels) < np.iinfo(np.int16).max else np.int32
+    codes = np.fromiter((lookup[value] for value in values), dtype=dtype, count=len(values))
+    return Column(codes, labels, codes != 0)
+
+
+def load_arrays(db, fields, collection='people'):
+    """Pull the projected fields of a collection once into typed numpy columns"""
+    projection = {field: 1 for field in fields}
+    projection['_id'] = 0
+    raw = {field: [] for field in fields}
+    for doc in db[collection].find({}, projection, batch_size=LOAD_BATCH_SIZE):
+        for field in fields:
+            raw[field].append(_lookup(doc, field))
+
+    columns = {}
+    for field, values in raw.items():
+        if field in NUMERIC_DTYPES:
+            valid = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+            numbers = np.fromiter((value or 0 for value in values), dtype=NUMERIC_DTYPES[field], count=len(values))
+            columns[field] = Column(numbers, None, valid)
+        else:
+            columns[field] = _categorical(values)
+    return columns
+
+
+def _constant(value, rows):
+    if value is None:
+        return Column(np.zeros(rows, dtype=np.int8), [None], np.zeros(rows, dtype=bool))
+    if isinstance(value, str):
+        return Column(np.zeros(rows, dtype=np.int8), [value], np.ones(rows, dtype=bool))
+    return Column(np.full(rows, value), None, np.ones(rows, dtype=bool))
+
+
+def _compact(codes, labels, valid):
+    """Merge duplicate labels so equal values always share one code"""
+    unique = sorted({label for label in labels if label is not None})
+    lookup = {label: code for code, label in enumerate(unique)}
+    remap = np.array([lookup.get(label, 0) for label in labels], dtype=np.int32)
+    return Column(remap[codes], unique or [None], valid)
+
+
+def _where(condition, then, otherwise):
+    valid = np.where(condition, then.valid, otherwise.valid)
+    if then.labels is None and otherwise.labels is None:
+        return Column(np.where(condition, then.values, otherwise.values), None, valid)
+    if then.labels is None or otherwise.labels is None:
+        raise ValueError("Cannot mix numeric and categorical branches")
+    codes = np.where(condition, then.values.astype(np.int32), otherwise.values.astype(np.int32) + len(then.labels))
+    return _compact(codes, then.labels + otherwise.labels, valid)
+
+
+def _compare(column, operator, literal, expression=False):
+    """Boolean array of column <operator> literal, with MongoDB's handling of null fields
+
+    In a query filter a null field only matches $ne. In an aggregation expression null sorts
+    before every other BSON type, so {$lt: ['$age', 25]} is true for a null age.
+    """
+    if literal is None and operator in ('$eq', '$ne'):
+        return ~column.valid if operator == '$eq' else column.valid
+    if column.labels is not None:
+        if operator not in ('$eq', '$ne'):
+            raise ValueError(f"Unsupported categorical comparison: {operator}")
+        code = column.labels.index(literal) if literal in column.labels else -1
+        matched = (column.values == code) & column.valid
+        return matched if operator == '$eq' else ~matched
+    # A null field ranks 0 against the non-null literal's 1
+    null_result = COMPARISONS[operator](0, 1) if expression else operator == '$ne'
+    return np.where(column.valid, COMPARISONS[operator](column.values, literal), null_result)
+
+
+def _decode(column, index):
+    if not column.valid[index]:
+        return None
+    value = column.values[index]
+    return column.labels[value] if column.labels is not None else value.item()
+
+
+class NumpyBackend:
+    """In-process, array-backed copy of people that answers the registered pipelines"""
+
+    def __init__(self, db, collection='people', workload=None):
+        workload = workload or ANALYSIS_QUERIES + PERFORMANCE_PROBES
+        fields = set()
+        for entry in workload:
+            fields |= referenced_fields(entry.get('pipeline', [])) | set(entry.get('filter', {}))
+
+        start_time = time.perf_counter()
+        self.columns = load_arrays(db, sorted(fields), collection)
+        self.load_time = time.perf_counter() - start_time
+        self.rows = len(next(iter(self.columns.values())).values) if self.columns else 0
+        print(f"✓ Loaded {self.rows:,} rows x {len(self.columns)} columns into numpy in {self.load_time:.2f}s")
+
+    def _value(self, columns, rows, expression):
+        if isinstance(expression, str) and expression.startswith('$'):
+            return columns[expression[1:]]
+        if not isinstance(expression, dict):
+            return _constant(expression, rows)
+        operator, args = next(iter(expression.items()))
+        if operator in COMPARISONS:
+            column, literal = args
+            compared = _compare(self._value(columns, rows, column), operator, literal, expression=True)
+            return Column(compared, None, np.ones(rows, dtype=bool))
+        if operator == '$and':
+            result = np.ones(rows, dtype=bool)
+            for arg in args:
+                result &= self._value(columns, rows, arg).values
+            return Column(result, None, np.ones(rows, dtype=bool))
+        if operator == '$cond':
+            condition, then, otherwise = args
+            return _where(self._value(columns, rows, condition).values,
+                          self._value(columns, rows, then), self._value(columns, rows, otherwise))
+        if operator == '$switch':
+            result = _constant(args.get('default'), rows)
+            for branch in reversed(args['branches']):
+                result = _where(self._value(columns, rows, branch['case']).values,
+                                self._value(columns, rows, branch['then']), result)
+            return result
+        raise ValueError(f"Unsupported expression operator: {operator}")
+
+    def _mask(self, columns, rows, match):
+        mask = np.ones(rows, dtype=bool)
+        for path, condition in match.items():
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for operator, literal in condition.items():
+                mask &= _compare(columns[path], operator, literal)
+        return mask
+
+    def _group(self, columns, rows, spec):
+        """Sort-based group-by: lexsort on the key codes, then bincount/reduceat per group"""
+        group_id = spec['_id']
+        key_paths = group_id if isinstance(group_id, dict) else {None: group_id}
+        keys = [self._value(columns, rows, expression) for expression in key_paths.values()]
+        if rows == 0:
+            return []
+
+        key_codes = []
+        for key in keys:
+            if key.labels is None:
+                codes = np.unique(key.values, return_inverse=True)[1].reshape(-1)
+            else:
+                codes = key.values.astype(np.int32)
+            key_codes.append(np.where(key.valid, codes, -1))
+
+        # np.lexsort sorts by its last key first, so the first _id field is the primary key
+        order = np.lexsort(key_codes[::-1])
+        change = np.zeros(rows, dtype=bool)
+        change[0] = True
+        for codes in key_codes:
+            ordered = codes[order]
+            change[1:] |= ordered[1:] != ordered[:-1]
+        starts = np.flatnonzero(change)
+        group_ids = np.empty(rows, dtype=np.int64)
+        group_ids[order] = np.cumsum(change) - 1
+        groups = len(starts)
+        # order is stable, so the first row of each group in it is also its first row in scan order
+        first_rows = order[starts]
+
+        docs = []
+        for index in range(groups):
+            values = [_decode(key, first_rows[index]) for key in keys]
+            docs.append({'_id': values[0] if None in key_paths else dict(zip(key_paths, values))})
+
+        for name, accumulator in spec.items():
+            if name == '_id':
+                continue
+            operator, expression = next(iter(accumulator.items()))
+            column = self._value(columns, rows, expression)
+            for doc, value in zip(docs, self._accumulate(operator, column, group_ids, groups, first_rows)):
+                doc[name] = value
+        return docs
+
+    def _accumulate(self, operator, column, group_ids, groups, first_rows):
+        if operator == '$first':
+            return [_decode(column, row) for row in first_rows]
+        if operator == '$push':
+            order = np.argsort(group_ids, kind='stable')
+            bounds = np.flatnonzero(np.diff(group_ids[order])) + 1
+            return [[_decode(column, row) for row in rows] for rows in np.split(order, bounds)]
+        if column.labels is not None:
+            raise ValueError(f"{operator} needs a numeric expression")
+
+        valid = column.valid
+        counts = np.bincount(group_ids[valid], minlength=groups)
+        if operator == '$sum':
+            sums = np.bincount(group_ids[valid], weights=column.values[valid], minlength=groups)
+            integral = column.values.dtype.kind in 'biu'
+            return [int(total) if integral else float(total) for total in sums]
+        if operator == '$avg':
+            sums = np.bincount(group_ids[valid], weights=column.values[valid], minlength=groups)
+            return [float(total / n) if n else None for total, n in zip(sums, counts)]
+
+        # Order statistics: sort values within groups, then index each group's slice
+        order = np.lexsort((column.values[valid], group_ids[valid]))
+        ordered = column.values[valid][order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        results = []
+        for start, n in zip(starts, counts):
+            if not n:
+                results.append(None)
+            elif operator == '$min':
+                results.append(ordered[start].item())
+            elif operator == '$max':
+                results.append(ordered[start + n - 1].item())
+            elif operator == '$median':
+                middle = start + (n - 1) // 2
+                results.append(float((ordered[middle] + ordered[start + n // 2]) / 2))
+            else:
+                raise ValueError(f"Unsupported accumulator: {operator}")
+        return results
+
+    def aggregate(self, pipeline, columns=None):
+        columns = self.columns if columns is None else columns
+        rows = len(next(iter(columns.values())).values) if columns else 0
+        for position, stage in enumerate(pipeline):
+            if '$facet' in stage:
+                return [{name: self.aggregate(sub_pipeline, columns) for name, sub_pipeline in stage['$facet'].items()}]
+            if '$match' in stage:
+                mask = self._mask(columns, rows, stage['$match'])
+                columns = {path: Column(c.values[mask], c.labels, c.valid[mask]) for path, c in columns.items()}
+                rows = int(mask.sum())
+            elif '$group' in stage:
+                return apply_post_group(pipeline[position + 1:], self._group(columns, rows, stage['$group']))
+            else:
+                raise ValueError(f"Unsupported pre-group stage: {list(stage)[0]}")
+        raise ValueError("Pipelines without $group are not supported by the numpy backend")
+
+    def execute(self, entry):
+        """Same contract as analysis_queries.execute: filters are counted, pipelines aggregated"""
+        if 'filter' in entry:
+            return int(self._mask(self.columns, self.rows, entry['filter']).sum())
+        return finalize(entry, self.aggregate(entry['pipeline']))
+
+
+def _without_limit(pipeline):
+    """Drop $limit so tied groups at the cut-off cannot differ between backends"""
+    stripped = []
+    for stage in pipeline:
+        if '$facet' in stage:
+            stage = {"$facet": {name: _without_limit(sub) for name, sub in stage['$facet'].items()}}
+        elif '$limit' in stage:
+            continue
+        stripped.append(stage)
+    return stripped
+
+
+def _checked_fields(pipeline):
+    for stage in pipeline:
+        if '$group' in stage:
+            return [name for name, accumulator in stage['$group'].items()
+                    if name != '_id' and next(iter(accumulator)) in ('$sum', '$avg')]
+    return []
+
+
+def _group_key(doc):
+    group_id = doc['_id']
+    return repr(sorted(group_id.items())) if isinstance(group_id, dict) else repr(group_id)
+
+
+def _diff_results(pipeline, expected, actual, tolerance, prefix='', label='numpy'):
+    """Mismatching counts and averages between MongoDB's and a backend's results of the same pipeline"""
+    if len(pipeline) == 1 and '$facet' in pipeline[0]:
+        mismatches = []
+        for name, sub_pipeline in pipeline[0]['$facet'].items():
+            mismatches += _diff_results(sub_pipeline, expected[0][name], actual[0][name], tolerance,
+                                        prefix + name + '.', label)
+        return mismatches
+
+    mismatches = []
+    actual_groups = {_group_key(doc): doc for doc in actual}
+    expected_groups = {_group_key(doc): doc for doc in expected}
+    for key in expected_groups.keys() ^ actual_groups.keys():
+        mismatches.append(f"{prefix}group {key} only in {'mongodb' if key in expected_groups else label}")
+    for key in expected_groups.keys() & actual_groups.keys():
+        for name in _checked_fields(pipeline):
+            left, right = expected_groups[key].get(name), actual_groups[key].get(name)
+            if left is None or right is None:
+                same = left is right
+            else:
+                same = math.isclose(left, right, rel_tol=tolerance, abs_tol=tolerance)
+            if not same:
+                mismatches.append(f"{prefix}{key} {name}: mongodb={left} {label}={right}")
+    return mismatches
+
+
+def cross_check(db, backend, queries=ANALYSIS_QUERIES, tolerance=1e-9, label='numpy'):
+    """Run every query on MongoDB and on backend (named label in reports), comparing counts/averages and timing both"""
+    report = {}
+    for query in queries:
+        pipeline = _without_limit(query['pipeline'])
+        start_ns = time.perf_counter_ns()
+        expected = list(db.people.aggregate(pipeline))
+        mongodb_ms = (time.perf_counter_ns() - start_ns) / 1e6
+        start_ns = time.perf_counter_ns()
+        actual = backend.aggregate(pipeline)
+        backend_ms = (time.perf_counter_ns() - start_ns) / 1e6
+        report[query['key']] = {
+            'mongodb_ms': mongodb_ms,
+            'backend_ms': backend_ms,
+            'mismatches': _diff_results(pipeline, expected, actual, tolerance, label=label)
+        }
+    return report
+
+
+def print_cross_check(report, load_time=None, label='numpy'):
+    print("\n" + "="*60)
+    print(f"BACKEND CROSS-CHECK (MongoDB vs {label})")
+    print("="*60)
+    print(f"{'QUERY':25} {'MONGODB':>11} {label.upper():>11}  STATUS")
+    for key, row in report.items():
+        status = '✓ match' if not row['mismatches'] else f"✗ {len(row['mismatches'])} mismatches"
+        print(f"{key:25} {row['mongodb_ms']:>9.2f}ms {row['backend_ms']:>9.2f}ms  {status}")
+        for mismatch in row['mismatches'][:5]:
+            print(f"   - {mismatch}")
+    if load_time is not None:
+        print(f"({label} timings exclude the one-off {load_time:.2f}s array load)")
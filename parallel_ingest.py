@@ -0,0 +1,155 @@
+import io
+import os
+import queue
+import threading
+import time
+from multiprocessing import get_context
+
+from ingest_common import DATA_FILES, BATCH_SIZE, parse_raw_line
+
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def split_into_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """Split a file into (start, end) byte ranges that end on line boundaries"""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_chunk(task):
+    """Worker: parse one byte range of a JSONL file into raw-schema documents"""
+    collection_name, doc_type, path, start, end = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    docs = []
+    lines = 0
+    # newline=None gives the same universal-newline splitting as open(path, 'r')
+    for line in io.StringIO(data.decode('utf-8'), newline=None):
+        lines += 1
+        doc = parse_raw_line(line, doc_type)
+        if doc is not None:
+            docs.append(doc)
+    return collection_name, docs, lines, len(data)
+
+
+class ParallelIngestor:
+    """Loads the raw collections with a process pool for parsing and insert threads for writing"""
+
+    def __init__(self, db, parse_workers=None, insert_workers=4, chunk_bytes=CHUNK_BYTES,
+                 batch_size=BATCH_SIZE, data_files=None):
+        self.db = db
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.insert_workers = insert_workers
+        self.chunk_bytes = chunk_bytes
+        self.batch_size = batch_size
+        self.data_files = data_files or DATA_FILES
+
+    def _build_tasks(self):
+        """Interleave the chunks of all files so every collection is fed at the same time"""
+        per_file = []
+        for collection_name, (path, doc_type) in self.data_files.items():
+            chunks = split_into_chunks(path, self.chunk_bytes)
+            per_file.append([(collection_name, doc_type, path, start, end) for start, end in chunks])
+
+        tasks = []
+        for i in range(max((len(chunks) for chunks in per_file), default=0)):
+            for chunks in per_file:
+                if i < len(chunks):
+                    tasks.append(chunks[i])
+        return tasks
+
+    def _insert_worker(self, batches, stats, lock, errors):
+        while True:
+            item = batches.get()
+            if item is None:
+                break
+            collection_name, batch = item
+            try:
+                start = time.perf_counter()
+                self.db[collection_name].insert_many(batch, ordered=False)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats['insert_busy'] += elapsed
+                    stats['inserted'][collection_name] += len(batch)
+            except Exception as e:
+                errors.append(e)
+
+    def run(self):
+        """Run the parallel load and return per-stage throughput statistics"""
+        print("\n=== LOADING INITIAL DATA (PARALLEL) ===")
+        print(f"Parse workers: {self.parse_workers}, insert workers: {self.insert_workers}")
+
+        for collection_name in self.data_files:
+            self.db[collection_name].drop()
+
+        tasks = self._build_tasks()
+        stats = {
+            'lines': 0,
+            'bytes': 0,
+            'parsed': {name: 0 for name in self.data_files},
+            'inserted': {name: 0 for name in self.data_files},
+            'insert_busy': 0.0,
+        }
+        lock = threading.Lock()
+        errors = []
+        batches = queue.Queue(maxsize=self.insert_workers * 4)
+        threads = [
+            threading.Thread(target=self._insert_worker, args=(batches, stats, lock, errors), daemon=True)
+            for _ in range(self.insert_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        start_time = time.perf_counter()
+        # spawn keeps the MongoClient (and its background threads) out of the workers
+        ctx = get_context('spawn')
+        try:
+            with ctx.Pool(self.parse_workers) as pool:
+                for collection_name, docs, lines, nbytes in pool.imap_unordered(parse_chunk, tasks):
+                    stats['lines'] += lines
+                    stats['bytes'] += nbytes
+                    before = stats['parsed'][collection_name]
+                    stats['parsed'][collection_name] += len(docs)
+                    for i in range(0, len(docs), self.batch_size):
+                        batches.put((collection_name, docs[i:i + self.batch_size]))
+                    if stats['parsed'][collection_name] // 10000 > before // 10000:
+                        print(f"  Parsed {stats['parsed'][collection_name]:,} {collection_name}...")
+            parse_time = time.perf_counter() - start_time
+        finally:
+            for _ in threads:
+                batches.put(None)
+            for thread in threads:
+                thread.join()
+        total_time = time.perf_counter() - start_time
+
+        if errors:
+            raise errors[0]
+
+        total_docs = sum(stats['inserted'].values())
+        stats['parse_time'] = parse_time
+        stats['total_time'] = total_time
+        stats['lines_per_sec'] = stats['lines'] / parse_time if parse_time else 0.0
+        stats['mb_per_sec'] = stats['bytes'] / (1024 * 1024) / parse_time if parse_time else 0.0
+        stats['docs_per_sec'] = total_docs / total_time if total_time else 0.0
+
+        for collection_name, count in stats['inserted'].items():
+            print(f"✓ Loaded {count:,} {collection_name}")
+        print(f"✓ Total records: {total_docs:,}")
+        print(f"  Parse stage:  {stats['lines']:,} lines in {parse_time:.2f}s "
+              f"({stats['lines_per_sec']:,.0f} lines/s, {stats['mb_per_sec']:.1f} MB/s)")
+        print(f"  Insert stage: {total_docs:,} docs in {total_time:.2f}s "
+              f"({stats['docs_per_sec']:,.0f} docs/s, {stats['insert_busy']:.2f}s busy across workers)")
+        return stats
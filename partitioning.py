@@ -0,0 +1,230 @@
+import argparse
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import bson
+
+from analysis_queries import ANALYSIS_QUERIES, finalize
+from benchmark import percentile
+from bulk_writer import BulkWriter
+from columnar_snapshot import apply_post_group
+from connection_manager import get_manager
+from index_specs import restore_index_specs, snapshot_index_specs
+from numpy_backend import cross_check
+from query_cache import VERSION_COLLECTION, collection_version
+
+PARTITION_PREFIX = 'people_p'
+PARTITION_META = 'people_partitions'
+STRATEGIES = ('hashed', 'type')
+# The type strategy puts each type on its own partition, so it fills at most len(TYPE_PARTITIONS)
+TYPE_PARTITIONS = {'influencer': 0, 'noble': 1}
+SCALING_COUNTS = (1, 2, 4, 8)
+
+
+def partition_of(doc, count, strategy='hashed'):
+    """Partition number of a document: crc32 of its BSON-encoded _id, or its type"""
+    if strategy == 'type':
+        return TYPE_PARTITIONS.get(doc.get('type'), 0) % count
+    return zlib.crc32(bson.encode({'_id': doc['_id']})) % count
+
+
+def partition_targets(db, count, uris=None):
+    """people_p0..people_pN-1 in db, or spread round-robin over the mongod instances in uris"""
+    if uris:
+        return [get_manager(uri=uris[i % len(uris)]).db[f'{PARTITION_PREFIX}{i}'] for i in range(count)]
+    return [db[f'{PARTITION_PREFIX}{i}'] for i in range(count)]
+
+
+def build_partitions(db, targets, strategy='hashed', write_profile='acknowledged'):
+    """Stream people into the partition collections and give each one people's indexes"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown partitioning strategy: {strategy}")
+    version = collection_version(db, 'people')
+    start_time = time.perf_counter()
+    for target in targets:
+        target.drop()
+    writers = [BulkWriter(target, profile=write_profile) for target in targets]
+    for doc in db.people.find({}, batch_size=1000):
+        writers[partition_of(doc, len(targets), strategy)].add(doc)
+    counts = [writer.close()['inserted'] for writer in writers]
+    specs = snapshot_index_specs(db.people)
+    for target in targets:
+        restore_index_specs(target, specs)
+    db[VERSION_COLLECTION].update_one({'_id': PARTITION_META}, {'$set': {
+        'source_version': version, 'strategy': strategy,
+        'targets': [f"{target.database.client.address}/{target.full_name}" for target in targets]
+    }}, upsert=True)
+    elapsed = time.perf_counter() - start_time
+    print(f"✓ Partitioned people into {len(targets)} ({strategy}): "
+          f"{', '.join(f'{count:,}' for count in counts)} documents in {elapsed:.2f}s")
+    return elapsed
+
+
+def partitions_are_stale(db, targets, strategy='hashed'):
+    meta = db[VERSION_COLLECTION].find_one({'_id': PARTITION_META})
+    return (meta is None or meta.get('source_version') != collection_version(db, 'people')
+            or meta.get('strategy') != strategy
+            or meta.get('targets') != [f"{target.database.client.address}/{target.full_name}"
+                                       for target in targets])
+
+
+def partial_group(group):
+    """$group each partition runs: $avg is split into a sum and a count of numeric values
+
+    $median is rejected: express a median as a histogram (like Query 5's age counts), whose
+    buckets add up across partitions.
+    """
+    partial = {'_id': group['_id']}
+    for name, accumulator in group.items():
+        if name == '_id':
+            continue
+        (operator, expression), = accumulator.items()
+        if operator == '$avg':
+            partial[f'{name}__sum'] = {"$sum": expression}
+            partial[f'{name}__count'] = {"$sum": {"$cond": [{"$isNumber": expression}, 1, 0]}}
+        elif operator in ('$sum', '$min', '$max', '$first', '$push', '$addToSet'):
+            partial[name] = accumulator
+        else:
+            raise ValueError(f"Accumulator {operator} cannot be merged across partitions")
+    return partial
+
+
+def _group_key(group_id):
+    return repr(sorted(group_id.items())) if isinstance(group_id, dict) else repr(group_id)
+
+
+def _merge_value(operator, merged, value):
+    if operator == '$sum':
+        return merged + value
+    if operator in ('$min', '$max'):
+        # Like MongoDB, a null from one partition never wins over a value from another
+        if merged is None or value is None:
+            return value if merged is None else merged
+        return min(merged, value) if operator == '$min' else max(merged, value)
+    if operator == '$push':
+        return merged + value
+    if operator == '$addToSet':
+        return merged + [item for item in value if item not in merged]
+    return merged  # $first: the first partition's value stands
+
+
+def merge_groups(group, partials):
+    """Combine the partial group rows of every partition into the rows the full $group returns"""
+    operators = {name: next(iter(accumulator)) for name, accumulator in group.items() if name != '_id'}
+    merged = {}
+    for rows in partials:
+        for row in rows:
+            key = _group_key(row['_id'])
+            if key not in merged:
+                merged[key] = dict(row)
+                continue
+            target = merged[key]
+            for name, operator in operators.items():
+                if operator == '$avg':
+                    for part in (f'{name}__sum', f'{name}__count'):
+                        target[part] += row[part]
+                else:
+                    target[name] = _merge_value(operator, target.get(name), row.get(name))
+    docs = []
+    for row in merged.values():
+        for name, operator in operators.items():
+            if operator == '$avg':
+                total, count = row.pop(f'{name}__sum'), row.pop(f'{name}__count')
+                row[name] = total / count if count else None
+        docs.append(row)
+    return docs
+
+
+def _split(pipeline):
+    """(stages before the first $group, the $group spec, stages after it)"""
+    for position, stage in enumerate(pipeline):
+        if '$group' in stage:
+            return pipeline[:position], stage['$group'], pipeline[position + 1:]
+    raise ValueError("Scatter-gather needs a $group to merge partial results")
+
+
+def shard_pipeline(pipeline):
+    """The pipeline every partition runs: filters plus the partial $group (per $facet branch)"""
+    if len(pipeline) == 1 and '$facet' in pipeline[0]:
+        return [{"$facet": {name: shard_pipeline(branch) for name, branch in pipeline[0]['$facet'].items()}}]
+    before, group, _ = _split(pipeline)
+    return before + [{"$group": partial_group(group)}]
+
+
+def merge_results(pipeline, partials):
+    """Merge per-partition outputs of shard_pipeline, then run the post-group stages in process"""
+    if len(pipeline) == 1 and '$facet' in pipeline[0]:
+        return [{name: merge_results(branch, [rows[0][name] for rows in partials])
+                 for name, branch in pipeline[0]['$facet'].items()}]
+    _, group, after = _split(pipeline)
+    return apply_post_group(after, merge_groups(group, partials))
+
+
+class ScatterGatherRunner:
+    """Runs each pipeline on every partition in parallel and merges the partial aggregates"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.executor = ThreadPoolExecutor(max_workers=len(targets))
+
+    def aggregate(self, pipeline):
+        shard = shard_pipeline(pipeline)
+        partials = list(self.executor.map(lambda target: list(target.aggregate(shard, allowDiskUse=True)),
+                                          self.targets))
+        return merge_results(pipeline, partials)
+
+    def run_analysis_queries(self, queries=ANALYSIS_QUERIES):
+        results = {}
+        for query in queries:
+            start_time = time.perf_counter()
+            data = finalize(query, self.aggregate(query['pipeline']))
+            results[query['key']] = {'data': data, 'time': time.perf_counter() - start_time}
+        return results
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def benchmark_scaling(db, counts=SCALING_COUNTS, strategy='hashed', uris=None, repetitions=3):
+    """Partition people 1/2/4/8 ways and time the ten queries through scatter-gather on each layout"""
+    report = []
+    for count in counts:
+        targets = partition_targets(db, count, uris)
+        build_time = build_partitions(db, targets, strategy) if partitions_are_stale(db, targets, strategy) else 0.0
+        runner = ScatterGatherRunner(targets)
+        mismatches = sum(len(row['mismatches']) for row in cross_check(db, runner, label='scatter-gather').values())
+        totals = sorted(sum(result['time'] for result in runner.run_analysis_queries().values())
+                        for _ in range(repetitions))
+        runner.close()
+        report.append({'partitions': count, 'build_time': build_time, 'mismatches': mismatches,
+                       'p50': percentile(totals, 0.50), 'min': totals[0]})
+    print_scaling_report(report, strategy, uris)
+    return report
+
+
+def print_scaling_report(report, strategy, uris=None):
+    print("\n" + "="*60)
+    where = f"{len(uris)} mongod instances" if uris else "one mongod"
+    print(f"SCATTER-GATHER SCALING ({strategy} partitioning, {where})")
+    print("="*60)
+    print(f"{'PARTITIONS':>10} {'BUILD':>9} {'10 QUERIES p50':>15} {'SPEEDUP':>8}  CHECK")
+    baseline = report[0]['p50'] if report else 0.0
+    for row in report:
+        speedup = baseline / row['p50'] if row['p50'] else 0.0
+        check = '✓ match' if not row['mismatches'] else f"✗ {row['mismatches']} mismatches"
+        print(f"{row['partitions']:>10} {row['build_time']:>8.2f}s {row['p50']:>14.3f}s {speedup:>7.2f}x  {check}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition people and benchmark scatter-gather queries")
+    parser.add_argument('--counts', default=','.join(map(str, SCALING_COUNTS)),
+                        help="comma-separated partition counts")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='hashed')
+    parser.add_argument('--uri', action='append', dest='uris',
+                        help="mongod holding partitions (repeat for several; default: the main server)")
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark_scaling(get_manager().db, counts=[int(count) for count in args.counts.split(',')],
+                      strategy=args.strategy, uris=args.uris, repetitions=args.repetitions)
@@ -0,0 +1,190 @@
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+
+from connection_manager import get_manager
+from index_specs import index_name
+
+# Keyset orders; _id is always the last key so every position in the order is unique
+SORT_KEYS = {
+    '_id': [('_id', 1)],
+    'type_age': [('type', 1), ('age', 1), ('_id', 1)],
+}
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 500
+EXPORT_FIELDS = ('_id', 'name', 'type', 'sex', 'age', 'mbti_personality',
+                 'location.country', 'location.state_province', 'location.realm',
+                 'profile.education_level', 'profile.lifestyle', 'profile.title', 'profile.activity')
+
+
+def get_path(doc, path):
+    """Value at a dotted path, or None when any part of it is missing"""
+    for part in path.split('.'):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def ensure_sort_index(collection, keys):
+    """Build the index matching the keyset order, so each page is an index range scan with no in-memory sort"""
+    if len(keys) > 1:
+        collection.create_index(keys, name=index_name(keys))
+
+
+def keyset_filter(keys, after):
+    """Match the documents strictly after the position `after` (key values in `keys` order)
+
+    Expands (k1, k2, ...) > (v1, v2, ...) into k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+    Null sorts before every other value, but $gt/$lt never match across types, so a null
+    position is continued with $ne instead.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(keys):
+        value = after[position]
+        if value is None:
+            condition = {'$ne': None} if direction == 1 else None
+        else:
+            condition = {'$gt' if direction == 1 else '$lt': value}
+        if condition is not None:
+            branch = {prefix_field: after[i] for i, (prefix_field, _) in enumerate(keys[:position])}
+            branch[field] = condition
+            branches.append(branch)
+    return {'$or': branches} if branches else {'_id': {'$exists': False}}
+
+
+def _query_projection(projection, keys):
+    """The projection to query with (the caller's plus the sort keys), and the key fields to strip again"""
+    if not projection:
+        return None, []
+    projection = dict(projection)
+    if not any(value for field, value in projection.items() if field != '_id'):
+        # Exclusion projection (including a bare {'_id': 0}): only excluded sort keys need putting back
+        extra = [field for field, _ in keys if field in projection]
+        for field in extra:
+            del projection[field]
+        return projection or None, extra
+    extra = [field for field, _ in keys if field not in projection and field != '_id']
+    extra += ['_id'] if projection.get('_id', 1) == 0 else []
+    for field, _ in keys:
+        projection[field] = 1
+    return projection, extra
+
+
+def iter_pages(collection, sort='_id', filter=None, projection=None, page_size=DEFAULT_PAGE_SIZE,
+               batch_size=DEFAULT_BATCH_SIZE, after=None, ensure_index=False):
+    """Yield (docs, after) pages in keyset order; pass a yielded `after` back in to resume from it
+
+    Every page is an independent, bounded index range query, so page N costs the same as page 1
+    and only one page is held in memory. That needs an index on the sort keys: pass
+    ensure_index=True to build it, otherwise a missing index means a sort on every page.
+    """
+    keys = SORT_KEYS[sort]
+    if ensure_index:
+        ensure_sort_index(collection, keys)
+    query_projection, extra = _query_projection(projection, keys)
+    while True:
+        query = dict(filter or {})
+        if after is not None:
+            query = {'$and': [query, keyset_filter(keys, after)]} if query else keyset_filter(keys, after)
+        cursor = collection.find(query, query_projection, sort=keys, limit=page_size, batch_size=batch_size)
+        docs = list(cursor)
+        if not docs:
+            return
+        after = tuple(get_path(docs[-1], field) for field, _ in keys)
+        for doc in docs:
+            for field in extra:
+                doc.pop(field, None)
+        yield docs, after
+        if len(docs) < page_size:
+            return
+
+
+def iter_documents(collection, **options):
+    """Every matching document in keyset order, one page in memory at a time"""
+    for docs, _ in iter_pages(collection, **options):
+        yield from docs
+
+
+def ndjson_lines(collection, **options):
+    """One relaxed Extended JSON line per document (ObjectId and dates survive the round trip)"""
+    for doc in iter_documents(collection, **options):
+        yield json_util.dumps(doc, json_options=RELAXED_JSON_OPTIONS) + '\n'
+
+
+def csv_lines(collection, fields=EXPORT_FIELDS, **options):
+    """A header row, then one CSV row per document with nested fields flattened to dotted columns"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    options.setdefault('projection', {field: 1 for field in fields})
+    yield row(fields)
+    for doc in iter_documents(collection, **options):
+        yield row(['' if value is None else value for value in (get_path(doc, field) for field in fields)])
+
+
+EXPORT_FORMATS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def export_people(db, path, format='ndjson', trace_memory=False, **options):
+    """Stream people to an NDJSON or CSV file and report throughput (and peak Python memory if traced)"""
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    lines = 0
+    written = 0
+    try:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for line in EXPORT_FORMATS[format](db.people, **options):
+                f.write(line)
+                lines += 1
+                written += len(line)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    elapsed = time.perf_counter() - start_time
+    docs = lines - 1 if format == 'csv' else lines
+    stats = {'docs': docs, 'bytes': written, 'time': elapsed, 'peak_bytes': peak,
+             'docs_per_sec': docs / elapsed if elapsed else 0.0}
+    memory = f", peak Python memory {peak / 1024 / 1024:.1f} MB" if peak is not None else ""
+    print(f"✓ Exported {docs:,} people to {path} ({format}, {written / 1024 / 1024:.1f} MB) "
+          f"in {elapsed:.2f}s ({stats['docs_per_sec']:,.0f} docs/s{memory})")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream people to NDJSON or CSV in keyset order")
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+    parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='_id')
+    parser.add_argument('--type', help="only export this document type")
+    parser.add_argument('--fields', help="comma-separated fields to export")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--ensure-index', action='store_true', help="build the index matching --sort first")
+    args = parser.parse_args()
+
+    options = {'sort': args.sort, 'page_size': args.page_size, 'batch_size': args.batch_size,
+               'ensure_index': args.ensure_index}
+    if args.type:
+        options['filter'] = {'type': args.type}
+    if args.fields:
+        fields = args.fields.split(',')
+        if args.format == 'csv':
+            options['fields'] = fields
+        else:
+            options['projection'] = {field: 1 for field in fields}
+    export_people(get_manager().db, args.path, format=args.format, trace_memory=args.trace_memory, **options)
@@ -0,0 +1,212 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from bson import json_util
+from pymongo import errors
+
+VERSION_COLLECTION = 'collection_versions'
+# Seconds a QueryCache trusts the version it last read; writes in this process are seen at once
+VERSION_CHECK_INTERVAL = 1.0
+
+# Live caches of this process, told about bump_version() without waiting for their next check
+_caches = weakref.WeakSet()
+
+
+def bump_version(db, collection_name):
+    """Record a write to collection_name so cached results over it are invalidated"""
+    db[VERSION_COLLECTION].update_one({'_id': collection_name}, {'$inc': {'version': 1}}, upsert=True)
+    for cache in list(_caches):
+        cache.forget_version(collection_name)
+
+
+def collection_version(db, collection_name):
+    """Current write version of a collection as recorded by bump_version"""
+    doc = db[VERSION_COLLECTION].find_one({'_id': collection_name})
+    return doc.get('version', 0) if doc else 0
+
+
+def pipeline_key(collection_name, pipeline):
+    """Canonical hash of an aggregation over a collection"""
+    canonical = json.dumps([collection_name, pipeline], sort_keys=True, default=json_util.default)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class QueryCache:
+    """Aggregation result cache with an in-memory LRU tier, an optional disk tier and TTL expiry"""
+
+    def __init__(self, db, max_entries=256, ttl=300, disk_dir=None, version_check_interval=VERSION_CHECK_INTERVAL):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.version_check_interval = version_check_interval
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.watched = {}
+        self.versions = {}
+        self.forgotten = {}
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'hit_time': 0.0, 'miss_time': 0.0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        _caches.add(self)
+
+    def version(self, collection_name):
+        """Write version of a collection, read from the server at most once per version_check_interval
+
+        Local when a change stream is running. Writes from other processes are therefore seen
+        up to version_check_interval seconds late; bump_version() in this process is seen at once.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if collection_name in self.watched:
+                return self.watched[collection_name]
+            cached = self.versions.get(collection_name)
+            if cached is not None and now - cached[1] < self.version_check_interval:
+                return cached[0]
+            forgotten = self.forgotten.get(collection_name, 0)
+        version = collection_version(self.db, collection_name)
+        with self.lock:
+            # A bump_version() during the read may not be in it: leave the next lookup to re-read
+            if self.forgotten.get(collection_name, 0) == forgotten:
+                self.versions[collection_name] = (version, now)
+        return version
+
+    def forget_version(self, collection_name):
+        """Re-read collection_name's version on the next lookup"""
+        with self.lock:
+            self.versions.pop(collection_name, None)
+            self.forgotten[collection_name] = self.forgotten.get(collection_name, 0) + 1
+
+    def watch(self, collection_name):
+        """Invalidate on every change to collection_name via a change stream (replica sets only)"""
+        try:
+            stream = self.db[collection_name].watch()
+        except errors.OperationFailure as e:
+            print(f"⚠ Change streams unavailable ({e}); using the version counter instead")
+            return False
+
+        self.watched[collection_name] = self.version(collection_name)
+
+        def listen():
+            for _ in stream:
+                with self.lock:
+                    self.watched[collection_name] += 1
+
+        threading.Thread(target=listen, daemon=True).start()
+        return True
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.json')
+
+    def _get(self, key, version):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry['version'] == version and entry['expires_at'] > now:
+                    self.memory.move_to_end(key)
+                    return entry['data'], 'memory'
+                del self.memory[key]
+
+        if self.disk_dir:
+            entry = self._read_disk(key)
+            if entry is not None and entry['version'] == version and entry['expires_at'] > now:
+                self._put_memory(key, entry)
+                return entry['data'], 'disk'
+            if entry is not None:
+                # Another worker may have removed it already
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._disk_path(key))
+        return None, None
+
+    def _read_disk(self, key):
+        """Disk entry for key, or None when it is missing, half written or corrupt"""
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json_util.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._disk_path(key))
+            return None
+        if not isinstance(entry, dict) or not {'version', 'expires_at', 'data'} <= entry.keys():
+            return None
+        return entry
+
+    def _put_memory(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _put(self, key, entry):
+        self._put_memory(key, entry)
+        if self.disk_dir:
+            # Per-thread temporary file: concurrent misses on one key must not share it
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json_util.dumps(entry))
+            os.replace(tmp_path, self._disk_path(key))
+
+    def aggregate(self, collection, pipeline, **kwargs):
+        """Cached equivalent of list(collection.aggregate(pipeline)); treat the result as read-only"""
+        start = time.perf_counter()
+        version = self.version(collection.name)
+        key = pipeline_key(collection.name, pipeline)
+
+        data, tier = self._get(key, version)
+        if tier is not None:
+            with self.lock:
+                self.stats['hits'] += 1
+                if tier == 'disk':
+                    self.stats['disk_hits'] += 1
+                self.stats['hit_time'] += time.perf_counter() - start
+            return data
+
+        data = list(collection.aggregate(pipeline, **kwargs))
+        self._put(key, {'version': version, 'expires_at': time.time() + self.ttl, 'data': data})
+        with self.lock:
+            self.stats['misses'] += 1
+            self.stats['miss_time'] += time.perf_counter() - start
+        return data
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.json'):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.disk_dir, name))
+
+    def summary(self):
+        """Hit/miss counts and average latencies in microseconds"""
+        with self.lock:
+            stats = dict(self.stats)
+            entries = len(self.memory)
+        hits, misses = stats['hits'], stats['misses']
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'disk_hits': stats['disk_hits'],
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+            'avg_hit_us': stats['hit_time'] / hits * 1e6 if hits else 0.0,
+            'avg_miss_us': stats['miss_time'] / misses * 1e6 if misses else 0.0,
+            'entries': entries
+        }
+
+    def print_stats(self):
+        stats = self.summary()
+        print(f"Query cache: {stats['hits']:,} hits ({stats['disk_hits']:,} from disk), "
+              f"{stats['misses']:,} misses, hit ratio {stats['hit_ratio']:.1%}")
+        print(f"   avg hit {stats['avg_hit_us']:,.0f}µs, avg miss {stats['avg_miss_us']:,.0f}µs, "
+              f"{stats['entries']} entries in memory")
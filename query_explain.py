@@ -0,0 +1,125 @@
+from analysis_queries import ANALYSIS_QUERIES, PERFORMANCE_PROBES, execute
+from connection_manager import get_manager
+
+INDEX_STAGES = {'IXSCAN', 'COUNT_SCAN', 'DISTINCT_SCAN', 'IDHACK', 'EXPRESS_IXSCAN'}
+
+
+def explain_entry(db, collection_name, entry):
+    """Raw explain("executionStats") output for a registered query or probe"""
+    if 'filter' in entry:
+        command = {'count': collection_name, 'query': entry['filter']}
+    else:
+        command = {'aggregate': collection_name, 'pipeline': entry['pipeline'], 'cursor': {}}
+    if entry.get('hint'):
+        command['hint'] = entry['hint']
+    return db.command({'explain': command, 'verbosity': 'executionStats'})
+
+
+def _find_key(node, key):
+    """First value stored under key anywhere in a nested explain document"""
+    if isinstance(node, dict):
+        if key in node:
+            return node[key]
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan, stages, index_names):
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        if 'indexName' in plan:
+            index_names.add(plan['indexName'])
+        for value in plan.values():
+            _plan_stages(value, stages, index_names)
+    elif isinstance(plan, list):
+        for item in plan:
+            _plan_stages(item, stages, index_names)
+
+
+def summarize_explain(explain):
+    """Winning plan access path and examination counters from an explain document"""
+    query_planner = _find_key(explain, 'queryPlanner') or {}
+    stats = _find_key(explain, 'executionStats') or {}
+    stages = []
+    index_names = set()
+    _plan_stages(query_planner.get('winningPlan', {}), stages, index_names)
+
+    if any(stage in INDEX_STAGES for stage in stages):
+        access = 'IXSCAN' if 'FETCH' in stages else 'COVERED IXSCAN'
+    elif 'COLLSCAN' in stages:
+        access = 'COLLSCAN'
+    else:
+        access = stages[0] if stages else 'UNKNOWN'
+    return {
+        'access': access,
+        'stages': stages,
+        'indexes': sorted(index_names),
+        'keys_examined': stats.get('totalKeysExamined', 0),
+        'docs_examined': stats.get('totalDocsExamined', 0),
+        'scan_returned': stats.get('nReturned', 0),
+        'execution_ms': stats.get('executionTimeMillis', 0)
+    }
+
+
+def index_usage(collection):
+    """Access counters per index from $indexStats (cumulative since restart or creation)"""
+    return {
+        stat['name']: {'ops': stat['accesses']['ops'], 'since': stat['accesses']['since'], 'key': stat['key']}
+        for stat in collection.aggregate([{"$indexStats": {}}])
+    }
+
+
+def explain_workload(db, collection_name='people', workload=None):
+    """Explain every registered query and cross-check the collection's indexes against the plans"""
+    collection = db[collection_name]
+    workload = workload or ANALYSIS_QUERIES + PERFORMANCE_PROBES
+    report = {'queries': {}, 'indexes': {}}
+
+    used = set()
+    for entry in workload:
+        summary = summarize_explain(explain_entry(db, collection_name, entry))
+        result = execute(collection, entry)
+        summary['returned'] = result if isinstance(result, int) else len(result)
+        report['queries'][entry['key']] = summary
+        used.update(summary['indexes'])
+
+    for name, usage in index_usage(collection).items():
+        report['indexes'][name] = dict(usage, used_by_workload=name in used)
+    report['unused_indexes'] = sorted(
+        name for name, usage in report['indexes'].items()
+        if name != '_id_' and not usage['used_by_workload']
+    )
+    return report
+
+
+def print_explain_report(report):
+    print("\n" + "="*60)
+    print("QUERY PLAN REPORT")
+    print("="*60)
+    print(f"{'QUERY':25} {'ACCESS':15} {'KEYS':>8} {'DOCS':>8} {'RETURNED':>9}  INDEXES")
+    for key, summary in report['queries'].items():
+        print(f"{key:25} {summary['access']:15} {summary['keys_examined']:>8,} "
+              f"{summary['docs_examined']:>8,} {summary['returned']:>9,}  {', '.join(summary['indexes']) or '-'}")
+
+    print("\nINDEX USAGE ($indexStats ops since restart):")
+    for name, usage in report['indexes'].items():
+        marker = '✓' if usage['used_by_workload'] or name == '_id_' else '⚠'
+        print(f"   {marker} {name:40} ops={usage['ops']:,}")
+    if report['unused_indexes']:
+        print(f"\n⚠ {len(report['unused_indexes'])} indexes are not used by any analysis query:")
+        for name in report['unused_indexes']:
+            print(f"   - {name}")
+
+
+if __name__ == "__main__":
+    db = get_manager().db
+    print_explain_report(explain_workload(db))
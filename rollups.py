@@ -0,0 +1,219 @@
+from datetime import datetime
+
+from histograms import AGE_BUCKETS, bucket_key
+
+AGE_BUCKET = {
+    "$switch": {
+        "branches": [
+            {"case": {"$lt": ["$age", high]} if high is not None else {"$gte": ["$age", low]}, "then": label}
+            for label, low, high in AGE_BUCKETS
+        ],
+        "default": None
+    }
+}
+
+# Pre-aggregated cubes over people; every cube keeps type so influencer-only questions can filter on it
+CUBES = {
+    'type_sex': {
+        'collection': 'rollup_type_sex',
+        'dimensions': {"type": "$type", "sex": "$sex"}
+    },
+    'type_mbti': {
+        'collection': 'rollup_type_mbti',
+        'dimensions': {"type": "$type", "mbti": "$mbti_personality"}
+    },
+    'country_age_bucket': {
+        'collection': 'rollup_country_age_bucket',
+        'dimensions': {"type": "$type", "country": "$location.country", "age_bucket": AGE_BUCKET}
+    },
+    'education_lifestyle': {
+        'collection': 'rollup_education_lifestyle',
+        'dimensions': {"type": "$type", "education": "$profile.education_level",
+                       "lifestyle": "$profile.lifestyle"}
+    }
+}
+
+MEASURES = {
+    "count": {"$sum": 1},
+    "age_sum": {"$sum": "$age"},
+    "age_count": {"$sum": {"$cond": [{"$isNumber": "$age"}, 1, 0]}}
+}
+
+META_COLLECTION = 'rollup_meta'
+
+
+def _cube_group(cube):
+    return {"$group": dict({"_id": cube['dimensions']}, **MEASURES)}
+
+
+class RollupManager:
+    """Maintains the rollup cubes over people and answers dashboard queries from them"""
+
+    def __init__(self, db, source='people'):
+        self.db = db
+        self.source = db[source]
+        self.meta = db[META_COLLECTION]
+
+    def _watermark(self):
+        latest = self.source.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        return latest['updated_at'] if latest else None
+
+    def _save_meta(self, name, watermark, mode):
+        self.meta.replace_one({'_id': name}, {
+            '_id': name,
+            'watermark': watermark,
+            'base_count': self.source.count_documents(
+                {'updated_at': {'$lte': watermark}} if watermark else {}),
+            'refreshed_at': datetime.now(),
+            'mode': mode
+        }, upsert=True)
+
+    def full_refresh(self, name):
+        """Recompute one cube from scratch"""
+        cube = CUBES[name]
+        watermark = self._watermark()
+        pipeline = []
+        if watermark is not None:
+            # Documents written while we aggregate are left for the next incremental refresh
+            pipeline.append({"$match": {"updated_at": {"$lte": watermark}}})
+        pipeline += [_cube_group(cube), {"$out": cube['collection']}]
+        self.source.aggregate(pipeline, allowDiskUse=True)
+        self._save_meta(name, watermark, 'full')
+        return 'full'
+
+    def incremental_refresh(self, name):
+        """Fold documents written since the last refresh into one cube, falling back to a full refresh"""
+        cube = CUBES[name]
+        meta = self.meta.find_one({'_id': name})
+        if not meta or meta['watermark'] is None:
+            return self.full_refresh(name)
+
+        since = {'updated_at': {'$gt': meta['watermark']}}
+        # Updates and deletes of already-counted documents cannot be folded in as deltas
+        if self.source.find_one(dict(since, created_at={'$lte': meta['watermark']}), {'_id': 1}):
+            return self.full_refresh(name)
+        counted = self.source.count_documents({'updated_at': {'$lte': meta['watermark']}})
+        if counted != meta['base_count']:
+            return self.full_refresh(name)
+
+        watermark = self._watermark()
+        if watermark == meta['watermark']:
+            return 'fresh'
+        self.source.aggregate([
+            {"$match": {'updated_at': {'$gt': meta['watermark'], '$lte': watermark}}},
+            _cube_group(cube),
+            {"$merge": {
+                "into": cube['collection'],
+                "on": "_id",
+                "whenMatched": [{"$set": {
+                    measure: {"$add": ["$" + measure, "$$new." + measure]} for measure in MEASURES
+                }}],
+                "whenNotMatched": "insert"
+            }}
+        ], allowDiskUse=True)
+        self._save_meta(name, watermark, 'incremental')
+        return 'incremental'
+
+    def refresh(self, full=False):
+        """Refresh every cube; returns the refresh mode used per cube"""
+        modes = {}
+        for name in CUBES:
+            modes[name] = self.full_refresh(name) if full else self.incremental_refresh(name)
+            print(f"✓ Rollup {name}: {modes[name]}")
+        return modes
+
+    def staleness(self, name):
+        """Compare one cube's watermark and base count with the source collection"""
+        meta = self.meta.find_one({'_id': name})
+        total = self.source.count_documents({})
+        if not meta:
+            return {'stale': True, 'pending_documents': total, 'refreshed_at': None}
+        pending = total if meta['watermark'] is None else \
+            self.source.count_documents({'updated_at': {'$gt': meta['watermark']}})
+        drift = total - pending - meta['base_count']
+        return {
+            'stale': pending > 0 or drift != 0,
+            'pending_documents': pending,
+            'base_count_drift': drift,
+            'refreshed_at': meta['refreshed_at']
+        }
+
+    def is_stale(self):
+        return any(self.staleness(name)['stale'] for name in CUBES)
+
+    def _rollup(self, name):
+        return self.db[CUBES[name]['collection']]
+
+    def gender_distribution(self):
+        return list(self._rollup('type_sex').aggregate([
+            {"$project": {"_id": {"type": "$_id.type", "sex": "$_id.sex"}, "count": 1}},
+            {"$sort": {"_id.type": 1, "_id.sex": 1}}
+        ]))
+
+    def mbti_distribution(self):
+        return list(self._rollup('type_mbti').aggregate([
+            {"$group": {
+                "_id": "$_id.mbti",
+                "total_count": {"$sum": "$count"},
+                "influencer_count": {"$sum": {"$cond": [{"$eq": ["$_id.type", "influencer"]}, "$count", 0]}},
+                "noble_count": {"$sum": {"$cond": [{"$eq": ["$_id.type", "noble"]}, "$count", 0]}}
+            }},
+            {"$sort": {"total_count": -1}},
+            {"$limit": 16}
+        ]))
+
+    def country_distribution(self):
+        return list(self._rollup('country_age_bucket').aggregate([
+            {"$match": {"_id.type": "influencer"}},
+            {"$group": {"_id": "$_id.country", "count": {"$sum": "$count"}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 20}
+        ]))
+
+    def geo_age_demographics(self):
+        rows = list(self._rollup('country_age_bucket').aggregate([
+            {"$match": {"_id.type": "influencer"}},
+            {"$group": {
+                "_id": "$_id.country",
+                "age_sum": {"$sum": "$age_sum"},
+                "age_count": {"$sum": "$age_count"},
+                "buckets": {"$push": {"k": "$_id.age_bucket", "v": "$count"}},
+                "total_count": {"$sum": "$count"}
+            }},
+            {"$match": {"total_count": {"$gte": 100}}},
+            {"$sort": {"total_count": -1}},
+            {"$limit": 15}
+        ]))
+        # Same flat shape as the registered pipeline, so the query's finalize nests the counters
+        data = []
+        for row in rows:
+            counts = {bucket['k']: bucket['v'] for bucket in row['buckets']}
+            doc = {'_id': row['_id'], 'avg_age': row['age_sum'] / row['age_count'] if row['age_count'] else None}
+            for label, _, _ in AGE_BUCKETS:
+                doc[bucket_key('age_ranges', label)] = counts.get(label, 0)
+            doc['total_count'] = row['total_count']
+            data.append(doc)
+        return data
+
+    def education_lifestyle(self):
+        return list(self._rollup('education_lifestyle').aggregate([
+            {"$match": {"_id.type": "influencer"}},
+            {"$project": {
+                "_id": {"education": "$_id.education", "lifestyle": "$_id.lifestyle"},
+                "count": 1,
+                "avg_age": {"$cond": [{"$gt": ["$age_count", 0]},
+                                      {"$divide": ["$age_sum", "$age_count"]}, None]}
+            }},
+            {"$sort": {"count": -1}},
+            {"$limit": 25}
+        ]))
+
+
+# Analysis query keys that can be answered from the rollups
+ROLLUP_QUERIES = {
+    'gender_distribution': RollupManager.gender_distribution,
+    'mbti_distribution': RollupManager.mbti_distribution,
+    'country_distribution': RollupManager.country_distribution,
+    'geo_age_demographics': RollupManager.geo_age_demographics,
+    'education_lifestyle': RollupManager.education_lifestyle,
+}
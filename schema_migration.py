@@ -0,0 +1,87 @@
+import time
+
+
+def _raw(field):
+    """Raw field reference that yields null when missing, like dict.get()"""
+    return {"$ifNull": ["$" + field, None]}
+
+
+def influencer_unified_pipeline(target='people'):
+    """Reshape influencers into the unified schema and merge them into target"""
+    return [
+        {"$replaceWith": {
+            "name": _raw('Name'),
+            "age": _raw('Age'),
+            "sex": _raw('Sex'),
+            "mbti_personality": _raw('MBTI Personality'),
+            "backstory": _raw('Backstory'),
+            "type": "influencer",
+            "location": {
+                "country": _raw('Country of Origin'),
+                "state_province": _raw('State or Province'),
+                "realm": None
+            },
+            "profile": {
+                "education_level": _raw('Education Level'),
+                "lifestyle": _raw('Lifestyle'),
+                "title": None,
+                "activity": None
+            },
+            "created_at": "$$NOW",
+            "updated_at": "$$NOW"
+        }},
+        {"$merge": {"into": target, "whenMatched": "fail", "whenNotMatched": "insert"}}
+    ]
+
+
+def noble_unified_pipeline(target='people'):
+    """Reshape nobles into the unified schema and merge them into target"""
+    return [
+        {"$replaceWith": {
+            "name": _raw('Name'),
+            "age": _raw('Age'),
+            "sex": _raw('Sex'),
+            "mbti_personality": _raw('MBTI Personality'),
+            "backstory": _raw('Backstory'),
+            "type": "noble",
+            "location": {
+                "country": None,
+                "state_province": None,
+                "realm": _raw('Realm')
+            },
+            "profile": {
+                "education_level": None,
+                "lifestyle": None,
+                "title": _raw('Title'),
+                "activity": _raw('Activity')
+            },
+            "created_at": "$$NOW",
+            "updated_at": "$$NOW"
+        }},
+        {"$merge": {"into": target, "whenMatched": "fail", "whenNotMatched": "insert"}}
+    ]
+
+
+def migrate_server_side(db, target='people'):
+    """Build the unified collection entirely on the server (MongoDB 4.2+)"""
+    db[target].drop()
+    # $merge leaves _id unset so the server generates fresh ids, like insert_many did
+    db.influencers.aggregate(influencer_unified_pipeline(target))
+    db.nobles.aggregate(noble_unified_pipeline(target))
+    return db[target].count_documents({})
+
+
+def network_counters(db):
+    """Server-wide network byte counters from serverStatus"""
+    network = db.client.admin.command('serverStatus')['network']
+    return network['bytesIn'], network['bytesOut']
+
+
+def measure(db, fn):
+    """Run fn and return (wall seconds, bytes sent to server, bytes received from server)"""
+    bytes_in, bytes_out = network_counters(db)
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    after_in, after_out = network_counters(db)
+    return elapsed, after_in - bytes_in, after_out - bytes_out
@@ -0,0 +1,81 @@
+import time
+
+from bson import ObjectId
+
+from ingest_common import DATA_FILES, BATCH_SIZE, parse_raw_line, to_unified_doc
+
+
+class StreamingUnifiedLoader:
+    """Single-pass loader that maps JSONL lines straight into the unified people collection"""
+
+    def __init__(self, db, write_legacy=False, batch_size=BATCH_SIZE, data_files=None, target='people',
+                 text_target=None):
+        self.db = db
+        self.write_legacy = write_legacy
+        self.text_target = text_target
+        self.batch_size = batch_size
+        self.data_files = data_files or DATA_FILES
+        self.target = target
+
+    def _flush(self, collection_name, unified_batch, raw_batch):
+        if self.text_target:
+            # Vertical split: backstory goes to the text collection under the same _id
+            text_batch = []
+            for doc in unified_batch:
+                doc['_id'] = ObjectId()
+                text_batch.append({'_id': doc['_id'], 'backstory': doc.pop('backstory')})
+            self.db[self.text_target].insert_many(text_batch, ordered=False)
+        self.db[self.target].insert_many(unified_batch, ordered=False)
+        if self.write_legacy:
+            self.db[collection_name].insert_many(raw_batch, ordered=False)
+
+    def load_file(self, collection_name, path, doc_type):
+        """Stream one JSONL file into people (and optionally its legacy collection)"""
+        count = 0
+        unified_batch = []
+        raw_batch = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                raw = parse_raw_line(line, doc_type)
+                if raw is None:
+                    continue
+                unified_batch.append(to_unified_doc(raw, doc_type))
+                if self.write_legacy:
+                    raw_batch.append(raw)
+                count += 1
+
+                if len(unified_batch) >= self.batch_size:
+                    self._flush(collection_name, unified_batch, raw_batch)
+                    unified_batch = []
+                    raw_batch = []
+                    if count % 10000 == 0:
+                        print(f"  Streamed {count:,} {collection_name}...")
+
+        if unified_batch:
+            self._flush(collection_name, unified_batch, raw_batch)
+        return count
+
+    def run(self):
+        """Load every source file and return per-file counts and the total time"""
+        print("\n=== STREAMING LOAD INTO UNIFIED SCHEMA ===")
+        if not self.write_legacy:
+            print("Legacy influencers/nobles collections are skipped")
+
+        self.db[self.target].drop()
+        if self.text_target:
+            self.db[self.text_target].drop()
+        if self.write_legacy:
+            for collection_name in self.data_files:
+                self.db[collection_name].drop()
+
+        start_time = time.perf_counter()
+        counts = {}
+        for collection_name, (path, doc_type) in self.data_files.items():
+            print(f"Streaming {collection_name} data...")
+            counts[collection_name] = self.load_file(collection_name, path, doc_type)
+            print(f"✓ Streamed {counts[collection_name]:,} {collection_name}")
+        elapsed = time.perf_counter() - start_time
+
+        total = sum(counts.values())
+        print(f"✓ Created unified collection with {total:,} documents in {elapsed:.2f}s")
+        return {'counts': counts, 'time': elapsed}
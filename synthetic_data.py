@@ -0,0 +1,442 @@
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from collections import Counter, defaultdict
+
+from connection_manager import DEFAULT_DATABASE
+from ingest_common import DATA_FILES
+
+# Size of the original datasets when their files are not at hand; scale=10 writes ten times as many records
+BASE_COUNTS = {'influencers': 32890, 'nobles': 25090}
+SYNTHETIC_DIR = 'synthetic'
+# The scaling benchmark reloads and drops everything, so it only ever runs in this database
+SCRATCH_DATABASE = 'sbp_scaling_scratch'
+# The original files average ~1.5KB per record, almost all of it backstory
+BACKSTORY_MEDIAN_CHARS = 1200
+BACKSTORY_SIGMA = 0.35
+PROGRESS_EVERY = 100000
+
+# Population frequencies of the 16 MBTI types
+MBTI_WEIGHTS = {
+    'ISFJ': 13.8, 'ESFJ': 12.3, 'ISTJ': 11.6, 'ISFP': 8.8, 'ESTJ': 8.7, 'ESFP': 8.5, 'ENFP': 8.1, 'ISTP': 5.4,
+    'INFP': 4.4, 'ESTP': 4.3, 'INTP': 3.3, 'ENTP': 3.2, 'ENFJ': 2.5, 'INTJ': 2.1, 'ENTJ': 1.8, 'INFJ': 1.5,
+}
+# Heavily skewed towards a few large creator markets, with a long tail
+COUNTRY_WEIGHTS = {
+    'United States': 24, 'India': 9, 'Brazil': 7, 'United Kingdom': 6, 'Indonesia': 5, 'Mexico': 4,
+    'Canada': 4, 'Germany': 3.5, 'France': 3.5, 'Japan': 3, 'Philippines': 3, 'Spain': 2.5, 'Italy': 2.5,
+    'South Korea': 2.5, 'Australia': 2.5, 'Nigeria': 2, 'Turkey': 2, 'Argentina': 1.5, 'Colombia': 1.5,
+    'South Africa': 1.5, 'Netherlands': 1, 'Sweden': 1, 'Poland': 1, 'Egypt': 1, 'Thailand': 1,
+    'Vietnam': 1, 'Serbia': 0.5, 'Ireland': 0.5, 'New Zealand': 0.5, 'Kenya': 0.5,
+}
+STATES = {
+    'United States': ['California', 'New York', 'Texas', 'Florida', 'Illinois', 'Washington', 'Georgia'],
+    'India': ['Maharashtra', 'Karnataka', 'Delhi', 'Tamil Nadu', 'West Bengal'],
+    'Brazil': ['São Paulo', 'Rio de Janeiro', 'Minas Gerais', 'Bahia'],
+    'United Kingdom': ['England', 'Scotland', 'Wales', 'Northern Ireland'],
+    'Canada': ['Ontario', 'Quebec', 'British Columbia', 'Alberta'],
+    'Germany': ['Bavaria', 'Berlin', 'Hamburg', 'North Rhine-Westphalia'],
+    'Australia': ['New South Wales', 'Victoria', 'Queensland'],
+    'Mexico': ['Mexico City', 'Jalisco', 'Nuevo León'],
+}
+EDUCATION_WEIGHTS = {
+    'High School': 22, 'Some College': 15, "Associate's Degree": 10, "Bachelor's Degree": 33,
+    "Master's Degree": 15, 'Doctorate': 5,
+}
+LIFESTYLE_WEIGHTS = {
+    'Wellness & Fitness': 16, 'Fashion & Beauty': 15, 'Travel & Adventure': 13, 'Food & Cooking': 11,
+    'Tech & Gaming': 11, 'Family & Parenting': 9, 'Luxury': 8, 'Minimalist': 6, 'Eco-Conscious': 6,
+    'Arts & Music': 5,
+}
+REALM_WEIGHTS = {
+    'Kingdom of Eldoria': 14, 'Duchy of Valemont': 11, 'Kingdom of Aldercrest': 10, 'Principality of Brightwater': 9,
+    'Empire of Sunhold': 9, 'Kingdom of Ravenmoor': 8, 'Grand Duchy of Stormreach': 8, 'March of Thornwall': 7,
+    'Kingdom of Westerholt': 7, 'Free County of Ashford': 6, 'Isles of Merrowind': 6, 'Highlands of Kaldmere': 5,
+}
+TITLE_WEIGHTS = {
+    'Baron': 26, 'Baronet': 14, 'Viscount': 16, 'Earl': 16, 'Count': 10, 'Marquess': 9,
+    'Duke': 6, 'Prince': 2, 'Archduke': 1,
+}
+FEMALE_TITLES = {'Baron': 'Baroness', 'Baronet': 'Baronetess', 'Viscount': 'Viscountess', 'Earl': 'Countess',
+                 'Count': 'Countess', 'Marquess': 'Marchioness', 'Duke': 'Duchess', 'Prince': 'Princess',
+                 'Archduke': 'Archduchess'}
+ACTIVITY_WEIGHTS = {
+    'Diplomacy': 14, 'Hunting': 13, 'War': 11, 'Estate Management': 11, 'Trade': 10, 'Court Intrigue': 9,
+    'Patronage of the Arts': 8, 'Scholarship': 8, 'Falconry': 6, 'Horsemanship': 6, 'Religious Devotion': 4,
+}
+FIRST_NAMES = {
+    'Male': ['James', 'Liam', 'Noah', 'Lucas', 'Mateo', 'Arjun', 'Kenji', 'Omar', 'Ethan', 'Gabriel', 'Leo',
+             'Daniel', 'Marco', 'Ivan', 'Samuel', 'Hugo', 'Felix', 'Adrian', 'Rafael', 'Victor'],
+    'Female': ['Olivia', 'Emma', 'Sophia', 'Isabella', 'Mia', 'Priya', 'Yuki', 'Amara', 'Chloe', 'Lucia',
+               'Sarah', 'Elena', 'Hannah', 'Zara', 'Ana', 'Nina', 'Maya', 'Clara', 'Leila', 'Grace'],
+}
+LAST_NAMES = ['Johnson', 'Smith', 'Garcia', 'Silva', 'Patel', 'Tanaka', 'Kim', 'Müller', 'Rossi', 'Dubois',
+              'Nguyen', 'Okafor', 'Kowalski', 'Hernández', 'Andersson', 'Petrović', 'Brown', 'Wilson',
+              'Santos', 'Cohen', 'Murphy', 'Reyes', 'Novak', 'Ahmed', 'Lopez']
+HOUSE_NAMES = ['Blackwood', 'Ashcombe', 'Vane', 'Harrowgate', 'Montclair', 'Ravensworth', 'Thorne', 'Castellan',
+               'Wyndham', 'Everleigh', 'Draycott', 'Fairhaven', 'Greymantle', 'Lockridge', 'Stormont']
+
+INFLUENCER_SENTENCES = [
+    "{first} grew up in {place}, where {pronoun} first picked up a camera as a teenager.",
+    "After finishing a {education}, {first} spent several years in a corporate job before going full time online.",
+    "{pronoun_cap} built an audience around {lifestyle_lower} content, posting almost every day.",
+    "Followers know {object} for candid stories about setbacks as much as for polished highlights.",
+    "A viral series about everyday routines in {place} brought the first brand partnerships.",
+    "{first} insists on disclosing every sponsorship and turns down products {pronoun} would not use.",
+    "Friends describe {object} as an {mbti} through and through: {trait}.",
+    "These days {pronoun} splits time between filming, answering messages and mentoring new creators.",
+    "{first} has spoken openly about burnout and now takes one offline week every season.",
+    "A recent project combined {lifestyle_lower} with fundraising for a local community cause.",
+    "Critics say the feed is too curated, but engagement keeps growing year after year.",
+    "Long term, {first} wants to launch a small business that outlives the algorithm.",
+]
+NOBLE_SENTENCES = [
+    "{name} was born into House {house}, a family that has served {realm} for generations.",
+    "As a young heir, {pronoun} was tutored in letters, arms and the intricate etiquette of court.",
+    "Elevated to the rank of {title}, {pronoun} took charge of lands that had long been neglected.",
+    "{pronoun_cap} is best known at court for {activity_lower}, a pursuit {pronoun} treats as a duty.",
+    "Rivals whisper that the {mbti} temperament of {house} is {trait}.",
+    "During the border disputes {pronoun} negotiated a truce that many thought impossible.",
+    "The household keeps a large library, open to scholars who petition {object} in person.",
+    "Tenants on the estate speak of fair rents and a granary opened in every lean winter.",
+    "{name} once spent a full season travelling the roads of {realm} in plain clothes.",
+    "Marriage alliances, feuds and old debts still shape every decision of House {house}.",
+    "Some at court consider {object} too cautious; others credit that caution for a long peace.",
+    "Portraits in the great hall show {object} with the sigil of House {house} on a field of blue.",
+]
+MBTI_TRAITS = {
+    'I': 'quiet, deliberate and slow to trust', 'E': 'outgoing, restless and at home in a crowd',
+}
+
+
+# Fields whose value frequencies are fitted from the source files, per dataset
+FITTED_FIELDS = {
+    'influencers': ('Sex', 'Age', 'Country of Origin', 'Education Level', 'MBTI Personality', 'Lifestyle'),
+    'nobles': ('Sex', 'Age', 'Realm', 'MBTI Personality', 'Activity'),
+}
+
+
+def _normal_ages(mean, deviation, low, high):
+    """{age: weight} of a normal distribution truncated to low..high"""
+    return {age: math.exp(-((age - mean) / deviation) ** 2 / 2) for age in range(low, high + 1)}
+
+
+def default_profile():
+    """Built-in distributions, used for any dataset or field the source files do not cover"""
+    either_sex = {'Male': 1, 'Female': 1}
+    return {
+        'influencers': {
+            'records': BASE_COUNTS['influencers'],
+            'fields': {
+                'Sex': either_sex,
+                # Creators skew young: most are in their twenties and thirties
+                'Age': _normal_ages(31, 9, 18, 65),
+                'Country of Origin': COUNTRY_WEIGHTS,
+                'Education Level': EDUCATION_WEIGHTS,
+                'MBTI Personality': MBTI_WEIGHTS,
+                'Lifestyle': LIFESTYLE_WEIGHTS,
+            },
+            # '' stands for no state or province
+            'states': {country: {state: 1 for state in states} for country, states in STATES.items()},
+        },
+        'nobles': {
+            'records': BASE_COUNTS['nobles'],
+            'fields': {
+                'Sex': either_sex,
+                'Age': _normal_ages(47, 14, 18, 80),
+                'Realm': REALM_WEIGHTS,
+                'MBTI Personality': MBTI_WEIGHTS,
+                'Activity': ACTIVITY_WEIGHTS,
+            },
+            'titles': {'Male': TITLE_WEIGHTS,
+                       'Female': {FEMALE_TITLES[title]: weight for title, weight in TITLE_WEIGHTS.items()}},
+        },
+    }
+
+
+def _fittable(field, value):
+    if field == 'Age':
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, str) and value != ''
+
+
+def fit_dataset(path, collection_name):
+    """Record count and value frequencies of one source JSONL file, in the default_profile() layout"""
+    fields = {field: Counter() for field in FITTED_FIELDS[collection_name]}
+    nested = defaultdict(Counter)
+    records = 0
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(raw, dict):
+                continue
+            records += 1
+            for field, counts in fields.items():
+                if _fittable(field, raw.get(field)):
+                    counts[raw[field]] += 1
+            if collection_name == 'influencers' and _fittable('Country of Origin', raw.get('Country of Origin')):
+                state = raw.get('State or Province')
+                nested[raw['Country of Origin']][state if _fittable('State or Province', state) else ''] += 1
+            elif collection_name == 'nobles' and _fittable('Title', raw.get('Title')):
+                nested[raw.get('Sex')][raw['Title']] += 1
+    dataset = {'records': records, 'fields': {field: dict(counts) for field, counts in fields.items() if counts}}
+    if nested:
+        dataset['states' if collection_name == 'influencers' else 'titles'] = {
+            key: dict(counts) for key, counts in nested.items() if isinstance(key, str)
+        }
+    return dataset
+
+
+def fit_profile(data_files=None):
+    """Distributions fitted from the source JSONL files, falling back to default_profile() per field
+
+    A missing file, or a field it never fills, keeps the built-in distribution.
+    """
+    data_files = DATA_FILES if data_files is None else data_files
+    profile = default_profile()
+    for collection_name, (path, _doc_type) in data_files.items():
+        if not os.path.exists(path):
+            print(f"⚠ {path} not found; using built-in {collection_name} distributions")
+            continue
+        fitted = fit_dataset(path, collection_name)
+        if not fitted['records']:
+            print(f"⚠ {path} has no records; using built-in {collection_name} distributions")
+            continue
+        dataset = profile[collection_name]
+        dataset['records'] = fitted['records']
+        dataset['fields'].update(fitted['fields'])
+        for key in ('states', 'titles'):
+            if fitted.get(key):
+                dataset[key] = fitted[key]
+        print(f"✓ Fitted {collection_name} distributions from {fitted['records']:,} records in {path}")
+    return profile
+
+
+def profile_fingerprint(profile):
+    """Stable hash of a profile, stored next to the datasets generated from it"""
+    canonical = json.dumps(profile, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def cumulative(weights):
+    """(values, cumulative weights) of a {value: weight} table, computed once per table for weighted_choice"""
+    return list(weights), list(itertools.accumulate(weights.values()))
+
+
+def sampling_tables(dataset):
+    """Cumulative tables for every distribution of one profile dataset"""
+    tables = {field: cumulative(weights) for field, weights in dataset['fields'].items()}
+    for key in ('states', 'titles'):
+        if key in dataset:
+            tables[key] = {group: cumulative(weights) for group, weights in dataset[key].items()}
+    return tables
+
+
+def weighted_choice(rng, table):
+    """One value of a cumulative() table, drawn in proportion to its weight"""
+    values, cum_weights = table
+    return rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def backstory(rng, sentences, fields):
+    """Sentences in random order until a log-normally distributed target length is reached"""
+    target = int(rng.lognormvariate(0, BACKSTORY_SIGMA) * BACKSTORY_MEDIAN_CHARS)
+    parts = []
+    length = 0
+    while length < target:
+        sentence = rng.choice(sentences).format(**fields)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(parts)
+
+
+def _pronouns(sex):
+    if sex == 'Female':
+        return {'pronoun': 'she', 'pronoun_cap': 'She', 'object': 'her'}
+    return {'pronoun': 'he', 'pronoun_cap': 'He', 'object': 'him'}
+
+
+def influencer_record(rng, tables):
+    sex = weighted_choice(rng, tables['Sex'])
+    first = rng.choice(FIRST_NAMES.get(sex, FIRST_NAMES['Male']))
+    country = weighted_choice(rng, tables['Country of Origin'])
+    state = (weighted_choice(rng, tables['states'][country]) or None) if country in tables['states'] else None
+    education = weighted_choice(rng, tables['Education Level'])
+    mbti = weighted_choice(rng, tables['MBTI Personality'])
+    lifestyle = weighted_choice(rng, tables['Lifestyle'])
+    fields = dict(_pronouns(sex), first=first, place=state or country, education=education,
+                  lifestyle_lower=lifestyle.lower(), mbti=mbti, trait=MBTI_TRAITS.get(mbti[:1], MBTI_TRAITS['I']))
+    return {
+        'Name': f"{first} {rng.choice(LAST_NAMES)}",
+        'Age': weighted_choice(rng, tables['Age']),
+        'Sex': sex,
+        'Country of Origin': country,
+        'State or Province': state,
+        'Education Level': education,
+        'MBTI Personality': mbti,
+        'Lifestyle': lifestyle,
+        'Backstory': backstory(rng, INFLUENCER_SENTENCES, fields),
+    }
+
+
+def noble_record(rng, tables):
+    sex = weighted_choice(rng, tables['Sex'])
+    house = rng.choice(HOUSE_NAMES)
+    titles = tables['titles']
+    title = weighted_choice(rng, titles.get(sex) or titles[next(iter(titles))])
+    name = f"{'Lady' if sex == 'Female' else 'Lord'} {rng.choice(FIRST_NAMES.get(sex, FIRST_NAMES['Male']))} {house}"
+    realm = weighted_choice(rng, tables['Realm'])
+    mbti = weighted_choice(rng, tables['MBTI Personality'])
+    activity = weighted_choice(rng, tables['Activity'])
+    fields = dict(_pronouns(sex), name=name, house=house, realm=realm, title=title,
+                  activity_lower=activity.lower(), mbti=mbti, trait=MBTI_TRAITS.get(mbti[:1], MBTI_TRAITS['I']))
+    return {
+        'Name': name,
+        'Age': weighted_choice(rng, tables['Age']),
+        'Sex': sex,
+        'Realm': realm,
+        'Title': title,
+        'MBTI Personality': mbti,
+        'Activity': activity,
+        'Backstory': backstory(rng, NOBLE_SENTENCES, fields),
+    }
+
+
+RECORD_BUILDERS = {'influencers': influencer_record, 'nobles': noble_record}
+
+
+def iter_records(collection_name, count, seed=0, profile=None):
+    """count raw records of one dataset; the same (collection_name, seed, profile) always yields the same records"""
+    rng = random.Random(f"{seed}:{collection_name}")
+    build = RECORD_BUILDERS[collection_name]
+    tables = sampling_tables((profile or default_profile())[collection_name])
+    for _ in range(count):
+        yield build(rng, tables)
+
+
+def write_dataset(path, collection_name, count, seed=0, profile=None):
+    """Stream count records to a JSONL file one line at a time (memory stays flat at any size)"""
+    start_time = time.perf_counter()
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for index, record in enumerate(iter_records(collection_name, count, seed, profile), start=1):
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            f.write(line)
+            written += len(line.encode('utf-8'))
+            if index % PROGRESS_EVERY == 0:
+                print(f"  Generated {index:,} {collection_name}...")
+    elapsed = time.perf_counter() - start_time
+    print(f"✓ Wrote {count:,} {collection_name} to {path} ({written / 1024 / 1024:.1f} MB, "
+          f"{count / elapsed if elapsed else 0:,.0f} records/s)")
+    return written
+
+
+def dataset_counts(profile, scale):
+    """Records per dataset at scale x the profiled size"""
+    return {collection_name: round(dataset['records'] * scale) for collection_name, dataset in profile.items()}
+
+
+def generate_datasets(scale=1, seed=0, directory=SYNTHETIC_DIR, overwrite=False, profile=None):
+    """Write influencer_data.jsonl / noble_data.jsonl at scale x the original size; returns a DATA_FILES mapping
+
+    profile defaults to fit_profile() over the source files. Files generated from a different
+    profile are rewritten.
+    """
+    profile = profile or fit_profile()
+    fingerprint = profile_fingerprint(profile)
+    target = os.path.join(directory, f"x{scale:g}-seed{seed}")
+    os.makedirs(target, exist_ok=True)
+    fingerprint_path = os.path.join(target, 'profile.sha256')
+    if os.path.exists(fingerprint_path):
+        with open(fingerprint_path, encoding='utf-8') as f:
+            if f.read().strip() != fingerprint:
+                print(f"⚠ Source distributions changed since {target} was generated; regenerating")
+                overwrite = True
+    else:
+        overwrite = True
+    counts = dataset_counts(profile, scale)
+    data_files = {}
+    for collection_name, (file_name, doc_type) in DATA_FILES.items():
+        path = os.path.join(target, file_name)
+        if overwrite or not os.path.exists(path):
+            write_dataset(path, collection_name, counts[collection_name], seed, profile)
+        data_files[collection_name] = (path, doc_type)
+    with open(fingerprint_path, 'w', encoding='utf-8') as f:
+        f.write(fingerprint + '\n')
+    return data_files
+
+
+def benchmark_data_scaling(project, scales=(1, 10), seed=0):
+    """Load, migrate, index and query synthetic data at each scale, recording time against record count
+
+    project must be connected to a scratch database, which is dropped afterwards.
+    """
+    if project.db.name == DEFAULT_DATABASE:
+        raise ValueError(f"Refusing to run the data scaling benchmark against {DEFAULT_DATABASE}")
+    try:
+        report = _run_scales(project, scales, seed)
+    finally:
+        project.client.drop_database(project.db.name)
+        print(f"✓ Dropped scratch database {project.db.name}")
+    print_scaling_report(report)
+    return report
+
+
+def _run_scales(project, scales, seed):
+    # Fitted once from the source files, before the scratch database is touched
+    profile = fit_profile()
+    report = []
+    for scale in scales:
+        data_files = generate_datasets(scale, seed, profile=profile)
+        records = sum(dataset_counts(profile, scale).values())
+        stages = {}
+        start_time = time.perf_counter()
+        project.load_initial_data(data_files=data_files)
+        stages['ingest'] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        project.create_unified_schema()
+        stages['unify'] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        project.create_indexes(strategy='manual')
+        stages['index'] = time.perf_counter() - start_time
+        results = project.run_analysis_queries()
+        stages['queries'] = sum(result['time'] for result in results.values())
+        report.append({'scale': scale, 'records': records, 'stages': stages,
+                       'query_times': {key: result['time'] for key, result in results.items()}})
+    return report
+
+
+def print_scaling_report(report):
+    print("\n" + "="*60)
+    print("DATA SCALING (synthetic datasets)")
+    print("="*60)
+    print(f"{'SCALE':>6} {'RECORDS':>11} {'INGEST':>9} {'UNIFY':>9} {'INDEX':>9} {'QUERIES':>9} {'µs/REC':>8}")
+    for row in report:
+        stages = row['stages']
+        per_record = sum(stages.values()) / row['records'] * 1e6 if row['records'] else 0.0
+        print(f"{row['scale']:>5g}x {row['records']:>11,} {stages['ingest']:>8.2f}s {stages['unify']:>8.2f}s "
+              f"{stages['index']:>8.2f}s {stages['queries']:>8.2f}s {per_record:>8.1f}")
+    if len(report) > 1:
+        print("\nPER-QUERY TIME BY SCALE:")
+        for key in report[0]['query_times']:
+            times = '  '.join(f"{row['query_times'][key]:>8.3f}s" for row in report)
+            print(f"   {key:25} {times}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic influencer/noble datasets")
+    parser.add_argument('--scale', type=float, default=10, help="multiple of the original record counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--directory', default=SYNTHETIC_DIR)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+
+    generate_datasets(args.scale, args.seed, args.directory, args.overwrite)
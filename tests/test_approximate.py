@@ -0,0 +1,62 @@
+import pytest
+
+from analysis_queries import ANALYSIS_QUERIES, finalize
+from approximate import HIDDEN, add_intervals, weighted_pipeline
+
+mongomock = pytest.importorskip('mongomock')
+
+GROUP = {'$group': {'_id': '$type', 'total': {'$sum': 1}, 'average_age': {'$avg': '$age'}}}
+
+
+def test_only_the_first_group_is_weighted():
+    regroup = {'$group': {'_id': None, 'types': {'$sum': 1}}}
+    rewritten = weighted_pipeline([{'$match': {'age': {'$gte': 18}}}, GROUP, {'$sort': {'total': -1}}, regroup])
+    assert rewritten[0] == {'$match': {'age': {'$gte': 18}}}
+    assert rewritten[1]['$group']['total'] == {'$sum': {'$multiply': [1, '$_weight']}}
+    assert '$addFields' in rewritten[2] and 'average_age' in rewritten[2]['$addFields']
+    assert rewritten[3:] == [{'$sort': {'total': -1}}, regroup]
+
+
+def test_each_facet_branch_is_weighted():
+    rewritten = weighted_pipeline([{'$facet': {'a': [GROUP], 'b': [{'$match': {'type': 'noble'}}, GROUP]}}])
+    branches = rewritten[0]['$facet']
+    assert branches['a'] == weighted_pipeline([GROUP])
+    assert branches['b'][1:] == weighted_pipeline([GROUP])
+
+
+def test_weighted_totals_and_means_on_a_sample():
+    db = mongomock.MongoClient().db
+    # 4 sampled nobles standing for 40 (weight 10), 2 influencers standing for 4 (weight 2)
+    db.sample.insert_many([{'type': 'noble', 'age': age, '_weight': 10} for age in (20, 30, 40, 50)]
+                          + [{'type': 'influencer', 'age': age, '_weight': 2} for age in (20, None)])
+    rows = {row['_id']: row for row in db.sample.aggregate(weighted_pipeline([GROUP]))}
+    assert rows['noble']['total'] == 40 and rows['noble']['average_age'] == 35
+    assert rows['influencer']['total'] == 4 and rows['influencer']['average_age'] == 20
+
+    noble = add_intervals(rows['noble'], 1.96)
+    assert not any(key.startswith(HIDDEN) for key in noble)
+    assert noble['_sample_rows'] == 4
+    assert noble['_ci']['average_age']['low'] < 35 < noble['_ci']['average_age']['high']
+
+
+@pytest.mark.parametrize('key', ['age_comparison', 'geo_age_demographics'])
+def test_finalized_queries_keep_their_intervals(key):
+    db = mongomock.MongoClient().db
+    db.sample.insert_many([{'type': 'influencer', 'location': {'country': 'Peru'}, 'age': 18 + i % 40, '_weight': 5}
+                           for i in range(100)])
+    entry = next(query for query in ANALYSIS_QUERIES if query['key'] == key)
+    rows = finalize(entry, add_intervals(list(db.sample.aggregate(weighted_pipeline(entry['pipeline']))), 1.96))
+
+    row, = rows
+    assert row['_sample_rows'] == 100
+    if key == 'age_comparison':
+        assert set(row['_ci']) == {'average_age', 'median_age', 'count'}
+        assert row['count'] == 500
+        for field in ('average_age', 'median_age', 'count'):
+            assert row['_ci'][field]['low'] <= row[field] <= row['_ci'][field]['high']
+            assert row['_ci'][field]['margin'] > 0
+    else:
+        assert {'avg_age', 'total_count', 'age_ranges.18-24', 'age_ranges.45+'} <= set(row['_ci'])
+        assert set(row['_share']) == {'age_ranges.18-24', 'age_ranges.25-34', 'age_ranges.35-44', 'age_ranges.45+'}
+        # Ages 18-24 are 21 of the 100 sampled rows, each standing for 5
+        assert row['age_ranges']['18-24'] == 21 * 5
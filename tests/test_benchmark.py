@@ -0,0 +1,18 @@
+import pytest
+
+from benchmark import BenchmarkSuite, restart_server_hook
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_cold_runs_need_a_cold_hook():
+    suite = BenchmarkSuite(mongomock.MongoClient().db)
+    with pytest.raises(ValueError):
+        suite.make_cold()
+
+
+def test_restart_hook_runs_the_command_then_waits_for_the_server(tmp_path):
+    marker = tmp_path / 'restarted'
+    hook = restart_server_hook(mongomock.MongoClient().db, f"touch {marker}", timeout=1)
+    hook()
+    assert marker.exists()
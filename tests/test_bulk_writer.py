@@ -0,0 +1,31 @@
+import pytest
+from pymongo import errors
+
+from bulk_writer import BulkWriter
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_duplicate_keys_are_counted_as_write_errors():
+    collection = mongomock.MongoClient().db.people
+    collection.insert_one({'_id': 3})
+    with BulkWriter(collection, target_bytes=64) as writer:
+        for i in range(10):
+            writer.add({'_id': i})
+    summary = writer.close()
+    assert summary['inserted'] == 9 and summary['errors'] == 1
+    assert collection.count_documents({}) == 10
+
+
+def test_other_failures_are_raised_from_close(monkeypatch):
+    collection = mongomock.MongoClient().db.people
+    writer = BulkWriter(collection)
+    monkeypatch.setattr(writer, 'collection', collection)
+
+    def unreachable(*args, **kwargs):
+        raise errors.AutoReconnect('connection reset')
+
+    monkeypatch.setattr(collection, 'insert_many', unreachable)
+    writer.add({'_id': 1})
+    with pytest.raises(errors.AutoReconnect):
+        writer.close()
@@ -0,0 +1,38 @@
+from categorical_encoding import UNKNOWN_CODE, encode_pipeline, encoded_index_specs
+
+CODEBOOK = {'type': {'influencer': 0, 'noble': 1}, 'sex': {'Female': 0, 'Male': 1}}
+
+
+def test_match_literals_on_categorical_fields_become_codes():
+    pipeline = [{'$match': {'type': 'noble', 'sex': {'$ne': 'Female'}, 'age': {'$gte': 18}}}]
+    assert encode_pipeline(pipeline, CODEBOOK) == [
+        {'$match': {'type': 1, 'sex': {'$ne': 0}, 'age': {'$gte': 18}}}
+    ]
+
+
+def test_expression_comparisons_are_encoded_inside_groups_and_facets():
+    count_nobles = {'$sum': {'$cond': [{'$eq': ['$type', 'noble']}, 1, 0]}}
+    pipeline = [{'$facet': {'by_sex': [{'$group': {'_id': '$sex', 'nobles': count_nobles}}]}}]
+    encoded = encode_pipeline(pipeline, CODEBOOK)
+    assert encoded == [{'$facet': {'by_sex': [
+        {'$group': {'_id': '$sex', 'nobles': {'$sum': {'$cond': [{'$eq': ['$type', 1]}, 1, 0]}}}}
+    ]}}]
+    assert pipeline[0]['$facet']['by_sex'][0]['$group']['nobles'] is count_nobles
+
+
+def test_unknown_labels_encode_to_a_code_nothing_has():
+    assert encode_pipeline([{'$match': {'type': 'peasant'}}], CODEBOOK) == [{'$match': {'type': UNKNOWN_CODE}}]
+
+
+def test_index_specs_carry_over_with_coded_partial_filters():
+    labels = {field: sorted(codes, key=codes.get) for field, codes in CODEBOOK.items()}
+    specs = [
+        {'name': 'type_1_age_1', 'key': {'type': 1, 'age': 1}},
+        {'name': 'age_1', 'key': {'age': 1}, 'partialFilterExpression': {'type': 'noble'}},
+        {'name': '_key_1', 'key': {'_key': 1}, 'unique': True},
+    ]
+    assert encoded_index_specs(specs, labels) == [
+        {'name': 'type_1_age_1', 'key': {'type': 1, 'age': 1}},
+        {'name': 'age_1', 'key': {'age': 1}, 'partialFilterExpression': {'type': 1}},
+    ]
+    assert specs[1]['partialFilterExpression'] == {'type': 'noble'}
@@ -0,0 +1,9 @@
+from connection_manager import ConnectionManager
+
+
+def test_write_concern_options_reach_the_client():
+    manager = ConnectionManager(write_concern={'w': 'majority', 'j': True, 'wtimeout': 5000}, compressors=None)
+    try:
+        assert manager.client.write_concern.document == {'w': 'majority', 'j': True, 'wtimeout': 5000}
+    finally:
+        manager.close()
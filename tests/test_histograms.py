@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from benchmark import percentile
+from histograms import histogram_percentile
+
+
+@pytest.mark.parametrize('fraction', [0.0, 0.25, 0.5, 0.9, 0.99, 1.0])
+def test_matches_the_percentile_of_the_expanded_values(fraction):
+    rng = random.Random(0)
+    values = sorted(rng.randint(18, 80) for _ in range(1001))
+    histogram = sorted((value, values.count(value)) for value in set(values))
+    assert histogram_percentile(histogram, fraction) == pytest.approx(percentile(values, fraction))
+
+
+def test_interpolates_between_buckets():
+    assert histogram_percentile([(20, 1), (30, 1)], 0.5) == 25
+    assert histogram_percentile([(20, 3), (30, 1)], 0.5) == 20
+
+
+def test_empty_histogram_has_no_percentile():
+    assert histogram_percentile([], 0.5) is None
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from incremental_ingest import IncrementalIngestor
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def write_records(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def influencer(index):
+    return {'Name': f'Person {index}', 'Age': 20 + index % 40, 'Sex': 'Female', 'Country of Origin': 'Serbia',
+            'State or Province': None, 'Education Level': 'Doctorate', 'MBTI Personality': 'INTJ',
+            'Lifestyle': 'Minimalist', 'Backstory': f'Story {index}'}
+
+
+@pytest.fixture
+def setup(tmp_path):
+    db = mongomock.MongoClient().db
+    path = str(tmp_path / 'influencer_data.jsonl')
+    write_records(path, [influencer(i) for i in range(25)])
+
+    def ingest():
+        return IncrementalIngestor(db, unified=True, batch_size=10,
+                                   data_files={'influencers': (path, 'influencer')},
+                                   checkpoint_file=str(tmp_path / 'checkpoint.json'),
+                                   quarantine_file=str(tmp_path / 'quarantine.jsonl')).run()
+
+    return db, path, ingest
+
+
+def test_unchanged_file_is_skipped(setup):
+    db, _, ingest = setup
+    assert ingest()['influencers']['new'] == 25
+    stats = ingest()['influencers']
+    assert stats['lines'] == 0 and stats['new'] == 0
+    assert db.people.count_documents({}) == 25
+
+
+def test_resume_after_unkeyed_rebuild_reloads_everything(setup):
+    db, _, ingest = setup
+    ingest()
+    # create_unified_schema() rebuilds people without natural keys
+    db.people.drop()
+    db.people.insert_many([{'name': f'Person {i}', 'type': 'influencer'} for i in range(25)])
+    ingest()
+    assert db.people.count_documents({}) == 25
+    assert db.people.count_documents({'_key': {'$exists': True}}) == 25
+
+
+def test_resume_after_external_drop_reloads_everything(setup):
+    db, _, ingest = setup
+    ingest()
+    db.people.drop()
+    assert ingest()['influencers']['new'] == 25
+    assert db.people.count_documents({}) == 25
+
+
+def test_rewritten_file_prunes_missing_records(setup):
+    db, path, ingest = setup
+    ingest()
+    write_records(path, [influencer(i) for i in range(25) if i != 7])
+    stats = ingest()['influencers']
+    assert stats['removed'] == 1 and stats['unchanged'] == 24
+    assert db.people.count_documents({}) == 24
+    assert db.people.find_one({'name': 'Person 7'}) is None
+
+
+def test_edited_backstory_is_a_change_not_a_replacement(setup):
+    db, path, ingest = setup
+    ingest()
+    records = [influencer(i) for i in range(25)]
+    records[3]['Backstory'] = 'A rewritten story'
+    write_records(path, records)
+    stats = ingest()['influencers']
+    assert stats['changed'] == 1 and stats['new'] == 0 and not stats.get('removed')
+    assert db.people.find_one({'name': 'Person 3'})['backstory'] == 'A rewritten story'
+
+
+def test_invalid_utf8_line_is_quarantined(setup, tmp_path):
+    db, path, ingest = setup
+    with open(path, 'ab') as f:
+        f.write(b'{"Name": "Bad \xff byte"}\n')
+    stats = ingest()['influencers']
+    assert stats['new'] == 25 and stats['quarantined'] == 1
+    with open(tmp_path / 'quarantine.jsonl', encoding='utf-8') as f:
+        entry = json.loads(f.readline())
+    assert entry['line'] == 26 and entry['reason'].startswith('invalid UTF-8')
+    assert ingest()['influencers']['lines'] == 0
+
+
+def test_repeated_record_in_one_batch_is_counted_once(setup):
+    db, path, ingest = setup
+    records = [influencer(i) for i in range(5)]
+    repeat = dict(records[1], Age=99)
+    write_records(path, records + [repeat])
+    stats = ingest()['influencers']
+    assert stats['new'] == 5 and stats['duplicates'] == 1
+    assert db.people.find_one({'name': 'Person 1'})['age'] == 99
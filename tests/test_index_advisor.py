@@ -0,0 +1,19 @@
+import pytest
+
+from index_advisor import MANUAL_INDEXES, IndexAdvisor
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_drop_superseded_keeps_other_features_indexes():
+    db = mongomock.MongoClient().db
+    db.people.insert_one({'type': 'noble', 'age': 30})
+    for keys in MANUAL_INDEXES[:3] + MANUAL_INDEXES[-2:]:
+        db.people.create_index(keys)
+    db.people.create_index([('type', 1), ('age', 1), ('sex', 1)], name='advisor_type_age_sex')
+    db.people.create_index('_key', unique=True)
+    db.people.create_index([('type', 1), ('age', 1), ('_id', 1)])
+
+    IndexAdvisor(db).drop_superseded()
+
+    assert sorted(db.people.index_information()) == ['_id_', '_key_1', 'type_1_age_1__id_1']
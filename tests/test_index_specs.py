@@ -0,0 +1,33 @@
+import pytest
+
+from index_specs import deferred_indexes, spec_fields
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_spec_fields_reads_text_index_weights():
+    assert spec_fields({'key': {'_fts': 'text', '_ftsx': 1}, 'weights': {'name': 10, 'backstory': 1}}) == \
+        {'name', 'backstory'}
+    assert spec_fields({'key': {'type': 1, 'age': 1}}) == {'type', 'age'}
+
+
+def test_reload_without_keys_skips_the_unique_key_index(monkeypatch):
+    db = mongomock.MongoClient().db
+    db.people.insert_many([{'_key': 'a', 'type': 'noble'}, {'_key': 'b', 'type': 'influencer'}])
+    db.people.create_index('_key', unique=True)
+    db.people.create_index('type')
+    # mongomock has neither $currentOp nor the createIndexes command
+    monkeypatch.setattr('index_specs._build_progress', lambda collection: [])
+
+    def restore(collection, specs):
+        for spec in specs:
+            options = {key: value for key, value in spec.items() if key != 'key'}
+            collection.create_index(list(spec['key'].items()), **options)
+
+    monkeypatch.setattr('index_specs.restore_index_specs', restore)
+
+    with deferred_indexes(db.people, poll_interval=0.01, skip_fields=('_key',)):
+        db.people.drop()
+        db.people.insert_many([{'type': 'noble'}, {'type': 'influencer'}])
+
+    assert sorted(db.people.index_information()) == ['_id_', 'type_1']
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from numpy_backend import Column, _compare  # noqa: E402
+
+OPERATORS = ('$lt', '$lte', '$gt', '$gte', '$eq', '$ne')
+# age null, 20, 30 against 25: null sorts before numbers in expressions
+EXPRESSION = {'$lt': [True, True, False], '$lte': [True, True, False], '$gt': [False, False, True],
+              '$gte': [False, False, True], '$eq': [False, False, False], '$ne': [True, True, True]}
+# In query filters a null field only matches $ne
+QUERY = {'$lt': [False, True, False], '$lte': [False, True, False], '$gt': [False, False, True],
+         '$gte': [False, False, True], '$eq': [False, False, False], '$ne': [True, True, True]}
+
+
+@pytest.mark.parametrize('operator', OPERATORS)
+def test_numpy_compare_orders_null_like_mongodb(operator):
+    ages = Column(np.array([0, 20, 30]), None, np.array([False, True, True]))
+    assert _compare(ages, operator, 25, expression=True).tolist() == EXPRESSION[operator]
+    assert _compare(ages, operator, 25).tolist() == QUERY[operator]
+
+
+@pytest.mark.parametrize('operator', OPERATORS)
+def test_snapshot_orders_null_like_mongodb(operator):
+    pa = pytest.importorskip('pyarrow')
+    from columnar_snapshot import SnapshotEngine
+
+    engine = SnapshotEngine.__new__(SnapshotEngine)
+    table = pa.table({'age': [None, 20, 30]})
+    assert engine._value(table, {operator: ['$age', 25]}).to_pylist() == EXPRESSION[operator]
+    assert engine._mask(table, {'age': {operator: 25}}).to_pylist() == QUERY[operator]
@@ -0,0 +1,25 @@
+import pytest
+
+from parallel_ingest import split_into_chunks
+
+
+@pytest.mark.parametrize('trailing_newline', [True, False])
+@pytest.mark.parametrize('chunk_bytes', [1, 7, 64, 10000])
+def test_chunks_tile_the_file_on_line_boundaries(tmp_path, chunk_bytes, trailing_newline):
+    lines = [f'{{"Name": "Person {i}", "Backstory": "{"x" * (i * 3 % 17)}"}}' for i in range(40)]
+    data = ('\n'.join(lines) + ('\n' if trailing_newline else '')).encode('utf-8')
+    path = tmp_path / 'data.jsonl'
+    path.write_bytes(data)
+
+    ranges = split_into_chunks(str(path), chunk_bytes)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+    assert [line for start, end in ranges for line in data[start:end].decode('utf-8').splitlines()] == lines
+
+
+def test_empty_file_has_no_chunks(tmp_path):
+    path = tmp_path / 'empty.jsonl'
+    path.write_bytes(b'')
+    assert split_into_chunks(str(path)) == []
@@ -0,0 +1,41 @@
+import pytest
+
+from partitioning import merge_groups, partial_group
+
+GROUP = {'_id': '$type', 'total': {'$sum': 1}, 'average_age': {'$avg': '$age'}, 'youngest': {'$min': '$age'},
+         'oldest': {'$max': '$age'}, 'countries': {'$addToSet': '$country'}}
+
+
+def test_partial_group_splits_avg_into_sum_and_count():
+    partial = partial_group(GROUP)
+    assert partial['average_age__sum'] == {'$sum': '$age'}
+    assert partial['average_age__count'] == {'$sum': {'$cond': [{'$isNumber': '$age'}, 1, 0]}}
+    assert 'average_age' not in partial and partial['total'] == {'$sum': 1}
+
+
+def test_partial_group_rejects_accumulators_it_cannot_merge():
+    with pytest.raises(ValueError):
+        partial_group({'_id': '$type', 'median_age': {'$median': {'input': '$age', 'method': 'approximate'}}})
+
+
+def test_merge_groups_matches_one_group_over_all_partitions():
+    partials = [
+        [{'_id': 'noble', 'total': 2, 'average_age__sum': 70, 'average_age__count': 2, 'youngest': 30,
+          'oldest': 40, 'countries': ['Serbia']},
+         {'_id': 'influencer', 'total': 1, 'average_age__sum': 0, 'average_age__count': 0, 'youngest': None,
+          'oldest': None, 'countries': ['India']}],
+        [{'_id': 'noble', 'total': 1, 'average_age__sum': 20, 'average_age__count': 1, 'youngest': 20,
+          'oldest': 20, 'countries': ['Serbia', 'France']}],
+    ]
+    merged = {row['_id']: row for row in merge_groups(GROUP, partials)}
+    assert merged['noble'] == {'_id': 'noble', 'total': 3, 'average_age': 30, 'youngest': 20, 'oldest': 40,
+                               'countries': ['Serbia', 'France']}
+    # No numeric age anywhere: the average is null, like $avg over no numbers
+    assert merged['influencer']['average_age'] is None and merged['influencer']['youngest'] is None
+
+
+def test_compound_group_ids_merge_by_value():
+    group = {'_id': {'type': '$type', 'sex': '$sex'}, 'total': {'$sum': 1}}
+    partials = [[{'_id': {'type': 'noble', 'sex': 'Male'}, 'total': 2}],
+                [{'_id': {'sex': 'Male', 'type': 'noble'}, 'total': 5}]]
+    assert merge_groups(group, partials) == [{'_id': {'type': 'noble', 'sex': 'Male'}, 'total': 7}]
@@ -0,0 +1,61 @@
+import pytest
+
+from people_export import SORT_KEYS, _query_projection, iter_documents, iter_pages, keyset_filter
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_keyset_filter_expands_the_position_into_prefix_branches():
+    assert keyset_filter(SORT_KEYS['type_age'], ('noble', 30, 7)) == {'$or': [
+        {'type': {'$gt': 'noble'}},
+        {'type': 'noble', 'age': {'$gt': 30}},
+        {'type': 'noble', 'age': 30, '_id': {'$gt': 7}},
+    ]}
+
+
+def test_keyset_filter_continues_a_null_position_with_ne():
+    assert keyset_filter(SORT_KEYS['type_age'], ('noble', None, 7)) == {'$or': [
+        {'type': {'$gt': 'noble'}},
+        {'type': 'noble', 'age': {'$ne': None}},
+        {'type': 'noble', 'age': None, '_id': {'$gt': 7}},
+    ]}
+
+
+def test_bare_id_exclusion_is_an_exclusion_projection():
+    assert _query_projection({'_id': 0}, SORT_KEYS['type_age']) == (None, ['_id'])
+    assert _query_projection({'_id': 0, 'backstory': 0}, SORT_KEYS['_id']) == ({'backstory': 0}, ['_id'])
+
+
+def test_inclusion_projection_adds_and_strips_missing_sort_keys():
+    projection, extra = _query_projection({'name': 1, '_id': 0}, SORT_KEYS['type_age'])
+    assert projection == {'name': 1, '_id': 1, 'type': 1, 'age': 1}
+    assert sorted(extra) == ['_id', 'age', 'type']
+
+
+@pytest.fixture
+def people():
+    collection = mongomock.MongoClient().db.people
+    collection.insert_many([{'_id': i, 'name': f'Person {i}', 'type': ['noble', 'influencer'][i % 2],
+                             'age': None if i % 5 == 0 else 20 + i % 7, 'backstory': 'x'} for i in range(23)])
+    return collection
+
+
+def test_pages_cover_every_document_once_in_keyset_order(people):
+    pages = list(iter_pages(people, sort='type_age', page_size=4))
+    ids = [doc['_id'] for docs, _ in pages for doc in docs]
+    expected = [doc['_id'] for doc in people.find(sort=SORT_KEYS['type_age'])]
+    assert ids == expected and len(set(ids)) == 23
+    assert all(len(docs) == 4 for docs, _ in pages[:-1])
+
+
+def test_id_exclusion_returns_documents_without_id(people):
+    docs = list(iter_documents(people, sort='type_age', projection={'_id': 0}, page_size=5))
+    assert len(docs) == 23
+    assert all('_id' not in doc and 'backstory' in doc for doc in docs)
+
+
+def test_reading_does_not_create_the_sort_index(people):
+    list(iter_pages(people, sort='type_age'))
+    assert list(people.index_information()) == ['_id_']
+    list(iter_pages(people, sort='type_age', ensure_index=True))
+    assert 'type_1_age_1__id_1' in people.index_information()
@@ -0,0 +1,54 @@
+import pytest
+
+from query_cache import QueryCache, bump_version
+
+mongomock = pytest.importorskip('mongomock')
+
+PIPELINE = [{'$group': {'_id': '$type', 'count': {'$sum': 1}}}]
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db.people.insert_many([{'type': 'noble'}, {'type': 'influencer'}])
+    return db
+
+
+def test_hits_do_not_read_the_version_collection(db, monkeypatch):
+    cache = QueryCache(db, version_check_interval=60)
+    cache.aggregate(db.people, PIPELINE)
+    reads = []
+    monkeypatch.setattr('query_cache.collection_version', lambda *args: reads.append(args) or 0)
+    for _ in range(5):
+        cache.aggregate(db.people, PIPELINE)
+    assert reads == []
+    assert cache.summary()['hits'] == 5 and cache.summary()['misses'] == 1
+
+
+def test_bump_version_invalidates_without_waiting_for_the_interval(db):
+    cache = QueryCache(db, version_check_interval=60)
+    assert len(cache.aggregate(db.people, PIPELINE)) == 2
+    db.people.insert_one({'type': 'peasant'})
+    bump_version(db, 'people')
+    assert len(cache.aggregate(db.people, PIPELINE)) == 3
+    assert cache.summary()['misses'] == 2
+
+
+def test_corrupt_disk_entries_are_misses(db, tmp_path):
+    cache = QueryCache(db, disk_dir=str(tmp_path))
+    expected = cache.aggregate(db.people, PIPELINE)
+    cache.memory.clear()
+    (entry,) = tmp_path.glob('*.json')
+    entry.write_text('{"version": 0, "expires_')
+
+    assert cache.aggregate(db.people, PIPELINE) == expected
+    assert cache.summary()['misses'] == 2
+
+
+def test_concurrent_misses_on_one_key_do_not_fail(db, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = QueryCache(db, disk_dir=str(tmp_path), max_entries=0)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: cache.aggregate(db.people, PIPELINE), range(64)))
+    assert all(len(result) == 2 for result in results)
@@ -0,0 +1,49 @@
+import json
+import random
+
+from synthetic_data import BASE_COUNTS, cumulative, fit_profile, iter_records, weighted_choice
+
+
+def write_influencers(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+        f.write('{not json\n')
+
+
+def test_fits_frequencies_and_ages_from_the_source_file(tmp_path):
+    path = tmp_path / 'influencer_data.jsonl'
+    write_influencers(path, [
+        {'Name': 'A', 'Age': 20 + i % 2, 'Sex': 'Female', 'Country of Origin': 'Peru',
+         'State or Province': 'Lima' if i % 4 else None, 'MBTI Personality': 'INTJ'}
+        for i in range(40)
+    ])
+    profile = fit_profile({'influencers': (str(path), 'influencer'), 'nobles': (str(tmp_path / 'none'), 'noble')})
+
+    influencers = profile['influencers']
+    assert influencers['records'] == 40
+    assert influencers['fields']['Age'] == {20: 20, 21: 20}
+    assert influencers['fields']['MBTI Personality'] == {'INTJ': 40}
+    assert influencers['states'] == {'Peru': {'': 10, 'Lima': 30}}
+    # Fields the file never fills keep the built-in tables, as does the missing nobles file
+    assert 'Lifestyle' in influencers['fields']
+    assert profile['nobles']['records'] == BASE_COUNTS['nobles']
+
+    records = list(iter_records('influencers', 50, profile=profile))
+    assert {record['Age'] for record in records} <= {20, 21}
+    assert {record['Country of Origin'] for record in records} == {'Peru'}
+    assert {record['State or Province'] for record in records} <= {'Lima', None}
+
+
+def test_same_seed_and_profile_yield_the_same_records():
+    profile = fit_profile({})
+    assert list(iter_records('nobles', 20, seed=3, profile=profile)) == \
+        list(iter_records('nobles', 20, seed=3, profile=profile))
+
+
+def test_weighted_choice_follows_the_weights():
+    rng = random.Random(0)
+    table = cumulative({'a': 3, 'b': 1, 'c': 0})
+    draws = [weighted_choice(rng, table) for _ in range(4000)]
+    assert 'c' not in draws
+    assert 0.7 < draws.count('a') / len(draws) < 0.8
@@ -0,0 +1,15 @@
+from vertical_split import split_index_specs
+
+TEXT_INDEX = {'key': {'_fts': 'text', '_ftsx': 1}, 'name': 'name_backstory_text',
+              'weights': {'name': 10, 'backstory': 1}, 'default_language': 'english'}
+
+
+def test_indexes_over_backstory_move_to_the_text_collection():
+    type_age = {'key': {'type': 1, 'age': 1}, 'name': 'type_1_age_1'}
+    backstory = {'key': {'backstory': 1}, 'name': 'backstory_1'}
+    mixed = {'key': {'type': 1, 'backstory': 1}, 'name': 'type_1_backstory_1'}
+
+    hot, text = split_index_specs([type_age, TEXT_INDEX, backstory, mixed])
+
+    assert hot == [type_age]
+    assert text == [dict(TEXT_INDEX, weights={'backstory': 1}), backstory]
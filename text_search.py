@@ -0,0 +1,202 @@
+import argparse
+import math
+import re
+import time
+
+from benchmark import percentile
+from connection_manager import get_manager
+from vertical_split import TEXT_COLLECTION, is_split
+
+TEXT_INDEX_NAME = 'name_backstory_text'
+# A hit in the name outranks the same word somewhere in a long backstory
+TEXT_WEIGHTS = {'name': 10, 'backstory': 1}
+DEFAULT_PAGE_SIZE = 10
+RESULT_FIELDS = ('name', 'type', 'mbti_personality', 'location.country', 'age')
+
+SAMPLE_SEARCHES = [
+    {'terms': 'family'},
+    {'terms': 'music travel'},
+    {'terms': 'kingdom war', 'type': 'noble'},
+    {'terms': 'fashion', 'type': 'influencer', 'country': 'United States'},
+    {'terms': 'adventure', 'mbti': 'INTJ'},
+]
+
+
+def ensure_text_index(db):
+    """Text index over name and backstory; only backstory (in people_text) when the layout is split"""
+    if is_split(db):
+        collection, weights = db[TEXT_COLLECTION], {'backstory': TEXT_WEIGHTS['backstory']}
+    else:
+        collection, weights = db.people, TEXT_WEIGHTS
+    if TEXT_INDEX_NAME not in collection.index_information():
+        start_time = time.perf_counter()
+        collection.create_index([(field, 'text') for field in weights], name=TEXT_INDEX_NAME, weights=weights)
+        print(f"✓ Built text index on {collection.name} ({', '.join(weights)}) "
+              f"in {time.perf_counter() - start_time:.2f}s")
+    return collection
+
+
+def search_filter(type=None, mbti=None, country=None):
+    """Equality filters on people fields, skipping the ones not given"""
+    values = (('type', type), ('mbti_personality', mbti), ('location.country', country))
+    return {field: value for field, value in values if value is not None}
+
+
+def _page_stages(sort, page, page_size, prefix=''):
+    """Sort, paginate and count in one $facet; prefix reads people fields from a $lookup'd sub-document"""
+    project = {}
+    for field in RESULT_FIELDS:
+        *parents, leaf = field.split('.')
+        target = project
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = f"${prefix}{field}" if prefix else 1
+    if 'score' in sort:
+        project['score'] = 1
+    return [
+        {"$facet": {
+            "results": [
+                {"$sort": sort},
+                {"$skip": (page - 1) * page_size},
+                {"$limit": page_size},
+                {"$project": project}
+            ],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+
+def _join_people(filters):
+    """Stages that attach each people_text match's people document and apply the filters to it"""
+    stages = [
+        {"$lookup": {"from": "people", "localField": "_id", "foreignField": "_id", "as": "person"}},
+        {"$unwind": "$person"}
+    ]
+    if filters:
+        stages.append({"$match": {f"person.{field}": value for field, value in filters.items()}})
+    return stages
+
+
+def text_search_pipeline(terms, filters, page=1, page_size=DEFAULT_PAGE_SIZE, split=False):
+    """Ranked $text retrieval: best textScore first, _id breaking ties so pages are stable"""
+    sort = {"score": -1, "_id": 1}
+    if split:
+        return [
+            {"$match": {"$text": {"$search": terms}}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            *_join_people(filters),
+            *_page_stages(sort, page, page_size, prefix='person.')
+        ]
+    return [
+        {"$match": {"$text": {"$search": terms}, **filters}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        *_page_stages(sort, page, page_size)
+    ]
+
+
+def regex_search_pipeline(terms, filters, page=1, page_size=DEFAULT_PAGE_SIZE, split=False):
+    """The unindexed alternative: a case-insensitive $regex over every backstory, in _id order"""
+    pattern = '|'.join(re.escape(word) for word in terms.split())
+    if split:
+        return [
+            {"$match": {"backstory": {"$regex": pattern, "$options": "i"}}},
+            *_join_people(filters),
+            *_page_stages({"_id": 1}, page, page_size, prefix='person.')
+        ]
+    return [
+        {"$match": {"$or": [{"backstory": {"$regex": pattern, "$options": "i"}},
+                            {"name": {"$regex": pattern, "$options": "i"}}], **filters}},
+        *_page_stages({"_id": 1}, page, page_size)
+    ]
+
+
+def _run_page(collection, pipeline, page, page_size):
+    facet = next(collection.aggregate(pipeline, allowDiskUse=True), {'results': [], 'total': []})
+    total = facet['total'][0]['count'] if facet['total'] else 0
+    return {
+        'results': facet['results'],
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'pages': math.ceil(total / page_size) if page_size else 0
+    }
+
+
+def search_people(db, terms, type=None, mbti=None, country=None, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """One page of people ranked by relevance to terms, with the total hit count"""
+    collection = ensure_text_index(db)
+    split = collection.name == TEXT_COLLECTION
+    pipeline = text_search_pipeline(terms, search_filter(type, mbti, country), page, page_size, split)
+    return _run_page(collection, pipeline, page, page_size)
+
+
+def regex_search_people(db, terms, type=None, mbti=None, country=None, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Same page shape as search_people, found by a full $regex scan"""
+    split = is_split(db)
+    collection = db[TEXT_COLLECTION] if split else db.people
+    pipeline = regex_search_pipeline(terms, search_filter(type, mbti, country), page, page_size, split)
+    return _run_page(collection, pipeline, page, page_size)
+
+
+def print_search_page(terms, page):
+    print(f"\nSEARCH '{terms}': {page['total']:,} matches, page {page['page']}/{max(page['pages'], 1)}")
+    for rank, person in enumerate(page['results'], start=(page['page'] - 1) * page['page_size'] + 1):
+        country = (person.get('location') or {}).get('country')
+        where = f", {country}" if country else ""
+        print(f"   {rank:>3}. {person.get('name')} ({person.get('type')}, {person.get('mbti_personality')}{where}) "
+              f"score={person.get('score', 0):.2f}")
+
+
+def benchmark_search(db, searches=SAMPLE_SEARCHES, repetitions=5, page_size=DEFAULT_PAGE_SIZE):
+    """First-page latency of the text index against the $regex full scan for each sample search"""
+    ensure_text_index(db)
+    report = []
+    for search in searches:
+        options = {key: value for key, value in search.items() if key != 'terms'}
+        row = {'search': search}
+        for mode, run in (('text', search_people), ('regex', regex_search_people)):
+            samples = []
+            for _ in range(repetitions):
+                start_ns = time.perf_counter_ns()
+                page = run(db, search['terms'], page_size=page_size, **options)
+                samples.append((time.perf_counter_ns() - start_ns) / 1e6)
+            samples.sort()
+            row[mode] = {'p50_ms': percentile(samples, 0.50), 'max_ms': samples[-1], 'total': page['total']}
+        report.append(row)
+    print_search_benchmark(report)
+    return report
+
+
+def print_search_benchmark(report):
+    print("\n" + "="*60)
+    print("TEXT SEARCH: INDEX vs REGEX SCAN (first page, p50)")
+    print("="*60)
+    print(f"{'SEARCH':32} {'TEXT':>9} {'REGEX':>10} {'SPEEDUP':>8} {'HITS (TEXT/REGEX)':>18}")
+    for row in report:
+        label = ' '.join([row['search']['terms']] + [f"{key}={value}" for key, value in row['search'].items()
+                                                      if key != 'terms'])
+        text, regex = row['text'], row['regex']
+        speedup = regex['p50_ms'] / text['p50_ms'] if text['p50_ms'] else float('inf')
+        print(f"{label[:32]:32} {text['p50_ms']:>7.1f}ms {regex['p50_ms']:>8.1f}ms {speedup:>7.1f}x "
+              f"{text['total']:>8,}/{regex['total']:<,}")
+    print("($text matches stemmed whole words, $regex any substring, so hit counts can differ)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranked full-text search over people names and backstories")
+    parser.add_argument('terms', nargs='?')
+    parser.add_argument('--type')
+    parser.add_argument('--mbti')
+    parser.add_argument('--country')
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--benchmark', action='store_true', help="compare against a $regex full scan")
+    args = parser.parse_args()
+
+    db = get_manager().db
+    if args.benchmark:
+        benchmark_search(db)
+    if args.terms:
+        page = search_people(db, args.terms, type=args.type, mbti=args.mbti, country=args.country,
+                             page=args.page, page_size=args.page_size)
+        print_search_page(args.terms, page)
@@ -0,0 +1,129 @@
+import time
+
+from benchmark import BenchmarkSuite, compare_reports, print_comparison
+from index_specs import restore_index_specs, snapshot_index_specs, spec_fields
+
+TEXT_COLLECTION = 'people_text'
+TEXT_FIELDS = ('backstory',)
+
+
+def is_split(db, hot='people', text=TEXT_COLLECTION):
+    """True when backstory lives in the text collection instead of people"""
+    if text not in db.list_collection_names():
+        return False
+    return db[hot].find_one({'backstory': {'$exists': True}}, {'_id': 1}) is None
+
+
+def split_index_specs(specs):
+    """(specs that stay on people, specs to build on the text collection instead)
+
+    A text index moves with its name and only its weights on the text fields, which is how text
+    search expects to find it in the split layout.
+    """
+    hot_specs, text_specs = [], []
+    for spec in specs:
+        if not spec_fields(spec) & set(TEXT_FIELDS):
+            hot_specs.append(spec)
+        elif 'weights' in spec:
+            weights = {field: weight for field, weight in spec['weights'].items() if field in TEXT_FIELDS}
+            text_specs.append(dict(spec, weights=weights))
+        elif set(spec['key']) <= set(TEXT_FIELDS):
+            text_specs.append(spec)
+        else:
+            # Half of its key would be in each collection
+            print(f"⚠ Not rebuilding {spec['name']}: it mixes hot and {', '.join(TEXT_FIELDS)} fields")
+    return hot_specs, text_specs
+
+
+def split_people_text(db, hot='people', text=TEXT_COLLECTION):
+    """Move backstory out of people into a text collection joined by _id"""
+    hot_specs, text_specs = split_index_specs(snapshot_index_specs(db[hot]))
+    db[hot].aggregate([
+        {"$project": {field: 1 for field in TEXT_FIELDS}},
+        {"$out": text}
+    ], allowDiskUse=True)
+    # Rewriting people through $out + rename leaves a compact file behind, unlike $unset in place
+    db[hot].aggregate([
+        {"$project": {field: 0 for field in TEXT_FIELDS}},
+        {"$out": hot + '_hot'}
+    ], allowDiskUse=True)
+    db[hot + '_hot'].rename(hot, dropTarget=True)
+    restore_index_specs(db[hot], hot_specs)
+    restore_index_specs(db[text], text_specs)
+    print(f"✓ Split {hot}: hot fields in {hot}, {', '.join(TEXT_FIELDS)} in {text}")
+
+
+def merge_people_text(db, hot='people', text=TEXT_COLLECTION):
+    """Fold the text collection back into people and drop it"""
+    db[text].aggregate([
+        {"$merge": {"into": hot, "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ], allowDiskUse=True)
+    db[text].drop()
+    print(f"✓ Merged {text} back into {hot}")
+
+
+def find_person(db, query, hot='people', text=TEXT_COLLECTION):
+    """find_one over people that returns the full document in either layout"""
+    doc = db[hot].find_one(query)
+    if doc is not None and 'backstory' not in doc and text in db.list_collection_names():
+        text_doc = db[text].find_one({'_id': doc['_id']})
+        if text_doc:
+            for field in TEXT_FIELDS:
+                if field in text_doc:
+                    doc[field] = text_doc[field]
+    return doc
+
+
+def with_text_pipeline(text=TEXT_COLLECTION):
+    """Stages that re-attach the text fields to hot documents inside an aggregation"""
+    return [
+        {"$lookup": {"from": text, "localField": "_id", "foreignField": "_id", "as": "_text"}},
+        {"$replaceWith": {"$mergeObjects": ["$$ROOT", {"$arrayElemAt": ["$_text", 0]}]}},
+        {"$unset": "_text"}
+    ]
+
+
+def storage_stats(db, name):
+    """Size and WiredTiger cache residency of one collection"""
+    stats = db.command('collStats', name)
+    cache = stats.get('wiredTiger', {}).get('cache', {})
+    return {
+        'count': stats.get('count', 0),
+        'avg_obj_size': stats.get('avgObjSize', 0),
+        'size': stats.get('size', 0),
+        'storage_size': stats.get('storageSize', 0),
+        'cache_bytes': cache.get('bytes currently in the cache', 0)
+    }
+
+
+def benchmark_split(db, repetitions=5, restore=True):
+    """Compare scan time and cache residency of the combined and split layouts"""
+    if is_split(db):
+        merge_people_text(db)
+
+    suite = BenchmarkSuite(db, repetitions=repetitions)
+    combined = suite.run(label='combined layout')
+    combined_stats = storage_stats(db, 'people')
+
+    start = time.perf_counter()
+    split_people_text(db)
+    split_time = time.perf_counter() - start
+    split = suite.run(label='split layout')
+    hot_stats = storage_stats(db, 'people')
+    text_stats = storage_stats(db, TEXT_COLLECTION)
+
+    print("\n" + "="*60)
+    print("VERTICAL SPLIT: STORAGE AND CACHE")
+    print("="*60)
+    print(f"{'COLLECTION':20} {'AVG DOC':>10} {'DATA SIZE':>15} {'IN CACHE':>15}")
+    for name, stats in (('people (combined)', combined_stats), ('people (hot)', hot_stats),
+                        (TEXT_COLLECTION, text_stats)):
+        print(f"{name:20} {stats['avg_obj_size']:>9,}B {stats['size']:>15,} {stats['cache_bytes']:>15,}")
+    print(f"Split took {split_time:.2f}s")
+
+    print("\nSCAN TIME (combined -> split, warm p50):")
+    print_comparison(compare_reports(combined, split))
+
+    if restore:
+        merge_people_text(db)
+    return {'combined': combined_stats, 'hot': hot_stats, 'text': text_stats}